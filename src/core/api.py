@@ -1,13 +1,158 @@
 # src/core/api.py
 
 import requests
+from requests.adapters import HTTPAdapter
+import asyncio
 import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 from src.core.cache import CacheManager
-from src.core.exceptions import ConsultaAPIException
+from src.core.exceptions import (
+    ConsultaAPIException, APIConnectionError, APIAuthError, APIClientError,
+    APIServerError, APIResponseError, APICircuitOpenError, APITimeoutError
+)
+from src.core.circuit_breaker import DisjuntorCircuito
+from src.core.single_flight import SingleFlight
+from src.core.dataset import DatasetColunar, ingerir
+from src.core.json_stream import DescodificadorIncremental, iterar_lotes
+from src.core.async_transport import httpx
+from src.utils import json_codec
+from src.utils.settings_manager import (
+    INCREMENTAL_SYNC, INCREMENTAL_SYNC_PARAM, FULL_SYNC_EVERY_MINUTES, POOL_MAXSIZE, STREAM_BATCH_SIZE, COMPRESSION,
+    CONNECT_TIMEOUT_SECONDS, READ_TIMEOUT_SECONDS, INCREMENTAL_READ_TIMEOUT_SECONDS, REQUEST_DEADLINE_SECONDS,
+    MAX_RETRIES, RETRY_BACKOFF_SECONDS,
+    CIRCUIT_BREAKER_FAILURES, CIRCUIT_BREAKER_COOLDOWN_SECONDS, CACHE_STALE_WHILE_REVALIDATE,
+    BULK_MAX_CONCURRENCY
+)
 
 # --- CONSTANTES ---
-API_TIMEOUT_SEGUNDOS = 60
+TAMANHO_BLOCO_DOWNLOAD = 64 * 1024
+
+def _accept_encoding(compressao):
+    """Cabeçalho Accept-Encoding para a compressão configurada ('none', 'gzip' ou 'br')."""
+    if compressao == "none":
+        return "identity"
+    if compressao == "br":
+        if brotli is not None:
+            return "br, gzip, deflate"
+        logging.warning("Compressão 'br' pedida mas o pacote brotli não está instalado; a usar gzip.")
+    return "gzip, deflate"
+
+ACCEPT_ENCODING = _accept_encoding(COMPRESSION)
+
+# Estado da sincronização incremental por cliente: {(url, user): {'ultima_completa': time.monotonic()}}
+# Fica ao nível do módulo para sobreviver à substituição de uma instância (ex: palavra-passe alterada).
+_estado_sync = {}
+_estado_sync_lock = threading.Lock()
+
+# Adaptadores HTTP partilhados por host ("esquema://host:porta"): todas as sessões para o mesmo
+# servidor usam o mesmo pool de ligações keep-alive, em vez de abrir um por instância.
+_adaptadores = {}
+# Registo de instâncias de longa duração, uma por cliente: {(url, user): ConsultaAPI}
+_apis = {}
+_registo_lock = threading.Lock()
+
+# Pedidos idênticos em curso (mesmo cliente e payload) partilham um só pedido HTTP e um só resultado,
+# seja qual for a origem (tela de Consultas ou monitor). Chaves: (url, user, operação ou payload).
+# As sincronizações concluídas são anunciadas aos subscritores (ex: tabela e dashboard da GUI).
+pedidos_partilhados = SingleFlight()
+OPERACAO_SINCRONIZAR = "sincronizar"
+# Busca completa (IDMENSAGEM = 0), partilhada entre o caminho síncrono e o assíncrono
+OPERACAO_BUSCAR_TODOS = "buscar_todos"
+
+class _IngestaoEmLotes:
+    """
+    Ingere os registos de uma busca completa num DatasetColunar à medida que chegam e publica
+    cópias parciais em pedidos_partilhados (a primeira logo após o primeiro lote e depois sempre
+    que o tamanho duplica: custo total linear no número de registos). Recebe lotes já
+    descodificados (anexar) ou blocos de bytes da resposta (alimentar e terminar).
+    """
+    def __init__(self, chave, tamanho_lote=STREAM_BATCH_SIZE):
+        self.chave = chave
+        self.tamanho_lote = tamanho_lote
+        self.dados = DatasetColunar()
+        self._descodificador = DescodificadorIncremental()
+        self._pendentes = []
+        self._proxima_copia = 0
+
+    def anexar(self, lote):
+        self.dados.anexar(lote)
+        if len(self.dados) >= self._proxima_copia:
+            pedidos_partilhados.progredir(self.chave, self.dados.copia)
+            self._proxima_copia = 2 * len(self.dados)
+
+    def alimentar(self, bloco):
+        """Descodifica um bloco de bytes e ingere os registos quando completam um lote."""
+        self._pendentes.extend(self._descodificador.alimentar(bloco))
+        if len(self._pendentes) >= self.tamanho_lote:
+            self.anexar(self._pendentes)
+            self._pendentes = []
+
+    def terminar(self):
+        """Fim da resposta: ingere os registos que faltam (lança ValueError se o JSON estiver truncado)."""
+        self._pendentes.extend(self._descodificador.terminar())
+        if self._pendentes:
+            self.anexar(self._pendentes)
+            self._pendentes = []
+
+def _host(url):
+    partes = urlsplit(url)
+    return f"{partes.scheme}://{partes.netloc}"
+
+def _adaptador_para(url):
+    """Retorna (criando se preciso) o HTTPAdapter partilhado do host do URL."""
+    host = _host(url)
+    with _registo_lock:
+        adaptador = _adaptadores.get(host)
+        if adaptador is None:
+            adaptador = _adaptadores[host] = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE)
+        return host, adaptador
+
+def obter_api(url, user, password):
+    """
+    Retorna a instância de ConsultaAPI deste cliente, criando-a apenas na primeira vez
+    (ou se a palavra-passe mudar). A sessão, o pool de ligações e o cache são reutilizados
+    entre trocas de cliente e ciclos do monitor.
+    """
+    chave = (url, user)
+    with _registo_lock:
+        api = _apis.get(chave)
+        if api is not None and api.password == password:
+            return api
+    api = ConsultaAPI(url, user, password)
+    with _registo_lock:
+        existente = _apis.get(chave)
+        if existente is not None and existente.password == password:
+            return existente # Criada entretanto por outra thread
+        _apis[chave] = api
+        return api
+
+def estatisticas_ligacoes():
+    """
+    Estatísticas de reutilização de ligações por host:
+    {host: {'pedidos': n, 'ligacoes': m, 'reutilizacao': fração de pedidos sem ligação nova}}.
+    """
+    with _registo_lock:
+        adaptadores = list(_adaptadores.items())
+    estatisticas = {}
+    for host, adaptador in adaptadores:
+        pool = adaptador.poolmanager.connection_from_url(host)
+        pedidos, ligacoes = pool.num_requests, pool.num_connections
+        estatisticas[host] = {
+            'pedidos': pedidos,
+            'ligacoes': ligacoes,
+            'reutilizacao': (1 - ligacoes / pedidos) if pedidos else 0.0,
+        }
+    return estatisticas
 
 class ConsultaAPI:
     """
@@ -19,46 +164,188 @@ class ConsultaAPI:
         self.user = user
         self.password = password
         self.session = requests.Session()
-        self.session.headers.update({'Content-Type': 'application/json'})
-        self.cache = CacheManager()
+        self.session.headers.update({'Content-Type': 'application/json', 'Accept-Encoding': ACCEPT_ENCODING})
+        host, adaptador = _adaptador_para(url)
+        self.session.mount(host, adaptador)
+        self.cache = CacheManager(url, user) # Cada cliente tem as suas próprias linhas no cache
+        self.disjuntor = DisjuntorCircuito(user, CIRCUIT_BREAKER_FAILURES, CIRCUIT_BREAKER_COOLDOWN_SECONDS)
         logging.info("Instância de ConsultaAPI criada com o novo método de autenticação.")
 
     def _executar_requisicao(self, payload):
         """
         Método centralizado para executar requisições POST com autenticação Basic.
+        Falhas transitórias (timeout, ligação, 5xx) são repetidas com espera exponencial, dentro
+        de REQUEST_DEADLINE_SECONDS; os erros são lançados com as exceções de src.core.exceptions.
+        Só é usado para respostas pequenas, por isso espera no máximo INCREMENTAL_READ_TIMEOUT_SECONDS.
         """
         logging.info(f"Executando requisição POST para: {self.url} com payload: {payload}")
-        
-        try:
+
+        def pedido():
             response = self.session.post(
                 self.url,
                 json=payload,
                 auth=(self.user, self.password),
-                timeout=API_TIMEOUT_SEGUNDOS
+                timeout=(CONNECT_TIMEOUT_SECONDS, INCREMENTAL_READ_TIMEOUT_SECONDS)
             )
             response.raise_for_status()
-            return response.json()
-        
-        except requests.exceptions.HTTPError as e:
-            msg = f"Erro {e.response.status_code} ao acessar {self.url}."
-            logging.error(f"{msg} Resposta: {e.response.text}")
-            raise ConsultaAPIException(msg)
-        except requests.exceptions.Timeout:
-            msg = f"A requisição para {self.url} excedeu o tempo limite de {API_TIMEOUT_SEGUNDOS} segundos."
-            logging.error(msg)
-            raise ConsultaAPIException(msg)
-        except requests.exceptions.RequestException as e:
-            msg = f"Erro de conexão ao tentar acessar {self.url}: {e}"
-            logging.error(msg)
-            raise ConsultaAPIException(msg)
-        except Exception as e:
-            msg = f"Ocorreu um erro inesperado na requisição: {e}"
-            logging.error(msg)
-            raise ConsultaAPIException(msg)
+            return json_codec.loads(response.content)
 
-    def buscar_todos(self, force_refresh=False):
+        return pedidos_partilhados.executar(
+            self._chave(payload), self._com_retentativas, pedido, prazo=REQUEST_DEADLINE_SECONDS
+        )
+
+    def _executar_requisicao_em_lotes(self, payload, tamanho_lote=STREAM_BATCH_SIZE):
+        """
+        Como _executar_requisicao, mas descodifica a resposta à medida que é descarregada
+        e produz os registos em listas de até 'tamanho_lote', sem guardar o corpo inteiro.
+        Só a abertura do pedido é repetida: depois do primeiro lote entregue já não há retentativas.
+        Um timeout de leitura também não é repetido: um servidor que não responde à busca completa
+        ocuparia o worker durante várias vezes READ_TIMEOUT_SECONDS.
+        """
+        logging.info(f"Executando requisição POST (em lotes) para: {self.url} com payload: {payload}")
+
+        def abrir():
+            response = self.session.post(
+                self.url,
+                json=payload,
+                auth=(self.user, self.password),
+                timeout=(CONNECT_TIMEOUT_SECONDS, READ_TIMEOUT_SECONDS),
+                stream=True
+            )
+            if not response.ok:
+                response.content # Lê o corpo do erro (pequeno), o que devolve a ligação ao pool
+            response.raise_for_status()
+            return response
+
+        with self._com_retentativas(abrir, repetir_leitura=False) as response:
+            try:
+                yield from iterar_lotes(response.iter_content(chunk_size=TAMANHO_BLOCO_DOWNLOAD), tamanho_lote)
+            except Exception as e:
+                erro = self._traduzir_erro(e)
+                logging.error(str(erro))
+                self._registar_falha(erro)
+                raise erro from e
+
+    def _chave(self, operacao):
+        """Chave de pedidos_partilhados: o cliente e a operação (nome ou payload JSON)."""
+        if not isinstance(operacao, str):
+            operacao = json_codec.dumps(operacao)
+        return (self.url, self.user, operacao)
+
+    def _com_retentativas(self, pedido, repetir_leitura=True, prazo=None):
+        """
+        Executa 'pedido' repetindo as falhas transitórias e atualiza o disjuntor do cliente.
+        Sem 'repetir_leitura' um timeout de leitura não é repetido; com 'prazo' (segundos) não
+        se inicia uma tentativa que já não caberia nesse tempo total.
+        """
+        inicio = time.monotonic()
+        for tentativa in range(MAX_RETRIES + 1):
+            try:
+                resultado = pedido()
+            except Exception as e:
+                erro = self._traduzir_erro(e)
+                espera = self._espera_retentativa(tentativa)
+                if self._pode_repetir(erro, tentativa, inicio, espera, repetir_leitura, prazo):
+                    logging.warning(f"{erro} Nova tentativa ({tentativa + 1}/{MAX_RETRIES}) em {espera:.1f} s.")
+                    time.sleep(espera)
+                    continue
+                logging.error(str(erro))
+                self._registar_falha(erro)
+                raise erro from e
+            self.disjuntor.registar_sucesso()
+            return resultado
+
+    async def _com_retentativas_async(self, pedido, repetir_leitura=True, prazo=None):
+        """Equivalente de _com_retentativas para corrotinas ('pedido' cria uma corrotina nova a cada tentativa)."""
+        inicio = time.monotonic()
+        for tentativa in range(MAX_RETRIES + 1):
+            try:
+                resultado = await pedido()
+            except Exception as e:
+                erro = self._traduzir_erro(e)
+                espera = self._espera_retentativa(tentativa)
+                if self._pode_repetir(erro, tentativa, inicio, espera, repetir_leitura, prazo):
+                    logging.warning(f"{erro} Nova tentativa ({tentativa + 1}/{MAX_RETRIES}) em {espera:.1f} s.")
+                    await asyncio.sleep(espera)
+                    continue
+                logging.error(str(erro))
+                self._registar_falha(erro)
+                raise erro from e
+            self.disjuntor.registar_sucesso()
+            return resultado
+
+    @staticmethod
+    def _e_transitorio(erro):
+        """Falhas que podem resultar numa nova tentativa: timeout, ligação e erros 5xx."""
+        return isinstance(erro, (APIConnectionError, APIServerError)) and not isinstance(erro, APICircuitOpenError)
+
+    def _pode_repetir(self, erro, tentativa, inicio, espera, repetir_leitura, prazo):
+        """Indica se a falha deve ser repetida após 'espera' segundos."""
+        if tentativa >= MAX_RETRIES or not self._e_transitorio(erro):
+            return False
+        if not repetir_leitura and isinstance(erro, APITimeoutError) and erro.leitura:
+            return False
+        # A próxima tentativa tem de caber no prazo, incluindo o seu próprio tempo limite de leitura
+        if prazo is not None and time.monotonic() - inicio + espera + INCREMENTAL_READ_TIMEOUT_SECONDS > prazo:
+            return False
+        return True
+
+    @staticmethod
+    def _espera_retentativa(tentativa):
+        """Espera exponencial com jitter: metade fixa e metade aleatória de base * 2^tentativa."""
+        base = RETRY_BACKOFF_SECONDS * (2 ** tentativa)
+        return base / 2 + random.uniform(0, base / 2)
+
+    def _registar_falha(self, erro):
+        if self._e_transitorio(erro):
+            self.disjuntor.registar_falha()
+        else:
+            self.disjuntor.libertar_teste()
+
+    def verificar_disjuntor(self):
+        """Lança APICircuitOpenError se este cliente estiver suspenso pelo disjuntor (usado pelo monitor)."""
+        self.disjuntor.verificar()
+
+    def _erro_http(self, status_code, texto):
+        """Exceção tipada para uma resposta HTTP de erro."""
+        msg = f"Erro {status_code} ao acessar {self.url}."
+        logging.debug(f"{msg} Resposta: {texto}")
+        if status_code == 401:
+            return APIAuthError(f"Autenticação falhou em {self.url}. Verifique as credenciais.")
+        if status_code >= 500:
+            return APIServerError(status_code, msg)
+        return APIClientError(status_code, msg)
+
+    def _traduzir_erro(self, e):
+        """Converte uma exceção do requests, do httpx ou do codec JSON numa exceção de src.core.exceptions."""
+        if isinstance(e, ConsultaAPIException):
+            return e
+        if isinstance(e, requests.exceptions.HTTPError):
+            return self._erro_http(e.response.status_code, e.response.text)
+        if httpx is not None and isinstance(e, httpx.HTTPStatusError):
+            return self._erro_http(e.response.status_code, e.response.text)
+
+        if isinstance(e, requests.exceptions.Timeout) or (httpx is not None and isinstance(e, httpx.TimeoutException)):
+            leitura = isinstance(e, requests.exceptions.ReadTimeout) or (httpx is not None and isinstance(e, httpx.ReadTimeout))
+            erro = APITimeoutError(
+                f"A requisição para {self.url} excedeu o tempo limite de "
+                + ("leitura." if leitura else f"ligação ({CONNECT_TIMEOUT_SECONDS} s)."),
+                leitura=leitura
+            )
+        elif isinstance(e, requests.exceptions.RequestException) or (httpx is not None and isinstance(e, httpx.RequestError)):
+            erro = APIConnectionError(f"Erro de conexão ao tentar acessar {self.url}: {e}")
+        elif isinstance(e, json_codec.ERROS_JSON):
+            erro = APIResponseError(f"Resposta inválida de {self.url}: {e}")
+        else:
+            erro = ConsultaAPIException(f"Ocorreu um erro inesperado na requisição: {e}")
+        return erro
+
+    def buscar_todos(self, force_refresh=False, ao_progredir=None):
         """
         Busca todos os registros enviando IDMENSAGEM = 0.
+        A resposta é descodificada e ingerida em lotes enquanto é descarregada; se 'ao_progredir'
+        for indicado, recebe cópias parciais do DatasetColunar (ver _IngestaoEmLotes) para a GUI
+        mostrar dados antes do fim, também quando se junta a uma busca já em curso (ex: do monitor).
         """
         if not force_refresh:
             # --- ALTERAÇÃO AQUI ---
@@ -67,16 +354,29 @@ class ConsultaAPI:
                 logging.info("Retornando dados do cache.")
                 return dados_cache
 
+        return pedidos_partilhados.executar(
+            self._chave(OPERACAO_BUSCAR_TODOS), self._buscar_todos_api, ao_progredir=ao_progredir
+        )
+
+    def _buscar_todos_api(self):
         logging.info("Buscando dados frescos da API...")
-        payload = {"IDMENSAGEM": 0}
-        dados = self._executar_requisicao(payload)
-        
+        ingestao = _IngestaoEmLotes(self._chave(OPERACAO_BUSCAR_TODOS))
+        for lote in self._executar_requisicao_em_lotes({"IDMENSAGEM": 0}):
+            ingestao.anexar(lote)
+        return self._guardar_busca_completa(ingestao.dados)
+
+    def carregar(self, ao_progredir=None):
+        """
+        Carga inicial de um cliente com a política stale-while-revalidate.
+        Retorna (dados, obsoleto): o cache, mesmo desatualizado (entre o soft e o hard TTL),
+        é devolvido de imediato com obsoleto=True para a GUI o revalidar em segundo plano;
+        sem cache utilizável é feita uma busca completa.
+        """
+        dados, obsoleto = self.cache.ler_cache(permitir_obsoleto=CACHE_STALE_WHILE_REVALIDATE)
         if dados:
-            # --- ALTERAÇÃO AQUI ---
-            self.cache.set_cached_data(dados)
-            logging.info("Dados salvos no cache.")
-            
-        return dados
+            logging.info("Retornando dados do cache" + (" (desatualizados)." if obsoleto else "."))
+            return ingerir(dados), obsoleto
+        return self.buscar_todos(force_refresh=True, ao_progredir=ao_progredir), False
 
     def consultar(self, id_mensagem):
         """
@@ -85,9 +385,224 @@ class ConsultaAPI:
         payload = {"IDMENSAGEM": int(id_mensagem)}
         return self._executar_requisicao(payload)
 
+    def sincronizar(self, dados_locais=None):
+        """
+        Sincronização incremental: pede à API apenas os registos com IDMENSAGEM
+        superior ao maior já conhecido para este cliente e mescla-os nos dados locais.
+        O pedido usa o campo INCREMENTAL_SYNC_PARAM e não IDMENSAGEM, que consulta um único
+        registo (ver consultar()). Sem esse campo configurado, sem dados locais ou com a
+        opção desativada faz uma busca completa.
+        Passados FULL_SYNC_EVERY_MINUTES desde a última busca completa é feita outra, para
+        reconciliar registos alterados ou removidos no servidor (por tempo e não por número de
+        sincronizações, para que o intervalo adaptativo não multiplique as buscas completas).
+        Retorna sempre um DatasetColunar (a ingestão acontece aqui, na thread de trabalho).
+        Uma sincronização do mesmo cliente já em curso é partilhada em vez de repetida.
+        """
+        return pedidos_partilhados.executar(self._chave(OPERACAO_SINCRONIZAR), self._sincronizar, dados_locais)
+
+    def _sincronizar(self, dados_locais):
+        locais = ingerir(dados_locais)
+        ultimo_id, completa = self._planear_sincronizacao(locais)
+        if completa:
+            return ingerir(self.buscar_todos(force_refresh=True))
+
+        logging.info(f"Sincronização incremental a partir do IDMENSAGEM {ultimo_id}...")
+        resposta = self._executar_requisicao({INCREMENTAL_SYNC_PARAM: ultimo_id})
+        return self._mesclar_incrementais(locais, resposta, ultimo_id)
+
+    async def sincronizar_async(self, transporte, dados_locais=None):
+        """
+        Versão de sincronizar() para o transporte assíncrono partilhado: o pedido HTTP corre
+        no event loop e a escrita no cache e a ingestão correm numa thread do executor.
+        """
+        return await pedidos_partilhados.executar_async(
+            self._chave(OPERACAO_SINCRONIZAR), lambda: self._sincronizar_async(transporte, dados_locais)
+        )
+
+    async def _sincronizar_async(self, transporte, dados_locais):
+        locais = ingerir(dados_locais)
+        ultimo_id, completa = self._planear_sincronizacao(locais)
+        if completa:
+            # Mesma chave que buscar_todos(): uma carga da tela de Consultas em curso é reaproveitada
+            return await pedidos_partilhados.executar_async(
+                self._chave(OPERACAO_BUSCAR_TODOS), lambda: self._buscar_todos_async(transporte)
+            )
+
+        logging.info(f"Sincronização incremental (assíncrona) a partir do IDMENSAGEM {ultimo_id}...")
+        resposta = await self._executar_requisicao_async(transporte, {INCREMENTAL_SYNC_PARAM: ultimo_id})
+        return await transporte.em_thread(self._mesclar_incrementais, locais, resposta, ultimo_id)
+
+    def _planear_sincronizacao(self, locais):
+        """
+        Retorna (ultimo_id, completa): o ID de partida e se a busca deve ser completa.
+        O ID de partida vem só dos dados locais a mesclar: se estes estiverem atrasados face a outra
+        sincronização (ex: resultado de uma consulta por ID), os registos em falta são pedidos de novo.
+        """
+        chave = (self.url, self.user)
+        ultimo_id = locais.maior_id()
+        with _estado_sync_lock:
+            # Os dados locais iniciais (cache ou primeira busca) contam como a última busca completa
+            estado = _estado_sync.setdefault(chave, {'ultima_completa': time.monotonic()})
+            reconciliar = (
+                FULL_SYNC_EVERY_MINUTES > 0
+                and time.monotonic() - estado['ultima_completa'] >= 60 * FULL_SYNC_EVERY_MINUTES
+            )
+        completa = not INCREMENTAL_SYNC or not INCREMENTAL_SYNC_PARAM or not locais or ultimo_id <= 0 or reconciliar
+        return ultimo_id, completa
+
+    def _registar_busca_completa(self):
+        """Marca o fim de uma busca completa bem-sucedida, venha ela do monitor, de F5 ou da carga inicial."""
+        with _estado_sync_lock:
+            _estado_sync[(self.url, self.user)] = {'ultima_completa': time.monotonic()}
+
+    async def _buscar_todos_async(self, transporte):
+        """
+        Equivalente assíncrono de _buscar_todos_api: o corpo é lido em blocos no event loop e cada
+        bloco é descodificado e ingerido numa thread, com os mesmos lotes e cópias parciais.
+        Como no caminho síncrono, só a abertura do pedido é repetida.
+        """
+        logging.info("Buscando dados frescos da API (assíncrono)...")
+        ingestao = _IngestaoEmLotes(self._chave(OPERACAO_BUSCAR_TODOS))
+        response = await self._com_retentativas_async(
+            lambda: self._abrir_async(transporte, {"IDMENSAGEM": 0}), repetir_leitura=False
+        )
+        try:
+            async for bloco in response.aiter_bytes(TAMANHO_BLOCO_DOWNLOAD):
+                await transporte.em_thread(ingestao.alimentar, bloco)
+            await transporte.em_thread(ingestao.terminar)
+        except Exception as e:
+            erro = self._traduzir_erro(e)
+            logging.error(str(erro))
+            self._registar_falha(erro)
+            raise erro from e
+        finally:
+            await response.aclose()
+        return await transporte.em_thread(self._guardar_busca_completa, ingestao.dados)
+
+    async def _abrir_async(self, transporte, payload):
+        """
+        Abre um POST assíncrono em modo streaming (como cliente.stream(), mas sem bloco 'async with',
+        para que só a abertura seja repetida); quem o chama lê o corpo e fecha a resposta.
+        """
+        logging.info(f"Executando requisição POST (assíncrona, em lotes) para: {self.url} com payload: {payload}")
+        cliente = transporte.cliente
+        pedido = cliente.build_request(
+            "POST",
+            self.url,
+            json=payload,
+            headers={'Accept-Encoding': ACCEPT_ENCODING},
+            timeout=httpx.Timeout(READ_TIMEOUT_SECONDS, connect=CONNECT_TIMEOUT_SECONDS)
+        )
+        response = await cliente.send(pedido, auth=(self.user, self.password), stream=True)
+        if response.is_error:
+            await response.aread() # Lê o corpo do erro (pequeno), o que devolve a ligação ao pool
+            await response.aclose()
+        response.raise_for_status()
+        return response
+
+    def _guardar_busca_completa(self, dados):
+        """Grava no cache o resultado (DatasetColunar) de uma busca completa e regista-a como a última."""
+        if dados:
+            self.cache.set_cached_data(dados.iterar_registos())
+            logging.info("Dados salvos no cache.")
+        self._registar_busca_completa()
+        return dados
+
+    def _mesclar_incrementais(self, locais, resposta, ultimo_id):
+        """Acrescenta aos dados locais os registos da resposta com IDMENSAGEM acima de 'ultimo_id'."""
+        if isinstance(resposta, dict):
+            resposta = [resposta]
+
+        novos_por_id = {}
+        for item in resposta or []:
+            try:
+                id_item = int(item.get("IDMENSAGEM") or 0)
+            except (ValueError, TypeError, AttributeError):
+                continue
+            if id_item > ultimo_id:
+                novos_por_id[id_item] = item
+        novos = list(novos_por_id.values())
+
+        # Os registos novos têm IDs acima de todos os locais, logo basta acrescentá-los
+        dados = locais.com_novos(novos) if novos else locais
+        logging.info(f"Sincronização incremental: {len(novos)} registos novos (total: {len(dados)}).")
+
+        # Sem registos novos apenas renova o timestamp do cache (continua atualizado)
+        self.cache.upsert_registos(novos)
+        return dados
+
+    async def _executar_requisicao_async(self, transporte, payload):
+        """Equivalente assíncrono de _executar_requisicao, sobre o pool de ligações do transporte."""
+        return await pedidos_partilhados.executar_async(
+            self._chave(payload),
+            lambda: self._com_retentativas_async(
+                lambda: self._pedido_async(transporte, payload, INCREMENTAL_READ_TIMEOUT_SECONDS), prazo=REQUEST_DEADLINE_SECONDS
+            )
+        )
+
+    async def _pedido_async(self, transporte, payload, tempo_leitura):
+        """
+        Um único POST assíncrono (sem partilha nem novas tentativas); retorna o JSON descodificado.
+        A descodificação corre numa thread para não parar o event loop.
+        """
+        logging.info(f"Executando requisição POST (assíncrona) para: {self.url} com payload: {payload}")
+        response = await transporte.cliente.post(
+            self.url,
+            json=payload,
+            auth=(self.user, self.password),
+            headers={'Accept-Encoding': ACCEPT_ENCODING},
+            timeout=httpx.Timeout(tempo_leitura, connect=CONNECT_TIMEOUT_SECONDS)
+        )
+        response.raise_for_status()
+        return await transporte.em_thread(json_codec.loads, response.content)
+
     def consultar_by_trackid(self, track_id):
         """
         Consulta o último registro de um cliente pelo TrackID.
         """
         payload = {"TrackID": track_id}
-        return self._executar_requisicao(payload)
\ No newline at end of file
+        return self._executar_requisicao(payload)
+
+    def consultar_ids(self, ids, max_simultaneos=BULK_MAX_CONCURRENCY):
+        """Consulta vários IDMENSAGEM em paralelo. Retorna (registos, erros); ver _consultar_em_lote."""
+        return self._consultar_em_lote(ids, self.consultar, max_simultaneos)
+
+    def consultar_trackids(self, track_ids, max_simultaneos=BULK_MAX_CONCURRENCY):
+        """Consulta vários TrackIDs em paralelo. Retorna (registos, erros); ver _consultar_em_lote."""
+        return self._consultar_em_lote(track_ids, self.consultar_by_trackid, max_simultaneos)
+
+    def _consultar_em_lote(self, itens, consulta, max_simultaneos):
+        """
+        Executa 'consulta' para cada item com no máximo 'max_simultaneos' pedidos em simultâneo
+        (a API só aceita um ID por pedido). Retorna (registos, erros): os registos de todas as
+        respostas, sem IDMENSAGEM repetidos, e {item: mensagem} dos itens que falharam.
+        """
+        itens = list(dict.fromkeys(itens))
+        if not itens:
+            return [], {}
+
+        def consultar_item(item):
+            try:
+                return item, consulta(item), None
+            except (ConsultaAPIException, ValueError) as e:
+                return item, None, str(e)
+
+        registos_por_id = {}
+        sem_id = []
+        erros = {}
+        with ThreadPoolExecutor(max_workers=max(1, min(max_simultaneos, len(itens)))) as executor:
+            # map() devolve os resultados pela ordem dos itens
+            for item, resposta, erro in executor.map(consultar_item, itens):
+                if erro is not None:
+                    erros[item] = erro
+                    continue
+                if isinstance(resposta, dict):
+                    resposta = [resposta]
+                for registo in resposta or []:
+                    id_mensagem = registo.get("IDMENSAGEM") if isinstance(registo, dict) else None
+                    if id_mensagem is None:
+                        sem_id.append(registo)
+                    else:
+                        registos_por_id[id_mensagem] = registo
+        logging.info(f"Consulta em lote: {len(itens)} itens, {len(registos_por_id) + len(sem_id)} registos, {len(erros)} erros.")
+        return list(registos_por_id.values()) + sem_id, erros
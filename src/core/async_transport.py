@@ -0,0 +1,91 @@
+# src/core/async_transport.py
+
+import asyncio
+import logging
+import threading
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from src.utils.settings_manager import ASYNC_TRANSPORT, POOL_MAXSIZE
+
+class TransporteAssincrono:
+    """
+    Transporte HTTP assíncrono partilhado por todos os clientes: um único event loop
+    numa thread dedicada e um único httpx.AsyncClient, cujo pool de ligações é
+    reutilizado entre pedidos (todos os clientes falam com o mesmo servidor).
+    Os pedidos são submetidos a partir de qualquer thread com submeter(), que
+    devolve um concurrent.futures.Future.
+    """
+    def __init__(self, max_ligacoes=POOL_MAXSIZE):
+        self.max_ligacoes = max_ligacoes
+        self.loop = asyncio.new_event_loop()
+        self._cliente = None
+        self._thread = threading.Thread(target=self._correr_loop, name="TransporteAssincrono", daemon=True)
+        self._thread.start()
+
+    def _correr_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    @property
+    def cliente(self):
+        """httpx.AsyncClient partilhado (criado na thread do loop, na primeira utilização)."""
+        if self._cliente is None:
+            self._cliente = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_ligacoes,
+                    max_keepalive_connections=self.max_ligacoes,
+                ),
+                headers={'Content-Type': 'application/json'},
+            )
+        return self._cliente
+
+    def submeter(self, coro):
+        """Agenda uma corrotina no loop partilhado e retorna o concurrent.futures.Future do resultado."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    async def em_thread(self, func, *args):
+        """Corre trabalho bloqueante (SQLite, ingestão) fora do loop, para não atrasar os outros pedidos."""
+        return await self.loop.run_in_executor(None, func, *args)
+
+    def fechar(self):
+        """Fecha o pool de ligações e para o event loop."""
+        async def _fechar():
+            if self._cliente is not None:
+                await self._cliente.aclose()
+        try:
+            self.submeter(_fechar()).result(timeout=5)
+        except Exception as e:
+            logging.warning(f"Erro ao fechar o transporte assíncrono: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+_transporte = None
+_transporte_lock = threading.Lock()
+
+def obter_transporte():
+    """
+    Retorna o transporte assíncrono partilhado, criando-o na primeira chamada.
+    Retorna None se estiver desativado em settings.ini ou se o httpx não estiver instalado
+    (nesse caso os pedidos continuam a ser feitos com requests, em threads).
+    """
+    global _transporte
+    if not ASYNC_TRANSPORT or httpx is None:
+        return None
+    with _transporte_lock:
+        if _transporte is None:
+            _transporte = TransporteAssincrono()
+            logging.info("Transporte HTTP assíncrono (httpx) iniciado.")
+        return _transporte
+
+
+def fechar_transporte():
+    """Fecha o transporte partilhado, se tiver chegado a ser criado (ex: ao sair da aplicação)."""
+    global _transporte
+    with _transporte_lock:
+        if _transporte is not None:
+            _transporte.fechar()
+            _transporte = None
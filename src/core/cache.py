@@ -1,72 +1,228 @@
 # src/core/cache.py
 import sqlite3
-import json
 from datetime import datetime, timedelta
 import logging
+import threading
 # --- IMPORTAÇÃO CORRIGIDA ---
-from src.utils.settings_manager import CACHE_DURATION_MINUTES
+from src.utils.settings_manager import CACHE_SOFT_TTL_MINUTES, CACHE_HARD_TTL_MINUTES
+from src.utils import json_codec
 
 CACHE_DB = 'cache.db'
-CACHE_ID = 1 # Chave fixa para o cache de linha única
+SQLITE_TIMEOUT_SEGUNDOS = 30
+
+# Colunas da API guardadas em colunas próprias; o resto vai para 'extras' (JSON)
+COLUNAS_TIPADAS = ("IDMENSAGEM", "DATAHORA", "LATITUDE", "LONGITUDE", "PLACA", "TrackID")
+# Tipos que o SQLite guarda e devolve sem alteração numa coluna sem afinidade
+# (bool fica de fora: seria devolvido como 0/1)
+TIPOS_ESCALARES = (str, int, float)
+
+# Versão do esquema (PRAGMA user_version). Ao mudar, as tabelas do cache são recriadas e os
+# dados voltam a ser buscados à API. Versão 2: colunas sem afinidade (o SQLite devolvia o
+# TrackID 12345 como '12345') e clientes identificados por "user@url" em vez de só "user".
+VERSAO_ESQUEMA = 2
+
+# Bases de dados cujas tabelas já foram criadas neste processo (evita repetir o CREATE TABLE)
+_bases_inicializadas = set()
+_bases_lock = threading.Lock()
 
 class CacheManager:
-    """Gerencia a leitura e escrita de dados de cache usando SQLite."""
-    
-    def __init__(self):
+    """
+    Gerencia a leitura e escrita de dados de cache usando SQLite.
+    Cada registo é uma linha da tabela 'registos', indexada por (cliente, IDMENSAGEM),
+    e cada cliente tem a sua própria linha de metadados em 'cache_meta'.
+    """
+
+    def __init__(self, url, user):
         """Inicializa o banco de dados ao criar a instância."""
+        # Como o registo de APIs, o cliente é identificado por (url, user): o mesmo
+        # utilizador em dois servidores diferentes não partilha linhas
+        self.cliente = f"{user}@{url}"
         self._init_db()
 
+    def _connect(self):
+        return sqlite3.connect(CACHE_DB, timeout=SQLITE_TIMEOUT_SEGUNDOS)
+
     def _init_db(self):
-        """Inicializa a tabela de cache, se ainda não existir."""
+        """Inicializa as tabelas de cache, se ainda não existirem (uma só vez por processo)."""
+        with _bases_lock:
+            if CACHE_DB in _bases_inicializadas:
+                return
         try:
-            with sqlite3.connect(CACHE_DB) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
-                # Adiciona CACHE_ID como chave primária
-                cursor.execute('''CREATE TABLE IF NOT EXISTS api_cache (
-                                    id INTEGER PRIMARY KEY, 
-                                    data TEXT NOT NULL, 
-                                    timestamp DATETIME NOT NULL)''')
+                cursor.execute("PRAGMA journal_mode=WAL")
+                versao = cursor.execute("PRAGMA user_version").fetchone()[0]
+                if versao < VERSAO_ESQUEMA:
+                    # Linhas de versões anteriores (tipos alterados, chave antiga do cliente) são descartadas
+                    logging.info(f"Cache: esquema {versao} substituído pela versão {VERSAO_ESQUEMA}.")
+                    cursor.execute("DROP TABLE IF EXISTS registos")
+                    cursor.execute("DROP TABLE IF EXISTS cache_meta")
+                    cursor.execute(f"PRAGMA user_version = {VERSAO_ESQUEMA}")
+                # As colunas de valores não declaram tipo: cada valor volta com o tipo em que chegou da API
+                cursor.execute('''CREATE TABLE IF NOT EXISTS registos (
+                                    cliente TEXT NOT NULL,
+                                    idmensagem INTEGER NOT NULL,
+                                    datahora,
+                                    latitude,
+                                    longitude,
+                                    placa,
+                                    trackid,
+                                    extras TEXT,
+                                    PRIMARY KEY (cliente, idmensagem)) WITHOUT ROWID''')
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_registos_trackid ON registos (cliente, trackid)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_registos_datahora ON registos (cliente, datahora)")
+                cursor.execute('''CREATE TABLE IF NOT EXISTS cache_meta (
+                                    cliente TEXT PRIMARY KEY,
+                                    timestamp DATETIME NOT NULL,
+                                    total INTEGER NOT NULL,
+                                    max_id INTEGER NOT NULL)''')
+                # Remove a tabela antiga de linha única (um blob JSON partilhado por todos os clientes)
+                cursor.execute("DROP TABLE IF EXISTS api_cache")
                 conn.commit()
+            with _bases_lock:
+                _bases_inicializadas.add(CACHE_DB)
         except sqlite3.Error as e:
             logging.error(f"Erro ao inicializar o banco de dados de cache: {e}")
 
-    def get_cached_data(self):
-        """Recupera os dados de cache válidos (não expirados)."""
+    @staticmethod
+    def _registo_para_linha(cliente, registo):
+        """Converte um registo da API num tuplo pronto para o INSERT (ou None se não tiver IDMENSAGEM)."""
         try:
-            with sqlite3.connect(CACHE_DB) as conn:
-                cursor = conn.cursor()
-                # Busca pelo ID fixo
-                cursor.execute("SELECT data, timestamp FROM api_cache WHERE id = ?", (CACHE_ID,))
-                row = cursor.fetchone()
-                
+            id_mensagem = int(registo.get("IDMENSAGEM"))
+        except (ValueError, TypeError, AttributeError):
+            return None
+        extras = {k: v for k, v in registo.items() if k not in COLUNAS_TIPADAS}
+        if type(registo["IDMENSAGEM"]) is not int:
+            extras["IDMENSAGEM"] = registo["IDMENSAGEM"] # Ex: "123", devolvido tal como veio
+        valores = []
+        for coluna in COLUNAS_TIPADAS[1:]:
+            valor = registo.get(coluna)
+            if valor is not None and type(valor) not in TIPOS_ESCALARES:
+                extras[coluna] = valor # Ex: bool ou objeto JSON, que o SQLite não guarda tal como está
+                valor = None
+            valores.append(valor)
+        return (cliente, id_mensagem, *valores, json_codec.dumps(extras) if extras else None)
+
+    @staticmethod
+    def _linha_para_registo(linha):
+        """Reconstrói o dicionário no formato da API a partir de uma linha da tabela."""
+        id_mensagem, datahora, latitude, longitude, placa, trackid, extras = linha
+        registo = {
+            "DATAHORA": datahora,
+            "IDMENSAGEM": id_mensagem,
+            "LATITUDE": latitude,
+            "LONGITUDE": longitude,
+            "PLACA": placa,
+            "TrackID": trackid,
+        }
+        if extras:
+            registo.update(json_codec.loads(extras))
+        return registo
+
+    def _gravar_linhas(self, cursor, registos):
+        """Grava os registos (qualquer iterável, consumido um a um) e retorna quantos foram gravados."""
+        contagem = {'gravados': 0, 'ignorados': 0}
+        def linhas():
+            for registo in registos:
+                linha = self._registo_para_linha(self.cliente, registo)
+                if linha:
+                    contagem['gravados'] += 1
+                    yield linha
+                else:
+                    contagem['ignorados'] += 1
+        cursor.executemany("""
+            INSERT OR REPLACE INTO registos
+                (cliente, idmensagem, datahora, latitude, longitude, placa, trackid, extras)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, linhas())
+        if contagem['ignorados']:
+            logging.warning(f"Cache: {contagem['ignorados']} registos sem IDMENSAGEM válido foram ignorados.")
+        return contagem['gravados']
+
+    def _atualizar_meta(self, cursor):
+        cursor.execute("""
+            INSERT OR REPLACE INTO cache_meta (cliente, timestamp, total, max_id)
+            SELECT ?, ?, COUNT(*), COALESCE(MAX(idmensagem), 0) FROM registos WHERE cliente = ?
+            """, (self.cliente, datetime.now().isoformat(), self.cliente))
+
+    def get_meta(self):
+        """Retorna os metadados de frescura do cliente: {'timestamp', 'total', 'max_id'} ou None."""
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT timestamp, total, max_id FROM cache_meta WHERE cliente = ?", (self.cliente,)
+                ).fetchone()
                 if row:
-                    data_json, timestamp_str = row
-                    timestamp = datetime.fromisoformat(timestamp_str)
-                    
-                    if datetime.now() - timestamp < timedelta(minutes=CACHE_DURATION_MINUTES):
-                        logging.info("Cache válido encontrado. A carregar dados do cache.")
-                        return json.loads(data_json)
-                    else:
-                        logging.warning("Cache expirado.")
-        except (sqlite3.Error, json.JSONDecodeError) as e:
+                    return {'timestamp': datetime.fromisoformat(row[0]), 'total': row[1], 'max_id': row[2]}
+        except (sqlite3.Error, ValueError) as e:
+            logging.error(f"Erro ao ler os metadados do cache: {e}")
+        return None
+
+    def get_cached_data(self):
+        """Recupera os dados de cache válidos (dentro do soft TTL) deste cliente."""
+        return self.ler_cache(permitir_obsoleto=False)[0]
+
+    def ler_cache(self, permitir_obsoleto=True):
+        """
+        Retorna (dados, obsoleto). Dentro do soft TTL os dados estão atualizados; entre o soft
+        e o hard TTL só são devolvidos com 'permitir_obsoleto' (e obsoleto=True). Depois do
+        hard TTL, ou sem cache, retorna (None, False).
+        """
+        meta = self.get_meta()
+        if not meta:
+            return None, False
+        idade = datetime.now() - meta['timestamp']
+        obsoleto = idade >= timedelta(minutes=CACHE_SOFT_TTL_MINUTES)
+        if obsoleto and (not permitir_obsoleto or idade >= timedelta(minutes=CACHE_HARD_TTL_MINUTES)):
+            logging.warning(f"Cache expirado para o cliente '{self.cliente}'.")
+            return None, False
+        dados = self._ler_registos()
+        return dados, obsoleto and dados is not None
+
+    def _ler_registos(self):
+        try:
+            with self._connect() as conn:
+                cursor = conn.execute("""
+                    SELECT idmensagem, datahora, latitude, longitude, placa, trackid, extras
+                    FROM registos WHERE cliente = ? ORDER BY idmensagem
+                    """, (self.cliente,))
+                dados = [self._linha_para_registo(linha) for linha in cursor]
+            logging.info(f"Cache válido encontrado. A carregar {len(dados)} registos do cache.")
+            return dados or None
+        except (sqlite3.Error, *json_codec.ERROS_JSON) as e:
             logging.error(f"Erro ao ler o cache: {e}")
         return None
 
     def set_cached_data(self, data):
-        """Salva os dados no cache usando INSERT OR REPLACE para upsert atômico."""
+        """Substitui todos os registos deste cliente numa única transação."""
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute("DELETE FROM registos WHERE cliente = ?", (self.cliente,))
+                total = self._gravar_linhas(cursor, data)
+                self._atualizar_meta(cursor)
+                conn.commit()
+                logging.info(f"Dados salvos no cache ({total} registos).")
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao salvar no cache: {e}")
+
+    def upsert_registos(self, registos):
+        """
+        Insere ou atualiza apenas os registos indicados (usado pela sincronização incremental).
+        Mesmo sem registos novos renova o timestamp: a sincronização confirmou que o cache está atualizado.
+        """
         try:
-            with sqlite3.connect(CACHE_DB) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
-                data_json = json.dumps(data)
-                timestamp = datetime.now().isoformat()
-                
-                # CORREÇÃO: Usar INSERT OR REPLACE INTO para upsert atômico (Error 4)
-                cursor.execute("""
-                    INSERT OR REPLACE INTO api_cache (id, data, timestamp) 
-                    VALUES (?, ?, ?)
-                    """, (CACHE_ID, data_json, timestamp))
-                
+                if registos:
+                    total = self._gravar_linhas(cursor, registos)
+                    self._atualizar_meta(cursor)
+                    logging.info(f"Cache atualizado com {total} registos novos.")
+                else:
+                    cursor.execute(
+                        "UPDATE cache_meta SET timestamp = ? WHERE cliente = ?",
+                        (datetime.now().isoformat(), self.cliente)
+                    )
                 conn.commit()
-                logging.info("Dados salvos no cache.")
         except sqlite3.Error as e:
-            logging.error(f"Erro ao salvar no cache: {e}")
\ No newline at end of file
+            logging.error(f"Erro ao atualizar o cache: {e}")
@@ -0,0 +1,80 @@
+# src/core/circuit_breaker.py
+
+import logging
+import threading
+import time
+
+from src.core.exceptions import APICircuitOpenError
+
+class DisjuntorCircuito:
+    """
+    Disjuntor (circuit breaker) por cliente. Após 'limite_falhas' falhas consecutivas de
+    ligação/servidor o circuito abre e os pedidos do monitor são recusados de imediato
+    durante 'espera_segundos'. Passada a espera é permitida uma única tentativa de teste
+    (meio-aberto): enquanto decorre os restantes pedidos continuam a ser recusados; se resultar
+    o circuito fecha e se falhar volta a abrir por mais um período.
+    """
+    def __init__(self, nome, limite_falhas, espera_segundos):
+        self.nome = nome
+        self.limite_falhas = limite_falhas
+        self.espera_segundos = espera_segundos
+        self.falhas_consecutivas = 0
+        self.aberto_ate = None # time.monotonic() até ao qual os pedidos são recusados
+        self.teste_desde = None # time.monotonic() do início da tentativa de teste em curso
+        self._lock = threading.Lock()
+
+    @property
+    def ativo(self):
+        return self.limite_falhas > 0
+
+    def verificar(self):
+        """Lança APICircuitOpenError se o circuito estiver aberto e a espera ainda não tiver passado."""
+        if not self.ativo:
+            return
+        with self._lock:
+            agora = time.monotonic()
+            if self.teste_desde is not None:
+                if agora - self.teste_desde < self.espera_segundos:
+                    raise APICircuitOpenError(
+                        f"Cliente '{self.nome}' temporariamente suspenso: tentativa de teste em curso."
+                    )
+                # A tentativa anterior nunca terminou (ex: tarefa cancelada): permite outra
+                self.teste_desde = agora
+                return
+            if self.aberto_ate is None:
+                return
+            restante = self.aberto_ate - agora
+            if restante <= 0:
+                # Meio-aberto: só este pedido passa; uma nova falha reabre de imediato
+                self.aberto_ate = None
+                self.falhas_consecutivas = self.limite_falhas - 1
+                self.teste_desde = agora
+                return
+        raise APICircuitOpenError(
+            f"Cliente '{self.nome}' temporariamente suspenso após falhas repetidas. "
+            f"Nova tentativa em {int(restante) + 1} segundos."
+        )
+
+    def registar_sucesso(self):
+        with self._lock:
+            self.falhas_consecutivas = 0
+            self.aberto_ate = None
+            self.teste_desde = None
+
+    def registar_falha(self):
+        if not self.ativo:
+            return
+        with self._lock:
+            self.falhas_consecutivas += 1
+            self.teste_desde = None
+            if self.falhas_consecutivas >= self.limite_falhas and self.aberto_ate is None:
+                self.aberto_ate = time.monotonic() + self.espera_segundos
+                logging.warning(
+                    f"Circuito aberto para '{self.nome}' após {self.falhas_consecutivas} falhas consecutivas "
+                    f"(espera de {self.espera_segundos} segundos)."
+                )
+
+    def libertar_teste(self):
+        """A tentativa de teste terminou sem mostrar o estado do servidor (ex: erro 4xx): permite outra."""
+        with self._lock:
+            self.teste_desde = None
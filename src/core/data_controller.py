@@ -1,99 +1,233 @@
 # src/core/data_controller.py
 
 import logging
-from datetime import datetime
+from array import array
+from collections import OrderedDict
+from datetime import timedelta
 import math
 
 # --- IMPORTAÇÕES CORRIGIDAS ---
-from src.utils.data_utils import chave_de_ordenacao_segura
+from src.core.dataset import DatasetColunar, ingerir
+from src.core.ngram_index import IndiceTrigramas
+from src.utils.datetime_utils import date_to_timestamp
+
+# Número de resultados de filtro recentes guardados (ex: para o backspace ser instantâneo)
+TAMANHO_CACHE_FILTROS = 8
 
 class DataController:
     """
     Controla o estado dos dados da aplicação, incluindo ordenação,
     filtragem e paginação.
+    Os dados ficam num DatasetColunar e o resultado filtrado/ordenado é apenas
+    um array de índices de linha; os dicionários só são criados para as linhas exibidas.
     """
     def __init__(self, todas_as_colunas, itens_por_pagina):
-        self.dados_completos = []
-        self.dados_filtrados = []
-        
+        self.dataset = DatasetColunar()
+        self.indices_filtrados = array('q')
+        # (coluna, desc) pela qual indices_filtrados está ordenado, ou None
+        self._ordem_indices = None
+        # Índices de texto por coluna, construídos sob pedido no primeiro filtro
+        self._indices_texto = {}
+        # Filtro a que corresponde indices_filtrados e LRU de resultados recentes:
+        # (termo, coluna, data_inicio, data_fim, exato) -> (índices, ordem desses índices)
+        self._filtro_atual = None
+        self._cache_filtros = OrderedDict()
+
         self.todas_as_colunas = todas_as_colunas
         self.itens_por_pagina = itens_por_pagina
-        
+
         # Estado de ordenação
         self.coluna_ordenacao = "DATAHORA"
         self.ordem_desc = True
-        
+
         # Estado de filtragem
         self.termo_filtro = ""
         self.coluna_filtro = "TODAS"
+        self.filtro_exato = False # True: o termo é um TrackID exato (usa o índice de hash)
+        self._track_id_exato = None
         self.data_inicio_filtro = None
         self.data_fim_filtro = None
-        
+
         # Estado de paginação
         self.total_registos = 0
         self.total_paginas = 1
 
+    def carregar_dados(self, dados):
+        """Constrói a representação colunar a partir da lista de registos da API."""
+        self.dataset = ingerir(dados)
+        self.indices_filtrados = array('q')
+        self._ordem_indices = None
+        self._filtro_atual = None
+        self._cache_filtros.clear()
+        logging.info(f"DataController: {len(self.dataset)} registos carregados em formato colunar.")
+
+    @property
+    def dados_completos(self):
+        """Lista completa de registos (materializa todos os dicionários; evitar em dados grandes)."""
+        return self.dataset.registos(range(len(self.dataset)))
+
+    @dados_completos.setter
+    def dados_completos(self, dados):
+        self.carregar_dados(dados)
+
+    @property
+    def dados_filtrados(self):
+        """Registos do resultado filtrado e ordenado (materializa os dicionários)."""
+        return self.dataset.registos(self.indices_filtrados)
+
     def set_filtro_texto(self, termo, coluna):
         """Define os parâmetros para o filtro de texto."""
         self.termo_filtro = termo.strip().lower() if termo else ""
         self.coluna_filtro = coluna
+        self.filtro_exato = False
+
+    def set_filtro_trackid(self, track_id):
+        """Define um filtro de correspondência exata por TrackID (ex: botão 'Ver na Tabela')."""
+        self.termo_filtro = str(track_id).strip().lower()
+        self.coluna_filtro = "TrackID"
+        self.filtro_exato = True
+        self._track_id_exato = track_id
 
     def set_filtro_data(self, data_inicio, data_fim):
         """Define os parâmetros para o filtro de data."""
         self.data_inicio_filtro = data_inicio
         self.data_fim_filtro = data_fim
-    
+
     def aplicar_filtro(self, re_sort_only=False):
         """
         Aplica os filtros de texto e data aos dados.
         Se re_sort_only for True, apenas reordena os dados já filtrados.
         """
+        dataset = self.dataset
+        # 1-2. Filtros de data e de texto
         if not re_sort_only:
-            dados_a_filtrar = self.dados_completos
-            
-            # 1. Filtro por data
-            dados_filtrados_data = []
-            if self.data_inicio_filtro and self.data_fim_filtro:
-                for item in dados_a_filtrar:
-                    try:
-                        # Assumindo formato 'YYYY-MM-DD HH:MM:SS'
-                        data_item_str = item.get("DATAHORA", "").split(" ")[0]
-                        data_item = datetime.strptime(data_item_str, '%Y-%m-%d').date()
-                        if self.data_inicio_filtro <= data_item <= self.data_fim_filtro:
-                            dados_filtrados_data.append(item)
-                    except (ValueError, IndexError):
-                        continue # Ignora formatos de data inválidos
-            else:
-                dados_filtrados_data = dados_a_filtrar
-
-            # 2. Filtro por texto
-            if self.termo_filtro:
-                if self.coluna_filtro == "TODAS":
-                    dados_filtrados_texto = [
-                        item for item in dados_filtrados_data
-                        if any(str(value).lower().find(self.termo_filtro) != -1 
-                               for value in item.values())
-                    ]
-                else:
-                    dados_filtrados_texto = [
-                        item for item in dados_filtrados_data
-                        if str(item.get(self.coluna_filtro, "")).lower().find(self.termo_filtro) != -1
-                    ]
-            else:
-                dados_filtrados_texto = dados_filtrados_data
-                
-            self.dados_filtrados = dados_filtrados_texto
-        
-        # 3. Ordenação
-        self.dados_filtrados.sort(
-            key=lambda item: chave_de_ordenacao_segura(item, self.coluna_ordenacao),
-            reverse=self.ordem_desc
-        )
-        
+            self._filtrar(dataset)
+
+        # 3. Ordenação (inverter basta quando só muda o sentido da mesma coluna)
+        ordem_pedida = (self.coluna_ordenacao, self.ordem_desc)
+        if self._ordem_indices == ordem_pedida:
+            pass
+        elif self._ordem_indices and self._ordem_indices[0] == self.coluna_ordenacao:
+            self.indices_filtrados.reverse()
+        else:
+            chaves = dataset.chaves_ordenacao(self.coluna_ordenacao)
+            self.indices_filtrados = array('q', sorted(
+                self.indices_filtrados, key=chaves.__getitem__, reverse=self.ordem_desc
+            ))
+        self._ordem_indices = ordem_pedida
+
         # 4. Atualizar contadores de paginação
-        self.total_registos = len(self.dados_filtrados)
+        self.total_registos = len(self.indices_filtrados)
         self.total_paginas = math.ceil(self.total_registos / self.itens_por_pagina) if self.total_registos > 0 else 1
 
+    def _filtrar(self, dataset):
+        """
+        Calcula indices_filtrados para o filtro atual. Reutiliza, por esta ordem: um resultado
+        recente da cache LRU, o resultado anterior quando o novo termo apenas o restringe
+        (ex: "ABC" -> "ABC1", mesma coluna e datas), ou os índices de data e de texto.
+        """
+        chave = (self.termo_filtro, self.coluna_filtro, self.data_inicio_filtro, self.data_fim_filtro, self.filtro_exato)
+        em_cache = self._cache_filtros.get(chave)
+        if em_cache is not None:
+            self._cache_filtros.move_to_end(chave)
+            self.indices_filtrados = array('q', em_cache[0])
+            self._ordem_indices = em_cache[1]
+        elif self._e_refinamento(chave):
+            # Filtrar o resultado anterior preserva a ordem em que já estava
+            textos = dataset.texto(self.coluna_filtro)
+            termo = self.termo_filtro
+            self.indices_filtrados = array('q', [i for i in self.indices_filtrados if termo in textos[i]])
+        else:
+            self._filtrar_completo(dataset)
+
+        self._filtro_atual = chave
+        if em_cache is None:
+            self._cache_filtros[chave] = (array('q', self.indices_filtrados), self._ordem_indices)
+            while len(self._cache_filtros) > TAMANHO_CACHE_FILTROS:
+                self._cache_filtros.popitem(last=False)
+
+    def _e_refinamento(self, chave):
+        """Indica se o novo filtro apenas restringe o resultado atual."""
+        if self._filtro_atual is None:
+            return False
+        termo_anterior, coluna_anterior, inicio_anterior, fim_anterior, exato_anterior = self._filtro_atual
+        termo, coluna, inicio, fim, exato = chave
+        # Um resultado exato (ex: "Ver na Tabela") não contém as correspondências por substring
+        return (
+            not exato
+            and not exato_anterior
+            and bool(termo_anterior)
+            and termo_anterior in termo
+            and coluna == coluna_anterior
+            and (inicio, fim) == (inicio_anterior, fim_anterior)
+        )
+
+    def _filtrar_completo(self, dataset):
+        """Filtra a partir de todos os dados, usando os índices de data e de texto."""
+        indices = range(len(dataset))
+        self._ordem_indices = None
+        intervalo = None
+
+        # 1. Filtro por data: pesquisa binária no índice ordenado por DATAHORA
+        if self.data_inicio_filtro and self.data_fim_filtro:
+            inicio = date_to_timestamp(self.data_inicio_filtro)
+            fim = date_to_timestamp(self.data_fim_filtro + timedelta(days=1))
+            intervalo = (inicio, fim)
+            indices = dataset.linhas_no_intervalo(inicio, fim)
+            self._ordem_indices = ("DATAHORA", False)
+        elif self.coluna_ordenacao == "DATAHORA":
+            # Sem filtro de data, o índice já dá a ordenação por DATAHORA de graça
+            indices = dataset.indice_datas()[1]
+            self._ordem_indices = ("DATAHORA", False)
+
+        # 2. Filtro por texto: usa os índices de texto quando estes restringem os candidatos
+        if self.termo_filtro:
+            termo = self.termo_filtro
+            if self.filtro_exato:
+                candidatos = dataset.linhas_do_trackid(self._track_id_exato)
+            else:
+                candidatos = self._candidatos_texto(termo, self.coluna_filtro)
+            if self.filtro_exato or len(candidatos) < len(indices):
+                if intervalo:
+                    timestamps = dataset.timestamps
+                    inicio, fim = intervalo
+                    candidatos = [i for i in candidatos if inicio <= timestamps[i] < fim]
+                indices = candidatos
+                self._ordem_indices = None
+            else:
+                # Quase tudo corresponde: filtrar a lista atual preserva a ordem já obtida
+                textos = dataset.texto(self.coluna_filtro)
+                indices = [i for i in indices if termo in textos[i]]
+
+        self.indices_filtrados = array('q', indices)
+
+    def _candidatos_texto(self, termo, coluna):
+        """
+        Linhas (ordenadas) que contêm o termo na coluna indicada, obtidas pelos índices
+        de texto de cada coluna ("TODAS" é a união de todas as colunas).
+        """
+        colunas = self.todas_as_colunas if coluna == "TODAS" else [coluna]
+        resultados = []
+        for nome_coluna in colunas:
+            indice = self._indices_texto.get(nome_coluna)
+            if indice is None:
+                indice = self._indices_texto[nome_coluna] = IndiceTrigramas(nome_coluna)
+            indice.atualizar(self.dataset)
+            linhas = indice.pesquisar(termo)
+            if linhas:
+                resultados.append(linhas)
+
+        if coluna == "TODAS" and self.dataset.extras:
+            # Valores fora das colunas conhecidas só entram no texto "TODAS" e são poucos
+            resultados.append([
+                linha for linha, extras in self.dataset.extras.items()
+                if any(termo in str(v).lower() for v in extras.values())
+            ])
+
+        if len(resultados) == 1:
+            return resultados[0]
+        return sorted(set().union(*resultados))
+
     def ordenar(self, coluna):
         """Define a coluna de ordenação e inverte a ordem se a mesma coluna for clicada."""
         if self.coluna_ordenacao == coluna:
@@ -102,25 +236,38 @@ class DataController:
             self.coluna_ordenacao = coluna
             self.ordem_desc = True # Padrão para novas colunas é descendente
 
-    def get_dados_pagina(self, numero_pagina):
-        """Retorna os dados correspondentes a uma página específica."""
-        if not self.dados_filtrados:
-            return 1, []
+    def get_intervalo_pagina(self, numero_pagina):
+        """
+        Retorna (numero_pagina, inicio, fim): as posições do resultado filtrado que
+        pertencem a uma página, sem construir nenhum registo.
+        """
+        if not self.indices_filtrados:
+            return 1, 0, 0
 
         numero_pagina = max(1, min(numero_pagina, self.total_paginas))
-        
+
         inicio = (numero_pagina - 1) * self.itens_por_pagina
-        fim = inicio + self.itens_por_pagina
-        
-        return numero_pagina, self.dados_filtrados[inicio:fim]
+        fim = min(inicio + self.itens_por_pagina, self.total_registos)
+
+        return numero_pagina, inicio, fim
+
+    def get_dados_pagina(self, numero_pagina):
+        """Retorna os dados correspondentes a uma página específica."""
+        numero_pagina, inicio, fim = self.get_intervalo_pagina(numero_pagina)
+        return numero_pagina, self.dataset.registos(self.indices_filtrados[inicio:fim])
+
+    def valor_filtrado(self, posicao, coluna):
+        """Valor de uma célula na posição 'posicao' do resultado filtrado e ordenado."""
+        return self.dataset.valor(self.indices_filtrados[posicao], coluna)
+
+    def registo_filtrado(self, posicao):
+        """Registo completo na posição 'posicao' do resultado filtrado e ordenado."""
+        return self.dataset.registo(self.indices_filtrados[posicao])
 
     def get_record_by_id(self, record_id):
         """Encontra e retorna um registo completo pelo seu IDMENSAGEM."""
         try:
-            record_id_int = int(record_id)
-            for record in self.dados_completos:
-                if record.get('IDMENSAGEM') == record_id_int:
-                    return record
+            linha = self.dataset.linha_do_id(int(record_id))
         except (ValueError, TypeError):
-            pass
-        return None
\ No newline at end of file
+            return None
+        return None if linha is None else self.dataset.registo(linha)
@@ -0,0 +1,300 @@
+# src/core/dataset.py
+
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+
+from src.utils.config import COLUNAS
+from src.utils.datetime_utils import parse_api_datetime_to_timestamp
+
+NAN = float("nan")
+
+class DatasetColunar:
+    """
+    Representação colunar dos registos da API, construída uma única vez por carga.
+    IDMENSAGEM fica num array de inteiros, DATAHORA é pré-convertida para segundos
+    desde a época e LATITUDE/LONGITUDE ficam em arrays float64. Os dicionários só são
+    reconstruídos para as linhas efetivamente pedidas (ex: a página visível).
+    """
+    def __init__(self, registos=None):
+        self.ids = array('q')
+        self.timestamps = array('d') # NaN quando DATAHORA é inválida
+        self.latitudes = array('d')
+        self.longitudes = array('d')
+        self.datahoras = []
+        self.placas = []
+        self.trackids = []
+        # Valores que não cabem nas colunas tipadas, por linha: {linha: {coluna: valor}}
+        self.extras = {}
+        # Identifica a "família" do dataset: cópias estendidas com com_novos() partilham-na,
+        # o que permite aos índices atualizarem-se só com as linhas acrescentadas
+        self.linhagem = object()
+        # Colunas de texto em minúsculas, construídas sob pedido para filtro e ordenação
+        # (podem estar incompletas; texto() acrescenta as linhas em falta)
+        self._cache_texto = {}
+        self._cache_chaves = {}
+        # Índice ordenado por data: (timestamps ordenados, linhas correspondentes). Nunca é
+        # alterado no lugar (anexar() constrói arrays novos), por isso as cópias podem partilhá-lo
+        self._indice_datas = None
+        # Índices de hash, mantidos incrementalmente: IDMENSAGEM -> linha e TrackID -> linhas
+        self._linha_por_id = {}
+        self._linhas_por_trackid = {}
+        self._hash_indexado_ate = 0
+        if registos:
+            self.anexar(registos)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def anexar(self, registos):
+        """Acrescenta registos ao fim das colunas; as colunas derivadas e o índice de datas completam-se."""
+        inicio = len(self.ids)
+        for registo in registos:
+            if not isinstance(registo, dict):
+                continue
+            linha = len(self.ids)
+            extras = {k: v for k, v in registo.items() if k not in COLUNAS}
+
+            id_mensagem = registo.get("IDMENSAGEM")
+            try:
+                self.ids.append(int(id_mensagem))
+            except (ValueError, TypeError, OverflowError):
+                self.ids.append(0)
+                extras["IDMENSAGEM"] = id_mensagem
+
+            datahora = registo.get("DATAHORA")
+            timestamp = parse_api_datetime_to_timestamp(datahora)
+            self.timestamps.append(NAN if timestamp is None else timestamp)
+            self.datahoras.append(datahora)
+
+            for coluna, destino in (("LATITUDE", self.latitudes), ("LONGITUDE", self.longitudes)):
+                valor = registo.get(coluna)
+                try:
+                    destino.append(float(valor))
+                except (ValueError, TypeError):
+                    destino.append(NAN)
+                    if valor is not None:
+                        extras[coluna] = valor
+
+            self.placas.append(registo.get("PLACA"))
+            self.trackids.append(registo.get("TrackID"))
+            if extras:
+                self.extras[linha] = extras
+
+        # As colunas de texto e chaves derivadas completam-se sozinhas; o índice de datas, se já
+        # existir, recebe apenas as linhas novas
+        if self._indice_datas is not None and len(self) > inicio:
+            self._indice_datas = self._mesclar_no_indice_datas(inicio)
+
+    def _mesclar_no_indice_datas(self, inicio):
+        """
+        Índice de datas com as linhas a partir de 'inicio' inseridas por pesquisa binária: só as
+        linhas novas são ordenadas e o índice existente é copiado em blocos, sem reordenar tudo.
+        Como no sorted() estável, datas iguais ficam pela ordem das linhas.
+        """
+        chaves = self.chaves_ordenacao("DATAHORA")
+        ordenados, linhas = self._indice_datas
+        novos_ordenados, novas_linhas = array('d'), array('q')
+        anterior = 0
+        for linha in sorted(range(inicio, len(self)), key=chaves.__getitem__):
+            chave = chaves[linha]
+            posicao = bisect_right(ordenados, chave, anterior)
+            novos_ordenados += ordenados[anterior:posicao]
+            novas_linhas += linhas[anterior:posicao]
+            novos_ordenados.append(chave)
+            novas_linhas.append(linha)
+            anterior = posicao
+        novos_ordenados += ordenados[anterior:]
+        novas_linhas += linhas[anterior:]
+        return novos_ordenados, novas_linhas
+
+    def maior_id(self):
+        """Maior IDMENSAGEM presente (0 se o dataset estiver vazio)."""
+        return max(self.ids, default=0)
+
+    def copia(self):
+        """Cópia independente das colunas (os arrays são copiados em bloco, sem reprocessar)."""
+        nova = DatasetColunar()
+        nova.ids = array('q', self.ids)
+        nova.timestamps = array('d', self.timestamps)
+        nova.latitudes = array('d', self.latitudes)
+        nova.longitudes = array('d', self.longitudes)
+        nova.datahoras = list(self.datahoras)
+        nova.placas = list(self.placas)
+        nova.trackids = list(self.trackids)
+        nova.extras = {linha: dict(extras) for linha, extras in self.extras.items()}
+        nova.linhagem = self.linhagem
+        nova._cache_texto = {coluna: list(valores) for coluna, valores in self._cache_texto.items()}
+        nova._cache_chaves = {coluna: list(chaves) for coluna, chaves in self._cache_chaves.items()}
+        nova._indice_datas = self._indice_datas
+        if self._hash_indexado_ate:
+            nova._linha_por_id = dict(self._linha_por_id)
+            nova._linhas_por_trackid = {tid: array('I', linhas) for tid, linhas in self._linhas_por_trackid.items()}
+            nova._hash_indexado_ate = self._hash_indexado_ate
+        return nova
+
+    def com_novos(self, registos):
+        """
+        Retorna um novo dataset com os registos acrescentados, sem alterar este.
+        Permite mesclar dados numa thread de trabalho enquanto a GUI continua a ler o original.
+        """
+        nova = self.copia()
+        nova.anexar(registos)
+        return nova
+
+    def valor(self, linha, coluna):
+        """Retorna o valor de uma célula no formato original da API."""
+        extras = self.extras.get(linha)
+        if extras and coluna in extras:
+            return extras[coluna]
+        if coluna == "IDMENSAGEM":
+            return self.ids[linha]
+        if coluna == "DATAHORA":
+            return self.datahoras[linha]
+        if coluna == "LATITUDE" or coluna == "LONGITUDE":
+            numero = (self.latitudes if coluna == "LATITUDE" else self.longitudes)[linha]
+            return None if math.isnan(numero) else numero
+        if coluna == "PLACA":
+            return self.placas[linha]
+        if coluna == "TrackID":
+            return self.trackids[linha]
+        return None
+
+    def registo(self, linha):
+        """Reconstrói o dicionário completo de uma linha."""
+        registo = {coluna: self.valor(linha, coluna) for coluna in COLUNAS}
+        extras = self.extras.get(linha)
+        if extras:
+            registo.update(extras)
+        return registo
+
+    def registos(self, linhas):
+        """Reconstrói os dicionários apenas das linhas indicadas."""
+        return [self.registo(linha) for linha in linhas]
+
+    def iterar_registos(self):
+        """Reconstrói os dicionários um a um (ex: para gravar no cache sem materializar a lista)."""
+        for linha in range(len(self)):
+            yield self.registo(linha)
+
+    def _textos(self, coluna, inicio, fim):
+        """Texto minúsculo da coluna para as linhas [inicio, fim)."""
+        if coluna == "TODAS":
+            colunas = [self.texto(c)[inicio:fim] for c in COLUNAS]
+            valores = ["\x00".join(partes) for partes in zip(*colunas)]
+            for linha, extras in self.extras.items():
+                if inicio <= linha < fim:
+                    valores[linha - inicio] += "\x00" + "\x00".join(str(v).lower() for v in extras.values())
+            return valores
+
+        if coluna in ("LATITUDE", "LONGITUDE"):
+            numeros = (self.latitudes if coluna == "LATITUDE" else self.longitudes)[inicio:fim]
+            valores = ["" if n != n else str(n) for n in numeros] # n != n só para NaN
+        elif coluna == "IDMENSAGEM":
+            valores = list(map(str, self.ids[inicio:fim]))
+        elif coluna in ("DATAHORA", "PLACA", "TrackID"):
+            origem = {"DATAHORA": self.datahoras, "PLACA": self.placas, "TrackID": self.trackids}[coluna]
+            valores = ["" if v is None else str(v).lower() for v in origem[inicio:fim]]
+        else:
+            valores = [""] * (fim - inicio)
+        # Valores guardados fora das colunas tipadas prevalecem, como em valor()
+        for linha, extras in self.extras.items():
+            if inicio <= linha < fim and coluna in extras:
+                v = extras[coluna]
+                valores[linha - inicio] = "" if v is None else str(v).lower()
+        return valores
+
+    def texto(self, coluna):
+        """
+        Coluna em texto minúsculo (uma string por linha), usada pelo filtro e pela ordenação.
+        A coluna especial "TODAS" junta todos os valores da linha, incluindo os extras.
+        É construída sob pedido e, após anexar(), apenas as linhas novas são convertidas.
+        """
+        valores = self._cache_texto.get(coluna)
+        if valores is None:
+            valores = self._cache_texto[coluna] = []
+        if len(valores) < len(self):
+            valores.extend(self._textos(coluna, len(valores), len(self)))
+        return valores
+
+    def chaves_ordenacao(self, coluna):
+        """
+        Sequência de chaves de ordenação por linha: o timestamp para DATAHORA (datas inválidas
+        ficam no extremo inferior) e o texto minúsculo para as restantes colunas.
+        """
+        if coluna != "DATAHORA":
+            return self.texto(coluna)
+        chaves = self._cache_chaves.get(coluna)
+        if chaves is None:
+            chaves = self._cache_chaves[coluna] = []
+        if len(chaves) < len(self):
+            menos_infinito = float("-inf")
+            chaves.extend(menos_infinito if math.isnan(t) else t for t in self.timestamps[len(chaves):])
+        return chaves
+
+    def _atualizar_indices_hash(self):
+        """Indexa as linhas ainda não indexadas por IDMENSAGEM e por TrackID."""
+        total = len(self)
+        inicio = self._hash_indexado_ate
+        if inicio == total:
+            return
+        linha_por_id = self._linha_por_id
+        for linha in range(inicio, total):
+            # Em IDs repetidos prevalece a linha mais recente, como numa mescla
+            linha_por_id[self.ids[linha]] = linha
+        for linha, extras in self.extras.items():
+            if linha >= inicio and "IDMENSAGEM" in extras:
+                linha_por_id.pop(self.ids[linha], None) # ID inválido guardado como 0
+        linhas_por_trackid = self._linhas_por_trackid
+        trackids = self.trackids
+        for linha in range(inicio, total):
+            track_id = trackids[linha]
+            if track_id is not None:
+                chave = str(track_id)
+                linhas = linhas_por_trackid.get(chave)
+                if linhas is None:
+                    linhas = linhas_por_trackid[chave] = array('I')
+                linhas.append(linha)
+        self._hash_indexado_ate = total
+
+    def linha_do_id(self, id_mensagem):
+        """Linha do registo com o IDMENSAGEM indicado (O(1)), ou None."""
+        self._atualizar_indices_hash()
+        return self._linha_por_id.get(id_mensagem)
+
+    def linhas_do_trackid(self, track_id):
+        """Linhas (em ordem crescente) dos registos de um TrackID (O(k)); vazio se não existir."""
+        self._atualizar_indices_hash()
+        return self._linhas_por_trackid.get(str(track_id), array('I'))
+
+    def indice_datas(self):
+        """
+        Índice ordenado pela coluna DATAHORA, construído sob pedido e reutilizado até novos dados.
+        Retorna (timestamps_ordenados, linhas): datas inválidas ficam no início (como -inf).
+        """
+        if self._indice_datas is None:
+            chaves = self.chaves_ordenacao("DATAHORA")
+            linhas = array('q', sorted(range(len(self)), key=chaves.__getitem__))
+            ordenados = array('d', [chaves[linha] for linha in linhas])
+            self._indice_datas = (ordenados, linhas)
+        return self._indice_datas
+
+    def linhas_no_intervalo(self, inicio, fim):
+        """
+        Linhas com timestamp em [inicio, fim), já em ordem crescente de data.
+        Usa pesquisa binária no índice ordenado, logo o custo é proporcional ao tamanho do resultado.
+        """
+        ordenados, linhas = self.indice_datas()
+        return linhas[bisect_left(ordenados, inicio):bisect_left(ordenados, fim)]
+
+
+def ingerir(dados):
+    """
+    Etapa de ingestão: normaliza os registos da API (lista de dicionários) num DatasetColunar,
+    convertendo DATAHORA para timestamp uma única vez. Datasets já construídos são devolvidos tal como estão.
+    """
+    if isinstance(dados, DatasetColunar):
+        return dados
+    if isinstance(dados, dict):
+        dados = [dados]
+    return DatasetColunar(dados or [])
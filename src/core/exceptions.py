@@ -9,6 +9,12 @@ class APIConnectionError(ConsultaAPIException):
     def __init__(self, message="Falha ao conectar ou timeout com a API."):
         super().__init__(message)
 
+class APITimeoutError(APIConnectionError):
+    """Timeout ao ligar ('leitura' False) ou à espera da resposta ('leitura' True)."""
+    def __init__(self, message="Tempo limite excedido ao contactar a API.", leitura=False):
+        super().__init__(message)
+        self.leitura = leitura
+
 class APIAuthError(ConsultaAPIException):
     """Erro de autenticação (401)."""
     def __init__(self, message="Autenticação falhou. Verifique as credenciais."):
@@ -27,4 +33,9 @@ class APIServerError(ConsultaAPIException):
 class APIResponseError(ConsultaAPIException):
     """Erro na resposta da API (JSON inválido ou estrutura inesperada)."""
     def __init__(self, message="Resposta da API inválida ou inesperada."):
-        super().__init__(message)
\ No newline at end of file
+        super().__init__(message)
+
+class APICircuitOpenError(APIConnectionError):
+    """Pedido recusado sem contactar a API: o circuito do cliente está aberto após falhas repetidas."""
+    def __init__(self, message="Cliente temporariamente suspenso após falhas repetidas."):
+        super().__init__(message)
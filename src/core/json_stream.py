@@ -0,0 +1,131 @@
+# src/core/json_stream.py
+
+import codecs
+import json
+import re
+
+_descodificador = json.JSONDecoder()
+_ESPACOS = " \t\n\r"
+_FIM_ELEMENTO = _ESPACOS + ",]"
+_ESPACOS_RE = re.compile(r"[ \t\n\r]*")
+
+class DescodificadorIncremental:
+    """
+    Descodifica uma resposta JSON à medida que os blocos de bytes chegam: alimentar() recebe
+    cada bloco e retorna os elementos da lista que ficaram completos; terminar() assinala o fim
+    dos dados. Um objeto isolado é retornado como único elemento e null não produz nada.
+    Só o texto ainda não descodificado fica em memória. Serve tanto para iterar_elementos()
+    como para uma resposta assíncrona (os blocos são passados por quem os recebe).
+    Lança ValueError se o JSON for inválido ou estiver truncado.
+    """
+    def __init__(self):
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._fase = "inicio" # "inicio", "lista", "documento" (não é uma lista) ou "fim"
+        self._texto = "" # Texto da lista ainda por descodificar
+        self._partes = []
+        self._espera_valor = True # Após "[" ou ",": o próximo item tem de ser um valor
+        self._primeiro = True     # Logo após "[": a lista ainda pode fechar vazia
+
+    def alimentar(self, bloco):
+        """Processa um bloco de bytes e retorna a lista de elementos completos."""
+        if not bloco:
+            return []
+        return self._processar(self._utf8.decode(bloco), fim_dos_dados=False)
+
+    def terminar(self):
+        """Assinala o fim dos dados e retorna os elementos que faltavam."""
+        return self._processar(self._utf8.decode(b"", final=True), fim_dos_dados=True)
+
+    def _processar(self, texto, fim_dos_dados):
+        # 1. Descobre se o documento é uma lista
+        if self._fase == "inicio":
+            texto = (self._texto + texto).lstrip(_ESPACOS)
+            self._texto = ""
+            if not texto:
+                return []
+            if texto[0] == "[":
+                self._fase, texto = "lista", texto[1:]
+            else:
+                self._fase = "documento"
+        if self._fase == "documento":
+            # Documento que não é uma lista: é descodificado inteiro
+            self._partes.append(texto)
+            if not fim_dos_dados:
+                return []
+            valor = json.loads("".join(self._partes))
+            self._fase, self._partes = "fim", []
+            return [] if valor is None else [valor]
+        if self._fase == "fim":
+            if texto.strip(_ESPACOS):
+                raise ValueError("Resposta JSON inválida: dados extra após o fim da lista.")
+            return []
+
+        # 2. Lista: retorna cada elemento completo e guarda só o resto por descodificar.
+        # Como o json.loads, exige exatamente uma vírgula entre elementos e nada além de espaços após o "]"
+        texto = self._texto + texto
+        posicao = 0
+        elementos = []
+        tamanho = len(texto)
+        while True:
+            posicao = _ESPACOS_RE.match(texto, posicao).end()
+            if posicao >= tamanho:
+                break
+            caractere = texto[posicao]
+            if not self._espera_valor:
+                if caractere == ",":
+                    self._espera_valor = True
+                    posicao += 1
+                    continue
+                if caractere == "]":
+                    return elementos + self._fechar(texto[posicao + 1:], fim_dos_dados)
+                raise ValueError(f"Resposta JSON inválida: esperado ',' ou ']' em vez de {caractere!r}.")
+            if caractere == "]" and self._primeiro:
+                return elementos + self._fechar(texto[posicao + 1:], fim_dos_dados)
+            if caractere in ",]":
+                raise ValueError(f"Resposta JSON inválida: valor em falta antes de {caractere!r}.")
+            try:
+                valor, fim = _descodificador.raw_decode(texto, posicao)
+            except json.JSONDecodeError:
+                if fim_dos_dados:
+                    raise ValueError("Resposta JSON inválida ou truncada.")
+                break # Elemento ainda incompleto
+            # O elemento só está completo se já se vir o separador seguinte
+            # (ex: "-0." no fim de um bloco ainda pode vir a ser "-0.5")
+            if not fim_dos_dados and (fim >= tamanho or texto[fim] not in _FIM_ELEMENTO):
+                break
+            elementos.append(valor)
+            posicao = fim
+            self._espera_valor = self._primeiro = False
+
+        if fim_dos_dados:
+            raise ValueError("Resposta JSON truncada: a lista não foi fechada.")
+        self._texto = texto[posicao:]
+        return elementos
+
+    def _fechar(self, resto, fim_dos_dados):
+        """Fim da lista: o resto (e os blocos seguintes) só pode ter espaços."""
+        self._fase, self._texto = "fim", ""
+        return self._processar(resto, fim_dos_dados)
+
+def iterar_elementos(blocos):
+    """
+    Descodifica incrementalmente uma resposta JSON recebida em blocos de bytes.
+    Se o documento for uma lista, produz cada elemento assim que o bloco que o completa
+    chega, sem esperar pelo resto do corpo (ver DescodificadorIncremental).
+    Lança ValueError se o JSON for inválido ou estiver truncado.
+    """
+    descodificador = DescodificadorIncremental()
+    for bloco in blocos:
+        yield from descodificador.alimentar(bloco)
+    yield from descodificador.terminar()
+
+def iterar_lotes(blocos, tamanho_lote):
+    """Agrupa os elementos de iterar_elementos() em listas de até 'tamanho_lote' elementos."""
+    lote = []
+    for elemento in iterar_elementos(blocos):
+        lote.append(elemento)
+        if len(lote) >= tamanho_lote:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
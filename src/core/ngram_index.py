@@ -0,0 +1,133 @@
+# src/core/ngram_index.py
+
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+
+TAMANHO_NGRAMA = 3
+
+class IndiceTrigramas:
+    """
+    Índice invertido de trigramas sobre os valores DISTINTOS de uma coluna de texto.
+    Colunas como PLACA e TrackID têm poucos valores distintos face ao número de linhas,
+    por isso procurar a substring nos valores e depois expandir para as linhas é muito
+    mais barato do que percorrer todas as linhas.
+
+    Colunas de alta cardinalidade (DATAHORA, IDMENSAGEM, coordenadas) não são indexadas
+    valor a valor: guarda-se o texto da coluna num único bloco (pesquisado com str.find,
+    em C) e o alfabeto da coluna, o que permite descartá-la de imediato quando o termo
+    tem caracteres que nunca lá aparecem (ex: letras de uma placa).
+    """
+    # Acima desta fração de valores distintos por linha a coluna é tratada como alta cardinalidade
+    LIMITE_CARDINALIDADE = 0.2
+
+    def __init__(self, coluna):
+        self.coluna = coluna
+        self.linhagem = None
+        self.linhas_indexadas = 0
+        self.alta_cardinalidade = False
+        self.linhas_por_valor = {} # valor -> array('I') de linhas (em ordem crescente)
+        self.trigramas = {}        # trigrama -> set de valores que o contêm
+        self.alfabeto = set()
+        # Alta cardinalidade: valores unidos por '\n' e o deslocamento onde cada linha começa
+        self.texto_unido = ""
+        self.inicios = array('Q')
+
+    def _limpar(self):
+        self.linhas_indexadas = 0
+        self.alta_cardinalidade = False
+        self.linhas_por_valor = {}
+        self.trigramas = {}
+        self.alfabeto = set()
+        self.texto_unido = ""
+        self.inicios = array('Q')
+
+    def atualizar(self, dataset):
+        """
+        Sincroniza o índice com o dataset. Se o dataset for uma extensão do já indexado
+        (mesma linhagem, apenas com linhas acrescentadas), indexa só as linhas novas.
+        """
+        if dataset.linhagem is not self.linhagem or len(dataset) < self.linhas_indexadas:
+            self._limpar()
+            self.linhagem = dataset.linhagem
+        total = len(dataset)
+        if total == self.linhas_indexadas:
+            return
+
+        textos = dataset.texto(self.coluna)
+        inicio = self.linhas_indexadas
+        if not self.alta_cardinalidade:
+            # A cardinalidade é medida antes de indexar (set() corre em C)
+            limite = max(1000, int(total * self.LIMITE_CARDINALIDADE))
+            distintos_novos = set(textos[inicio:total]).difference(self.linhas_por_valor)
+            if len(self.linhas_por_valor) + len(distintos_novos) > limite:
+                self.alta_cardinalidade = True
+            else:
+                linhas_por_valor = self.linhas_por_valor
+                for valor in distintos_novos:
+                    linhas_por_valor[valor] = array('I')
+                    self._indexar_valor(valor)
+                for linha in range(inicio, total):
+                    linhas_por_valor[textos[linha]].append(linha)
+
+        if self.alta_cardinalidade:
+            # Descarta o índice por valor e passa a usar o bloco de texto da coluna
+            if self.linhas_por_valor:
+                inicio = 0
+                self.linhas_por_valor = {}
+                self.trigramas = {}
+            novos = textos[inicio:total]
+            base = len(self.texto_unido) + 1 if self.texto_unido or inicio else 0
+            self.inicios.extend(accumulate(map((1).__add__, map(len, novos[:-1])), initial=base))
+            bloco = "\n".join(novos)
+            self.texto_unido = self.texto_unido + "\n" + bloco if inicio else bloco
+            self.alfabeto.update(bloco)
+        self.linhas_indexadas = total
+
+    def _indexar_valor(self, valor):
+        self.alfabeto.update(valor)
+        for i in range(len(valor) - TAMANHO_NGRAMA + 1):
+            self.trigramas.setdefault(valor[i:i + TAMANHO_NGRAMA], set()).add(valor)
+
+    def pesquisar(self, termo):
+        """Retorna as linhas (lista ordenada) cujo valor contém 'termo' (já em minúsculas)."""
+        if not set(termo) <= self.alfabeto:
+            return []
+        if self.alta_cardinalidade:
+            return self._pesquisar_bloco(termo)
+
+        if len(termo) >= TAMANHO_NGRAMA:
+            candidatos = None
+            for i in range(len(termo) - TAMANHO_NGRAMA + 1):
+                valores = self.trigramas.get(termo[i:i + TAMANHO_NGRAMA])
+                if not valores:
+                    return []
+                if candidatos is None or len(valores) < len(candidatos):
+                    candidatos = valores
+        else:
+            candidatos = self.linhas_por_valor.keys()
+
+        # Verificação final sobre os (poucos) valores candidatos
+        encontrados = [self.linhas_por_valor[valor] for valor in candidatos if termo in valor]
+        if len(encontrados) == 1:
+            return list(encontrados[0])
+        linhas = []
+        for grupo in encontrados:
+            linhas.extend(grupo)
+        linhas.sort()
+        return linhas
+
+    def _pesquisar_bloco(self, termo):
+        """Procura o termo no bloco de texto e converte cada ocorrência na linha correspondente."""
+        texto, inicios = self.texto_unido, self.inicios
+        total = len(inicios)
+        linhas = []
+        posicao = texto.find(termo)
+        while posicao != -1:
+            linha = bisect_right(inicios, posicao) - 1
+            linhas.append(linha)
+            if linha + 1 >= total:
+                break
+            # Salta para a linha seguinte: uma linha conta uma vez mesmo com várias ocorrências
+            posicao = texto.find(termo, inicios[linha + 1])
+        return linhas
@@ -0,0 +1,114 @@
+# src/core/scheduler.py
+
+import logging
+import random
+import threading
+import time
+
+def intervalo_por_atividade(ultimos_timestamps, agora, minimo, maximo, janela):
+    """
+    Intervalo de atualização (segundos) de um cliente segundo a atividade da frota: a fração
+    de TrackIDs cujo último registo tem menos de 'janela' segundos desloca o intervalo
+    linearmente de 'maximo' (nenhum ativo, ex: de madrugada) até 'minimo' (todos ativos).
+    'ultimos_timestamps' tem o registo mais recente de cada TrackID (ver UltimasPosicoes);
+    'agora' e os timestamps estão no formato interno de datetime_utils.
+    """
+    if not ultimos_timestamps:
+        return maximo
+    ativos = sum(1 for timestamp in ultimos_timestamps if agora - timestamp <= janela)
+    return maximo - (maximo - minimo) * ativos / len(ultimos_timestamps)
+
+class AgendadorClientes:
+    """
+    Agenda as atualizações automáticas do monitor com um intervalo próprio por cliente.
+    As primeiras buscas são escalonadas ao longo de 'janela_inicial' segundos e cada intervalo
+    leva uma variação aleatória de ±'variacao', para que os pedidos se distribuam pelo período
+    em vez de chegarem todos ao servidor no mesmo instante. Um cliente sem registos novos
+    tem o intervalo duplicado a cada ciclo, até 'fator_max_inativo' vezes o intervalo base;
+    volta ao intervalo base assim que surgem dados novos. O intervalo base pode ser ajustado
+    com definir_base() (ex: pela atividade da frota) e nunca excede 'intervalo_maximo', se indicado.
+    Não depende do Qt: a GUI pergunta quando é a próxima busca e quais estão pendentes.
+    """
+    def __init__(self, janela_inicial=30, variacao=0.1, fator_max_inativo=4, intervalo_maximo=None):
+        self.janela_inicial = janela_inicial
+        self.variacao = variacao
+        self.fator_max_inativo = max(1, fator_max_inativo)
+        self.intervalo_maximo = intervalo_maximo
+        self._clientes = {} # nome -> {'base', 'atual', 'proxima', 'novos'}
+        self._lock = threading.Lock()
+
+    def configurar(self, intervalos, agora=None):
+        """
+        Define os clientes agendados a partir de {nome: intervalo_segundos}.
+        Todos são buscados uma vez no arranque; os de intervalo 0 não voltam a ser atualizados automaticamente.
+        """
+        agora = time.monotonic() if agora is None else agora
+        with self._lock:
+            self._clientes = {}
+            for posicao, (nome, intervalo) in enumerate(intervalos.items()):
+                # Posição fixa na janela inicial mais uma parte aleatória dentro da sua fatia
+                atraso = self.janela_inicial * (posicao + random.random()) / len(intervalos)
+                intervalo = max(0, intervalo or 0)
+                self._clientes[nome] = {'base': intervalo, 'atual': intervalo, 'proxima': agora + atraso, 'novos': False}
+        automaticos = sum(1 for estado in self._clientes.values() if estado['base'])
+        logging.info(f"Agendador: {len(intervalos)} clientes, {automaticos} com atualização automática.")
+
+    def pendentes(self, agora=None):
+        """Retorna os clientes cuja busca já deve começar e marca-os como em curso."""
+        agora = time.monotonic() if agora is None else agora
+        with self._lock:
+            prontos = [nome for nome, estado in self._clientes.items()
+                       if estado['proxima'] is not None and estado['proxima'] <= agora]
+            for nome in prontos:
+                self._clientes[nome]['proxima'] = None
+                self._clientes[nome]['novos'] = False
+        return prontos
+
+    def registar_atividade(self, nome, houve_novos):
+        """Indica se a última atualização do cliente trouxe registos novos."""
+        with self._lock:
+            estado = self._clientes.get(nome)
+            if estado is not None and houve_novos:
+                estado['novos'] = True
+
+    def definir_base(self, nome, intervalo):
+        """Altera o intervalo base de um cliente com atualização automática (aplicado a partir da próxima busca)."""
+        with self._lock:
+            estado = self._clientes.get(nome)
+            if estado is not None and estado['base'] and intervalo > 0:
+                estado['base'] = intervalo
+
+    def concluir(self, nome, falhou=False, agora=None):
+        """
+        Agenda a próxima busca do cliente após o fim da atual. Sem registos novos o intervalo
+        cresce; com registos novos volta ao base; uma falha mantém o intervalo
+        (as falhas repetidas já são tratadas pelo disjuntor).
+        """
+        agora = time.monotonic() if agora is None else agora
+        with self._lock:
+            estado = self._clientes.get(nome)
+            if estado is None:
+                return
+            if not estado['base']:
+                estado['proxima'] = None # Atualização automática desativada para este cliente
+                return
+            base = estado['base']
+            if estado['novos']:
+                estado['atual'] = base
+            elif not falhou:
+                estado['atual'] = max(base, min(estado['atual'] * 2, base * self.fator_max_inativo))
+            if self.intervalo_maximo:
+                estado['atual'] = min(estado['atual'], self.intervalo_maximo)
+            estado['novos'] = False
+            intervalo = estado['atual'] * (1 + random.uniform(-self.variacao, self.variacao))
+            estado['proxima'] = agora + intervalo
+        logging.info(f"Agendador: próxima atualização de '{nome}' em {intervalo / 60:.1f} minutos.")
+
+    def segundos_ate_proxima(self, agora=None):
+        """Segundos até à próxima busca agendada (0 se já houver uma pendente), ou None se não houver nenhuma."""
+        agora = time.monotonic() if agora is None else agora
+        with self._lock:
+            proximas = [estado['proxima'] for estado in self._clientes.values() if estado['proxima'] is not None]
+        if not proximas:
+            return None
+        return max(0.0, min(proximas) - agora)
@@ -0,0 +1,130 @@
+# src/core/single_flight.py
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+
+class SingleFlight:
+    """
+    Junta pedidos idênticos em curso: enquanto um pedido com uma dada chave (ex: cliente +
+    payload) está a correr, quem pedir a mesma chave espera pelo mesmo resultado em vez de
+    repetir o pedido HTTP e a descodificação. Funciona entre threads e com corrotinas.
+    Os subscritores são chamados com (chave, resultado) sempre que um pedido termina com sucesso:
+    na thread de quem executou o pedido ou, para corrotinas, numa thread do executor, para que
+    um subscritor lento não bloqueie o event loop.
+    Um pedido longo pode publicar resultados parciais com progredir(); estes chegam ao
+    'ao_progredir' de todos os que o aguardam, incluindo quem se juntou a meio.
+    """
+    def __init__(self):
+        self._em_curso = {} # chave -> concurrent.futures.Future
+        self._ouvintes = {} # chave -> callbacks 'ao_progredir' de quem aguarda o pedido
+        self._parciais = {} # chave -> último resultado parcial publicado
+        self._subscritores = []
+        self._lock = threading.Lock()
+
+    def subscrever(self, callback):
+        """Regista callback(chave, resultado), chamado a cada pedido concluído com sucesso."""
+        with self._lock:
+            self._subscritores.append(callback)
+
+    def _entrar(self, chave, ao_progredir=None):
+        """Retorna (futuro, lider): lider=True se este chamador deve executar o pedido."""
+        with self._lock:
+            futuro = self._em_curso.get(chave)
+            lider = futuro is None
+            if lider:
+                futuro = self._em_curso[chave] = Future()
+                self._ouvintes[chave] = []
+            if ao_progredir is not None:
+                self._ouvintes[chave].append(ao_progredir)
+            parcial = self._parciais.get(chave)
+        if parcial is not None and ao_progredir is not None:
+            # Quem se junta a meio recebe logo o último resultado parcial
+            self._chamar(ao_progredir, chave, parcial)
+        return futuro, lider
+
+    def _sair(self, chave):
+        """Retira o pedido dos em curso e retorna os subscritores a notificar."""
+        with self._lock:
+            self._em_curso.pop(chave, None)
+            self._ouvintes.pop(chave, None)
+            self._parciais.pop(chave, None)
+            return list(self._subscritores)
+
+    def progredir(self, chave, criar_parcial):
+        """
+        Publica um resultado parcial do pedido em curso com esta chave. 'criar_parcial()' (ex: uma
+        cópia dos dados já recebidos) só é chamada se alguém estiver a acompanhar o pedido.
+        """
+        with self._lock:
+            ouvintes = list(self._ouvintes.get(chave, ()))
+        if not ouvintes:
+            return
+        parcial = criar_parcial()
+        with self._lock:
+            if chave in self._em_curso:
+                self._parciais[chave] = parcial
+                # Inclui quem se juntou enquanto a cópia era criada
+                ouvintes = list(self._ouvintes.get(chave, ouvintes))
+        for callback in ouvintes:
+            self._chamar(callback, chave, parcial)
+
+    @staticmethod
+    def _chamar(callback, chave, valor):
+        try:
+            callback(valor)
+        except Exception as e:
+            logging.error(f"Erro ao enviar um resultado parcial do pedido {chave}: {e}")
+
+    @staticmethod
+    def _notificar(subscritores, chave, resultado):
+        for callback in subscritores:
+            try:
+                callback(chave, resultado)
+            except Exception as e:
+                logging.error(f"Erro num subscritor do pedido {chave}: {e}")
+
+    def _concluir(self, chave, futuro, resultado=None, erro=None):
+        subscritores = self._sair(chave)
+        if erro is not None:
+            futuro.set_exception(erro)
+            return
+        # Os subscritores são notificados antes de libertar quem espera, para que vejam o resultado primeiro
+        self._notificar(subscritores, chave, resultado)
+        futuro.set_result(resultado)
+
+    def executar(self, chave, func, *args, ao_progredir=None, **kwargs):
+        """
+        Executa func(*args, **kwargs), ou espera pelo pedido idêntico já em curso.
+        'ao_progredir' recebe os resultados parciais que o pedido publicar com progredir().
+        """
+        futuro, lider = self._entrar(chave, ao_progredir)
+        if not lider:
+            logging.info(f"Pedido {chave} já em curso; a aguardar o mesmo resultado.")
+            return futuro.result()
+        try:
+            resultado = func(*args, **kwargs)
+        except BaseException as e:
+            self._concluir(chave, futuro, erro=e)
+            raise
+        self._concluir(chave, futuro, resultado)
+        return resultado
+
+    async def executar_async(self, chave, criar_corrotina):
+        """Equivalente de executar() para corrotinas ('criar_corrotina' só é chamada se for preciso)."""
+        futuro, lider = self._entrar(chave)
+        if not lider:
+            logging.info(f"Pedido {chave} já em curso; a aguardar o mesmo resultado.")
+            return await asyncio.wrap_future(futuro)
+        try:
+            resultado = await criar_corrotina()
+        except BaseException as e:
+            self._concluir(chave, futuro, erro=e)
+            raise
+        subscritores = self._sair(chave)
+        try:
+            await asyncio.to_thread(self._notificar, subscritores, chave, resultado)
+        finally:
+            futuro.set_result(resultado)
+        return resultado
@@ -0,0 +1,103 @@
+# src/core/status.py
+
+import threading
+from datetime import timedelta
+
+from src.core.dataset import ingerir
+from src.utils.datetime_utils import now_timestamp
+
+# Um TrackID sem registos nas últimas 24h fica como 'SEM REGISTRO RECENTE'
+LIMITE_REGISTO_RECENTE = timedelta(hours=24).total_seconds()
+
+class UltimasPosicoes:
+    """
+    Tabela TrackID -> (timestamp, linha) do registo mais recente de um cliente, mantida
+    incrementalmente: se o dataset for uma extensão do já processado (mesma linhagem, apenas
+    com linhas acrescentadas, ex: após uma sincronização incremental), só as linhas novas são
+    percorridas. O status passa a custar O(#TrackIDs) em vez de O(#registos).
+    Não depende do Qt e pode ser atualizada em qualquer thread.
+    """
+    def __init__(self):
+        self.linhagem = None
+        self.linhas_processadas = 0
+        self.dataset = None
+        self.ultimo_por_trackid = {} # TrackID -> (timestamp, linha)
+        self.sem_data_valida = set() # TrackIDs com algum registo de DATAHORA inválida
+        self._lock = threading.Lock()
+
+    def _limpar(self):
+        self.linhas_processadas = 0
+        self.ultimo_por_trackid = {}
+        self.sem_data_valida = set()
+
+    def atualizar(self, dataset):
+        """Sincroniza a tabela com o dataset, processando apenas as linhas ainda não vistas."""
+        with self._lock:
+            if dataset.linhagem is not self.linhagem or len(dataset) < self.linhas_processadas:
+                self._limpar()
+                self.linhagem = dataset.linhagem
+            self.dataset = dataset
+            total = len(dataset)
+            ultimo_por_trackid = self.ultimo_por_trackid
+            timestamps = dataset.timestamps
+            trackids = dataset.trackids
+            for linha in range(self.linhas_processadas, total):
+                track_id = trackids[linha]
+                if not track_id:
+                    continue
+                timestamp = timestamps[linha]
+                if timestamp != timestamp: # NaN: DATAHORA inválida
+                    self.sem_data_valida.add(track_id)
+                    continue
+                atual = ultimo_por_trackid.get(track_id)
+                if atual is None or timestamp > atual[0]:
+                    ultimo_por_trackid[track_id] = (timestamp, linha)
+            self.linhas_processadas = total
+
+    def ultimos_timestamps(self):
+        """Timestamp do registo mais recente de cada TrackID (ex: para medir a atividade da frota)."""
+        with self._lock:
+            return [timestamp for timestamp, _ in self.ultimo_por_trackid.values()]
+
+    def status(self, agora=None):
+        """
+        Dicionário de status por TrackID: 'OK' (com a última posição), 'SEM REGISTRO RECENTE'
+        ou 'ERRO' quando nenhum registo do TrackID tem DATAHORA válida.
+        """
+        agora = now_timestamp() if agora is None else agora
+        with self._lock:
+            dataset = self.dataset
+            client_status_output = {}
+            for track_id, (timestamp, linha) in self.ultimo_por_trackid.items():
+                data_ultimo_registo_str = dataset.datahoras[linha]
+                if agora - timestamp > LIMITE_REGISTO_RECENTE:
+                    client_status_output[track_id] = {
+                        'status': 'SEM REGISTRO RECENTE',
+                        'message': f"Último registro: {data_ultimo_registo_str}"
+                    }
+                else:
+                    client_status_output[track_id] = {
+                        'status': 'OK',
+                        'latitude': dataset.valor(linha, 'LATITUDE'),
+                        'longitude': dataset.valor(linha, 'LONGITUDE'),
+                        'datahora': data_ultimo_registo_str
+                    }
+
+            for track_id in self.sem_data_valida - self.ultimo_por_trackid.keys():
+                client_status_output[track_id] = {
+                    'status': 'ERRO',
+                    'message': 'Formato de data inválido no último registo.'
+                }
+        return client_status_output
+
+def calcular_status(dados, posicoes=None):
+    """
+    Processa os dados de um cliente num dicionário de status por TrackID.
+    Com 'posicoes' (a UltimasPosicoes do cliente) o cálculo reaproveita as linhas já processadas.
+    """
+    dataset = ingerir(dados)
+    if not dataset:
+        return {}
+    posicoes = UltimasPosicoes() if posicoes is None else posicoes
+    posicoes.atualizar(dataset)
+    return posicoes.status()
@@ -4,31 +4,41 @@ import sys
 import logging
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QPushButton, QLineEdit, QLabel, QComboBox, QTableWidget,
-    QTableWidgetItem, QHeaderView, QFrame, QStackedWidget, QMessageBox,
-    QScrollArea, QDialog, QCheckBox, QDialogButtonBox, QGridLayout, QGroupBox,
+    QPushButton, QLineEdit, QLabel, QComboBox, QTableView,
+    QHeaderView, QStackedWidget, QMessageBox,
+    QDialog, QCheckBox, QDialogButtonBox, QGridLayout, QGroupBox,
     QProgressBar, QMenu, QCalendarWidget, QDateEdit, QGraphicsDropShadowEffect,
-    QTabWidget # Adicionado QTabWidget
+    QTabWidget, # Adicionado QTabWidget
+    QListView, QStyledItemDelegate, QToolTip, QPlainTextEdit
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer, QDate
-from PyQt6.QtGui import QPalette, QColor, QFont, QKeySequence, QShortcut, QCursor, QAction
+from PyQt6.QtCore import (
+    Qt, QThread, pyqtSignal, QTimer, QDate, QAbstractTableModel, QAbstractListModel,
+    QModelIndex, QRect, QRectF, QSize, QEvent, QObject, QRunnable, QThreadPool
+)
+from PyQt6.QtGui import QPalette, QColor, QFont, QKeySequence, QShortcut, QCursor, QAction, QPainter, QPen
 import threading
-from datetime import datetime, timedelta
-
-# Imports para o gráfico
-import matplotlib
-matplotlib.use('QtAgg')
-from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
+from datetime import datetime
 
-from src.core.api import ConsultaAPI
+from src.core.api import obter_api, estatisticas_ligacoes, pedidos_partilhados, OPERACAO_SINCRONIZAR
 from src.core.data_controller import DataController
+from src.core.dataset import ingerir
+from src.core.async_transport import obter_transporte, fechar_transporte
 from src.core.exceptions import ConsultaAPIException
+from src.core.scheduler import AgendadorClientes, intervalo_por_atividade
+from src.core.status import UltimasPosicoes, calcular_status
 from src.utils.exportar import Exportar
+from src.utils.data_utils import extrair_lista_ids
 from src.utils.config import COLUNAS
-from src.utils.settings_manager import ITENS_POR_PAGINA
+from src.utils.settings_manager import (
+    ITENS_POR_PAGINA, TABLE_MODE, VIRTUAL_PREFETCH_ROWS, AUTO_REFRESH_MINUTES,
+    MONITOR_MAX_WORKERS, MONITOR_STARTUP_SPREAD_SECONDS, MONITOR_JITTER, MONITOR_IDLE_BACKOFF_MAX_FACTOR,
+    MONITOR_ADAPTIVE_POLLING, MONITOR_MIN_REFRESH_MINUTES, MONITOR_MAX_REFRESH_MINUTES, MONITOR_ACTIVE_WINDOW_MINUTES
+)
 from src.utils.state_manager import load_state, save_state
-from src.utils.datetime_utils import is_valid_ui_date, parse_api_datetime_to_date
+from src.utils.datetime_utils import is_valid_ui_date, now_timestamp
+
+# Pausa na digitação (ms) antes de aplicar o filtro automaticamente
+FILTRO_DEBOUNCE_MS = 300
 
 # --- PALETAS DE CORES (sem alterações) ---
 PALETTES = {
@@ -114,17 +124,17 @@ def generate_theme_qss(p):
         QTabBar::tab:!selected:hover {{
             background: {p["border"]};
         }}
-        QTableWidget {{
+        QTableView {{
             background-color: {p["alt_bg"]};
             alternate-background-color: {p["bg"]};
             gridline-color: {p["border"]};
             color: {p["text_main"]};
         }}
-        QTableWidget::item {{
+        QTableView::item {{
             border-bottom: 1px solid {p["border"]};
             padding: 5px;
         }}
-        QTableWidget::item:selected {{
+        QTableView::item:selected {{
             background-color: {p["selected_bg"]};
             color: {p["selected_fg"]};
         }}
@@ -211,11 +221,82 @@ THEMES = {
 }
 
 # --- WIDGETS E DIÁLOGOS (sem alterações) ---
-class MplCanvas(FigureCanvas):
-    def __init__(self, parent=None, width=5, height=4, dpi=100):
-        fig = Figure(figsize=(width, height), dpi=dpi)
-        self.axes = fig.add_subplot(111)
-        super(MplCanvas, self).__init__(fig)
+class StatusDonutWidget(QWidget):
+    """
+    Gráfico de anel (donut) do status dos TrackIDs, desenhado com QPainter.
+    Atualizar as contagens apenas agenda um repaint do widget; não há figura nem backend a manter.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.fatias = [] # (rótulo, valor, cor)
+        self.palette = PALETTES["dark_green"]
+        self.setMinimumSize(300, 300)
+
+    def set_contagens(self, fatias, palette):
+        """Define as fatias [(rótulo, valor, cor)] e a paleta; só redesenha se algo mudou."""
+        if fatias == self.fatias and palette is self.palette:
+            return
+        self.fatias = fatias
+        self.palette = palette
+        self.update()
+
+    def paintEvent(self, event):
+        p = self.palette
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        metricas = painter.fontMetrics()
+        altura_legenda = metricas.height() + 12
+        lado = min(self.width(), self.height() - altura_legenda) - 20
+        if lado <= 0:
+            return
+        espessura = lado * 0.22
+        anel = QRectF(
+            (self.width() - lado) / 2 + espessura / 2, 10 + espessura / 2,
+            lado - espessura, lado - espessura
+        )
+
+        total = sum(valor for _, valor, _ in self.fatias)
+        if total <= 0:
+            painter.setPen(QPen(QColor(p['border']), espessura))
+            painter.drawEllipse(anel)
+            texto_centro = "Nenhum dado"
+        else:
+            # Ângulos do QPainter em 1/16 de grau; começa no topo e segue no sentido horário
+            inicio = 90 * 16
+            for _, valor, cor in self.fatias:
+                extensao = -round(valor / total * 360 * 16)
+                pen = QPen(QColor(cor), espessura)
+                pen.setCapStyle(Qt.PenCapStyle.FlatCap)
+                painter.setPen(pen)
+                painter.drawArc(anel, inicio, extensao)
+                inicio += extensao
+            texto_centro = str(total)
+
+        negrito = QFont(self.font())
+        negrito.setBold(True)
+        negrito.setPointSizeF(negrito.pointSizeF() * 1.6)
+        painter.setFont(negrito)
+        painter.setPen(QColor(p['text_main']))
+        painter.drawText(anel, Qt.AlignmentFlag.AlignCenter, texto_centro)
+
+        # Legenda: quadrado de cor + "Rótulo (n) xx.x%"
+        painter.setFont(self.font())
+        metricas = painter.fontMetrics()
+        itens = [
+            (f"{rotulo} ({valor}) {valor / total:.1%}", cor)
+            for rotulo, valor, cor in self.fatias if valor > 0
+        ] if total > 0 else []
+        larguras = [metricas.horizontalAdvance(texto) + metricas.height() + 18 for texto, _ in itens]
+        x = (self.width() - sum(larguras)) / 2
+        y = 10 + lado + 8
+        for (texto, cor), largura in zip(itens, larguras):
+            quadrado = metricas.height() - 4
+            painter.fillRect(QRectF(x, y + 2, quadrado, quadrado), QColor(cor))
+            painter.setPen(QColor(p['text_main']))
+            painter.drawText(QRectF(x + quadrado + 6, y, largura, metricas.height()), Qt.AlignmentFlag.AlignVCenter, texto)
+            x += largura
+        painter.end()
 
 class RecordDetailDialog(QDialog):
     def __init__(self, record_data, parent=None):
@@ -248,11 +329,37 @@ class ExportOptionsDialog(QDialog):
         self.result = result
         self.accept()
 
+class ConsultaLoteDialog(QDialog):
+    """Consulta de vários IDMENSAGEM ou TrackIDs de uma vez (ex: lista colada de uma folha de cálculo)."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Consulta em Lote")
+        self.resize(420, 360)
+        layout = QVBoxLayout(self)
+        self.combo_tipo = QComboBox()
+        self.combo_tipo.addItems(["IDMENSAGEM", "TrackID"])
+        layout.addWidget(QLabel("Consultar por:"))
+        layout.addWidget(self.combo_tipo)
+        self.texto_ids = QPlainTextEdit()
+        self.texto_ids.setPlaceholderText("Cole aqui os IDs, um por linha ou separados por vírgulas.")
+        layout.addWidget(self.texto_ids)
+        botoes = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        botoes.accepted.connect(self.accept)
+        botoes.rejected.connect(self.reject)
+        layout.addWidget(botoes)
+
+    def tipo(self):
+        return self.combo_tipo.currentText()
+
+    def ids(self):
+        return extrair_lista_ids(self.texto_ids.toPlainText())
+
 
 # --- WORKER E COLUMN SETTINGS (sem alterações) ---
 class Worker(QThread):
     finished = pyqtSignal(object)
     error = pyqtSignal(object) # Alterado para emitir um objeto (ex: (nome_cliente, erro_msg))
+    progresso = pyqtSignal(object) # Resultados parciais (ex: primeiros lotes de um download)
     def __init__(self, func, *args, **kwargs):
         super().__init__()
         self.func = func
@@ -265,6 +372,33 @@ class Worker(QThread):
         except Exception as e:
             self.error.emit(e) # Emitir a exceção
 
+class TarefaSignals(QObject):
+    """Sinais de uma TarefaPool (QRunnable não é um QObject e não pode emitir sinais)."""
+    finished = pyqtSignal(object)
+    error = pyqtSignal(object)
+
+def emitir_resultado_futuro(futuro, signals):
+    """Reencaminha o resultado de um concurrent.futures.Future (ex: do transporte assíncrono) para sinais Qt."""
+    try:
+        signals.finished.emit(futuro.result())
+    except Exception as e:
+        signals.error.emit(e)
+
+class TarefaPool(QRunnable):
+    """Equivalente ao Worker para correr num QThreadPool partilhado, sem criar uma thread por tarefa."""
+    def __init__(self, func, *args, **kwargs):
+        super().__init__()
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = TarefaSignals()
+    def run(self):
+        try:
+            result = self.func(*self.args, **self.kwargs)
+            self.signals.finished.emit(result)
+        except Exception as e:
+            self.signals.error.emit(e)
+
 class ColumnSettingsDialog(QDialog):
     def __init__(self, all_columns, visible_columns, parent=None):
         super().__init__(parent)
@@ -284,6 +418,86 @@ class ColumnSettingsDialog(QDialog):
     def get_selected_columns(self):
         return [col for col, checkbox in self.checkboxes.items() if checkbox.isChecked()]
 
+# --- MODELO DA TABELA DE CONSULTAS ---
+class RegistosTableModel(QAbstractTableModel):
+    """
+    Modelo da tabela de Consultas que lê diretamente do resultado filtrado do DataController.
+    Mostra a janela [inicio, fim) desse resultado (uma página, ou tudo no modo virtual);
+    as células são geradas sob pedido em data(), sem criar objetos por célula.
+    No modo virtual, pre_carregar() prepara o texto das linhas à volta da área visível
+    e descarta o resto, para a memória ficar constante seja qual for o total.
+    """
+    def __init__(self, controller, colunas, parent=None, margem_prefetch=0):
+        super().__init__(parent)
+        self.controller = controller
+        self.colunas = colunas
+        self.inicio = 0
+        self.fim = 0
+        self.margem_prefetch = margem_prefetch
+        self._linhas_preparadas = {} # row -> tuplo com o texto de cada coluna
+
+    def definir_intervalo(self, inicio, fim):
+        """Passa a mostrar as posições [inicio, fim) do resultado filtrado."""
+        self.beginResetModel()
+        self.inicio, self.fim = inicio, fim
+        self._linhas_preparadas = {}
+        self.endResetModel()
+
+    def _texto_linha(self, row):
+        textos = []
+        for coluna in self.colunas:
+            valor = self.controller.valor_filtrado(self.inicio + row, coluna)
+            textos.append("" if valor is None else str(valor))
+        return tuple(textos)
+
+    def pre_carregar(self, primeira, ultima):
+        """Prepara as linhas [primeira - margem, ultima + margem] e descarta as restantes."""
+        inicio = max(0, primeira - self.margem_prefetch)
+        fim = min(self.rowCount(), ultima + self.margem_prefetch + 1)
+        anteriores = self._linhas_preparadas
+        try:
+            self._linhas_preparadas = {
+                row: anteriores.get(row) or self._texto_linha(row) for row in range(inicio, fim)
+            }
+        except IndexError:
+            self._linhas_preparadas = {} # O resultado mudou e a vista ainda não foi reposta
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.fim - self.inicio
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.colunas)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        preparada = self._linhas_preparadas.get(index.row())
+        if preparada is not None:
+            return preparada[index.column()]
+        try:
+            valor = self.controller.valor_filtrado(self.inicio + index.row(), self.colunas[index.column()])
+        except IndexError:
+            return None # O resultado mudou e a vista ainda não foi reposta
+        return "" if valor is None else str(valor)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation != Qt.Orientation.Horizontal:
+            return str(self.inicio + section + 1)
+        nome = self.colunas[section]
+        if nome == self.controller.coluna_ordenacao:
+            return f"{nome} {'↓' if self.controller.ordem_desc else '↑'}"
+        return nome
+
+    def registo(self, row):
+        """Registo completo da linha 'row' da vista."""
+        return self.controller.registo_filtrado(self.inicio + row)
+
+    def atualizar_cabecalho(self):
+        """Redesenha o cabeçalho (ex: seta de ordenação)."""
+        self.headerDataChanged.emit(Qt.Orientation.Horizontal, 0, len(self.colunas) - 1)
+
 # --- TELA DE CONSULTAS (sem alterações) ---
 class ConsultaScreen(QWidget):
     def __init__(self, controller, api, main_app):
@@ -307,8 +521,17 @@ class ConsultaScreen(QWidget):
         self.btn_refresh.clicked.connect(self.main_app.refresh_data_async)
         self.btn_config_colunas = QPushButton("Colunas")
         self.btn_config_colunas.clicked.connect(self.main_app.open_column_settings)
+        self.btn_consulta_lote = QPushButton("Consulta em Lote")
+        self.btn_consulta_lote.clicked.connect(self.main_app.consultar_lote_async)
         self.entry_filtro = QLineEdit()
         self.entry_filtro.setPlaceholderText("")
+        # Filtro enquanto se escreve: só aplica após uma pausa na digitação
+        self.timer_filtro = QTimer(self)
+        self.timer_filtro.setSingleShot(True)
+        self.timer_filtro.setInterval(FILTRO_DEBOUNCE_MS)
+        self.timer_filtro.timeout.connect(self.main_app.aplicar_filtro)
+        self.entry_filtro.textChanged.connect(self.timer_filtro.start)
+        self.entry_filtro.returnPressed.connect(self.main_app.aplicar_filtro)
         self.combo_coluna = QComboBox()
         self.combo_coluna.addItems(["TODAS"] + COLUNAS)
         self.combo_coluna.setCurrentText("PLACA")
@@ -322,24 +545,34 @@ class ConsultaScreen(QWidget):
         controls_layout.addWidget(self.btn_consultar, 0, 2)
         controls_layout.addWidget(self.btn_refresh, 0, 3)
         controls_layout.addWidget(self.btn_config_colunas, 0, 4)
+        controls_layout.addWidget(self.btn_consulta_lote, 0, 5)
         controls_layout.addWidget(QLabel("Filtro:"), 1, 0)
         controls_layout.addWidget(self.entry_filtro, 1, 1)
         controls_layout.addWidget(self.combo_coluna, 1, 2)
         controls_layout.addWidget(self.btn_aplicar_filtros, 1, 3)
         controls_layout.addWidget(self.btn_limpar_filtros, 1, 4)
-        controls_layout.setColumnStretch(5, 1)
-        self.tabela = QTableWidget()
-        self.tabela.setColumnCount(len(COLUNAS))
-        self.tabela.setHorizontalHeaderLabels(COLUNAS)
+        controls_layout.setColumnStretch(6, 1)
+        self.modo_virtual = TABLE_MODE == "virtual"
+        self.modelo_tabela = RegistosTableModel(
+            self.controller, COLUNAS, self,
+            margem_prefetch=VIRTUAL_PREFETCH_ROWS if self.modo_virtual else 0
+        )
+        self.tabela = QTableView()
+        self.tabela.setModel(self.modelo_tabela)
+        if self.modo_virtual:
+            # Altura fixa: o Qt não precisa de medir as linhas, mesmo com milhões delas
+            self.tabela.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+            self.tabela.verticalScrollBar().valueChanged.connect(self.pre_carregar_visiveis)
+            self.modelo_tabela.modelReset.connect(self.pre_carregar_visiveis)
         self.tabela.setAlternatingRowColors(True)
-        self.tabela.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.tabela.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
         self.tabela.verticalHeader().setVisible(False)
         self.tabela.horizontalHeader().setHighlightSections(False)
-        self.tabela.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.tabela.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
         self.tabela.horizontalHeader().sectionClicked.connect(self.main_app.ordenar_por_coluna)
         self.tabela.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.tabela.customContextMenuRequested.connect(self.show_table_context_menu)
-        self.tabela.itemDoubleClicked.connect(self.main_app.show_record_details)
+        self.tabela.doubleClicked.connect(self.main_app.show_record_details)
         self.tabela.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         bottom_layout = QHBoxLayout()
         paginacao_group = QGroupBox()
@@ -368,6 +601,10 @@ class ConsultaScreen(QWidget):
         self.btn_csv.clicked.connect(self.main_app.exportar_csv)
         export_layout.addWidget(self.btn_excel)
         export_layout.addWidget(self.btn_csv)
+        if self.modo_virtual:
+            # Uma só vista com rolagem: a navegação por páginas não se aplica
+            for btn in (self.btn_primeira, self.btn_anterior, self.btn_proximo, self.btn_ultima):
+                btn.setVisible(False)
         bottom_layout.addWidget(paginacao_group)
         bottom_layout.addStretch()
         bottom_layout.addWidget(export_group)
@@ -381,47 +618,213 @@ class ConsultaScreen(QWidget):
         shadow.setOffset(0, 5)
         widget.setGraphicsEffect(shadow)
     def show_table_context_menu(self, pos):
-        item = self.tabela.itemAt(pos)
-        if not item: return
+        index = self.tabela.indexAt(pos)
+        if not index.isValid(): return
         menu = QMenu()
         copy_row_action = menu.addAction("Copiar Linha")
         copy_cell_action = menu.addAction("Copiar Célula")
         action = menu.exec(self.tabela.mapToGlobal(pos))
+        modelo = self.modelo_tabela
         if action == copy_row_action:
-            row_index = item.row()
-            row_data = [self.tabela.item(row_index, c).text() for c in range(self.tabela.columnCount())]
+            row_data = [modelo.index(index.row(), c).data() for c in range(modelo.columnCount())]
             QApplication.clipboard().setText(", ".join(row_data))
         elif action == copy_cell_action:
-            QApplication.clipboard().setText(item.text())
-    def atualizar_tabela(self, dados):
-        self.tabela.setRowCount(0)
-        if not dados: return
-        self.tabela.setRowCount(len(dados))
-        header_labels = [self.tabela.horizontalHeaderItem(i).text().replace(" ↓", "").replace(" ↑", "") for i in range(self.tabela.columnCount())]
-        for row_idx, row_data in enumerate(dados):
-            for col_idx, col_name in enumerate(header_labels):
-                if not self.tabela.isColumnHidden(col_idx):
-                    item_text = str(row_data.get(col_name, ""))
-                    self.tabela.setItem(row_idx, col_idx, QTableWidgetItem(item_text))
+            QApplication.clipboard().setText(index.data())
+
+    def atualizar_tabela(self, inicio, fim):
+        """Mostra as posições [inicio, fim) do resultado filtrado (as células são lidas sob pedido)."""
+        self.modelo_tabela.definir_intervalo(inicio, fim)
     
+    def pre_carregar_visiveis(self, *args):
+        """Modo virtual: prepara as linhas visíveis mais a margem de pré-carregamento."""
+        total = self.modelo_tabela.rowCount()
+        if not total:
+            return
+        primeira = self.tabela.rowAt(0)
+        ultima = self.tabela.rowAt(self.tabela.viewport().height() - 1)
+        primeira = 0 if primeira < 0 else primeira
+        if ultima < 0:
+            # Área visível maior do que as linhas restantes (ou vista ainda por desenhar)
+            altura_linha = max(1, self.tabela.verticalHeader().defaultSectionSize())
+            ultima = min(total - 1, primeira + self.tabela.viewport().height() // altura_linha)
+        self.modelo_tabela.pre_carregar(primeira, ultima)
+
     def atualizar_label_pagina(self):
+        if self.modo_virtual:
+            self.label_pagina.setText(f"{self.controller.total_registos} registos")
+            return
         total_registos = self.controller.total_registos
         total_paginas = self.controller.total_paginas if self.controller.total_registos > 0 else 1
         self.main_app.pagina_atual = max(1, min(self.main_app.pagina_atual, total_paginas))
         self.label_pagina.setText(f"Página {self.main_app.pagina_atual}/{total_paginas} ({total_registos})")
 
+# --- LISTA DE STATUS POR TRACKID (MODELO + DELEGATE) ---
+class StatusTrackIDModel(QAbstractListModel):
+    """
+    Modelo da lista de status de um cliente: uma linha por TrackID, ordenada.
+    DisplayRole devolve o TrackID e UserRole o dicionário de status.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.track_ids = []
+        self.linha_por_id = {}
+        self.status = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.track_ids)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        track_id = self.track_ids[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return str(track_id)
+        if role == Qt.ItemDataRole.UserRole:
+            return self.status.get(track_id, {})
+        return None
+
+    def track_id(self, row):
+        return self.track_ids[row]
+
+    def definir_status(self, status_dict, forcar=False):
+        """
+        Aplica um novo dicionário de status. Se o conjunto de TrackIDs mudar a lista é reposta;
+        caso contrário só é emitido dataChanged para as linhas cujo status mudou.
+        """
+        novos_ids = sorted(status_dict, key=str)
+        if novos_ids != self.track_ids:
+            self.beginResetModel()
+            self.track_ids = novos_ids
+            self.linha_por_id = {track_id: row for row, track_id in enumerate(novos_ids)}
+            self.status = dict(status_dict)
+            self.endResetModel()
+            return
+
+        alteradas = [
+            self.linha_por_id[track_id] for track_id in novos_ids
+            if forcar or self.status.get(track_id) != status_dict[track_id]
+        ]
+        self.status = dict(status_dict)
+        # Agrupa linhas consecutivas num único sinal
+        inicio = anterior = None
+        for row in alteradas + [None]:
+            if inicio is not None and (row is None or row != anterior + 1):
+                self.dataChanged.emit(self.index(inicio), self.index(anterior))
+                inicio = None
+            if row is not None and inicio is None:
+                inicio = row
+            anterior = row
+
+class StatusCardDelegate(QStyledItemDelegate):
+    """
+    Desenha cada TrackID como um card (ponto de status, coordenadas e botão 'Ver na Tabela')
+    diretamente com QPainter, sem criar widgets por linha.
+    """
+    ver_na_tabela = pyqtSignal(object)
+
+    ALTURA_CARD = 96
+    LARGURA_BOTAO = 130
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.palette = PALETTES["dark_green"]
+        self.botao_ativo = True
+
+    @staticmethod
+    def conteudo(status_info, palette):
+        """Retorna (cor do ponto, linhas de texto, itálico) para um status."""
+        status = status_info.get("status", "N/A")
+        message = status_info.get("message", "")
+        if status == "OK":
+            return palette['primary'], [
+                f"Latitude: {status_info.get('latitude', 'N/A')}",
+                f"Longitude: {status_info.get('longitude', 'N/A')}",
+                f"Data/Hora: {status_info.get('datahora', 'N/A')}",
+            ], False
+        if status == "ERRO":
+            return "#FF5252", [f"ERRO: {message}"], False
+        if status == "SEM REGISTRO RECENTE":
+            return "#8E9BAA", [message], True
+        return "#FFC107", ["Aguardando atualização..."], True
+
+    def _rect_botao(self, rect):
+        return QRect(rect.right() - self.LARGURA_BOTAO - 16, rect.center().y() - 17, self.LARGURA_BOTAO, 34)
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), self.ALTURA_CARD)
+
+    def paint(self, painter, option, index):
+        p = self.palette
+        track_id = index.data(Qt.ItemDataRole.DisplayRole)
+        cor, linhas, italico = self.conteudo(index.data(Qt.ItemDataRole.UserRole) or {}, p)
+
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        card = option.rect.adjusted(4, 4, -4, -4)
+        painter.setPen(QPen(QColor(p['border'])))
+        painter.setBrush(QColor(p['alt_bg']))
+        painter.drawRoundedRect(QRectF(card), 10, 10)
+
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor(cor))
+        painter.drawEllipse(QRectF(card.left() + 14, card.center().y() - 7, 14, 14))
+
+        botao = self._rect_botao(option.rect)
+        largura_texto = botao.left() - card.left() - 60
+        x = card.left() + 44
+
+        negrito = QFont(option.font)
+        negrito.setBold(True)
+        painter.setPen(QColor(p['text_main']))
+        painter.setFont(negrito)
+        metricas = painter.fontMetrics()
+        y = card.top() + 10 + metricas.ascent()
+        painter.drawText(x, y, metricas.elidedText(f"TrackID: {track_id}", Qt.TextElideMode.ElideRight, largura_texto))
+
+        fonte = QFont(option.font)
+        fonte.setItalic(italico)
+        painter.setFont(fonte)
+        metricas = painter.fontMetrics()
+        for linha in linhas:
+            y += metricas.height()
+            painter.drawText(x, y, metricas.elidedText(linha, Qt.TextElideMode.ElideRight, largura_texto))
+
+        painter.setPen(QPen(QColor(p['primary_dark'] if self.botao_ativo else p['border']), 2))
+        painter.setBrush(QColor(p['primary'] if self.botao_ativo else p['entry_bg']))
+        painter.drawRoundedRect(QRectF(botao), 6, 6)
+        painter.setPen(QColor(p['text_dark'] if self.botao_ativo else p['border']))
+        painter.setFont(negrito)
+        painter.drawText(botao, Qt.AlignmentFlag.AlignCenter, "Ver na Tabela")
+
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if (event.type() == QEvent.Type.MouseButtonRelease and self.botao_ativo
+                and self._rect_botao(option.rect).contains(event.position().toPoint())):
+            self.ver_na_tabela.emit(model.track_id(index.row()))
+            return True
+        return super().editorEvent(event, model, option, index)
+
+    def helpEvent(self, event, view, option, index):
+        if not self.botao_ativo and self._rect_botao(option.rect).contains(event.pos()):
+            QToolTip.showText(event.globalPos(), "Mude para este cliente na tela de Consultas para ativar o botão", view)
+            return True
+        return super().helpEvent(event, view, option, index)
+
 # --- [NOVA CLASSE] PÁGINA DE STATUS INDIVIDUAL ---
 class ClientStatusPage(QWidget):
     """
     Este widget contém o dashboard de UM cliente (o gráfico e a lista de TrackIDs).
     É o layout que pertencia à 'ControleScreen' antiga.
     """
-    def __init__(self, main_app):
+    def __init__(self, main_app, nome_cliente):
         super().__init__()
         self.main_app = main_app
-        self.status_widgets = {}
-        self.current_ids = set()
+        self.nome_cliente = nome_cliente
         self.tema_atual = self.main_app.tema_atual
+        # Últimas contagens do gráfico (só é redesenhado se mudarem)
+        self.ultimas_contagens = None
 
         main_layout = QHBoxLayout(self)
         main_layout.setContentsMargins(15, 15, 15, 15)
@@ -433,7 +836,7 @@ class ClientStatusPage(QWidget):
         chart_layout = QVBoxLayout(chart_group)
         chart_layout.setContentsMargins(10, 10, 10, 10)
 
-        self.chart_canvas = MplCanvas(self, width=5, height=4, dpi=100)
+        self.chart_canvas = StatusDonutWidget(self)
         self.chart_canvas.setFixedHeight(300)
         chart_layout.addWidget(self.chart_canvas, alignment=Qt.AlignmentFlag.AlignCenter)
 
@@ -449,134 +852,74 @@ class ClientStatusPage(QWidget):
         list_layout.setContentsMargins(10, 10, 10, 10)
         list_layout.setSpacing(10)
 
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        self.scroll_content = QWidget()
-        self.scroll_layout = QVBoxLayout(self.scroll_content)
-        self.scroll_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
-        self.scroll_area.setWidget(self.scroll_content)
-        list_layout.addWidget(self.scroll_area)
+        # Lista virtualizada: só as linhas visíveis são desenhadas, sem widgets por TrackID
+        self.status_model = StatusTrackIDModel(self)
+        self.status_delegate = StatusCardDelegate(self)
+        self.status_delegate.palette = PALETTES[self.tema_atual]
+        self.status_delegate.ver_na_tabela.connect(self.main_app.show_in_table)
+        self.status_list = QListView()
+        self.status_list.setModel(self.status_model)
+        self.status_list.setItemDelegate(self.status_delegate)
+        self.status_list.setUniformItemSizes(True)
+        self.status_list.setSelectionMode(QListView.SelectionMode.NoSelection)
+        self.status_list.setVerticalScrollMode(QListView.ScrollMode.ScrollPerPixel)
+        self.status_list.setMouseTracking(True)
+        list_layout.addWidget(self.status_list)
         main_layout.addWidget(list_group, 2)
+        self.atualizar_botoes()
 
-    def update_display(self, client_status_ref):
+    def atualizar_botoes(self):
+        """Ativa os botões 'Ver na Tabela' apenas se este cliente for o selecionado em Consultas."""
+        ativo = self.main_app.cliente_atual['nome'] == self.nome_cliente
+        if ativo != self.status_delegate.botao_ativo:
+            self.status_delegate.botao_ativo = ativo
+            self.status_list.viewport().update()
+
+    def update_display(self, client_status_ref, forcar=False):
         """
         Atualiza este dashboard específico com os dados de status fornecidos.
         'client_status_ref' é o dicionário de status para este cliente.
+        Só as linhas cujo status mudou são redesenhadas e o gráfico só é refeito
+        se as contagens mudarem; 'forcar' refaz tudo (ex: mudança de tema).
         """
         if client_status_ref is None:
             client_status_ref = {}
-            
-        new_ids = set(client_status_ref.keys())
-        self.tema_atual = self.main_app.tema_atual # Garante que o tema está atualizado
-
-        if new_ids != self.current_ids:
-            while self.scroll_layout.count():
-                child = self.scroll_layout.takeAt(0)
-                if child.widget():
-                    child.widget().deleteLater()
-            self.status_widgets.clear()
-            self.current_ids = new_ids
-
-            for track_id in sorted(list(self.current_ids)):
-                card = QFrame()
-                card_layout = QHBoxLayout(card)
-                card_layout.setContentsMargins(12, 8, 12, 8)
-                card_layout.setSpacing(14)
-
-                icon = QLabel("●")
-                icon.setFixedWidth(25)
-                icon.setAlignment(Qt.AlignmentFlag.AlignCenter)
-
-                label = QLabel(f"<b>TrackID:</b> {track_id}<br><i>Aguardando...</i>")
-                label.setWordWrap(True)
-
-                btn = QPushButton("Ver na Tabela")
-                btn.setObjectName("PrimaryAction")
-                # O botão deve funcionar apenas para o cliente ATUALMENTE selecionado na tela de Consultas
-                btn.clicked.connect(lambda _, tid=track_id: self.main_app.show_in_table(tid))
-                if self.main_app.cliente_atual['nome'] != self.parent().parent().tabText(self.parent().parent().currentIndex()):
-                     btn.setEnabled(False)
-                     btn.setToolTip("Mude para este cliente na tela de Consultas para ativar o botão")
-                
-                card_layout.addWidget(icon)
-                card_layout.addWidget(label, 1)
-                card_layout.addWidget(btn)
-
-                card.setFrameShape(QFrame.Shape.StyledPanel)
-                self.scroll_layout.addWidget(card)
-                self.status_widgets[track_id] = {"card": card, "icon": icon, "label": label}
-
-        # --- Atualização de status ---
-        ok_count, error_count, no_signal_count = 0, 0, 0
-        palette = PALETTES[self.tema_atual]
 
-        for track_id, status_info in client_status_ref.items():
-            if track_id in self.status_widgets:
-                w = self.status_widgets[track_id]
-                status = status_info.get("status", "N/A")
-                message = status_info.get("message", "")
-                card_style = f"background-color: {palette['alt_bg']}; border: 1px solid {palette['border']}; border-radius: 10px;"
-
-                if status == "OK":
-                    color = palette['primary']
-                    msg = f"<b>Latitude:</b> {status_info.get('latitude', 'N/A')}<br>" \
-                          f"<b>Longitude:</b> {status_info.get('longitude', 'N/A')}<br>" \
-                          f"<b>Data/Hora:</b> {status_info.get('datahora', 'N/A')}"
-                    ok_count += 1
-                elif status == "ERRO":
-                    color = "#FF5252"
-                    msg = f"<b>ERRO:</b> {message}"
-                    error_count += 1
-                elif status == "SEM REGISTRO RECENTE":
-                    color = "#8E9BAA"
-                    msg = f"<i>{message}</i>"
-                    no_signal_count += 1
-                else:
-                    color = "#FFC107"
-                    msg = "<i>Aguardando atualização...</i>"
-                    no_signal_count += 1
-
-                w["icon"].setStyleSheet(f"color: {color}; font-size: 20px; font-weight: bold;")
-                w["label"].setText(f"<b>TrackID:</b> {track_id}<br>{msg}")
-                w["card"].setStyleSheet(card_style)
+        tema = self.main_app.tema_atual
+        forcar = forcar or tema != self.tema_atual
+        self.tema_atual = tema # Garante que o tema está atualizado
+        if forcar:
+            self.status_delegate.palette = PALETTES[self.tema_atual]
+            self.status_list.viewport().update()
+
+        self.status_model.definir_status(client_status_ref)
+
+        ok_count, error_count, no_signal_count = 0, 0, 0
+        for status_info in client_status_ref.values():
+            status = status_info.get("status", "N/A")
+            if status == "OK":
+                ok_count += 1
+            elif status == "ERRO":
+                error_count += 1
+            else:
+                no_signal_count += 1
 
         now = datetime.now().strftime("%H:%M:%S")
         self.status_summary_label.setText(
-            f"<b>Total: {len(self.current_ids)}</b> | Última atualização (dados): {now}"
+            f"<b>Total: {len(client_status_ref)}</b> | Última atualização (dados): {now}"
         )
-        self.update_chart(ok_count, error_count, no_signal_count)
+        contagens = (ok_count, error_count, no_signal_count)
+        if forcar or contagens != self.ultimas_contagens:
+            self.update_chart(*contagens)
+            self.ultimas_contagens = contagens
 
     def update_chart(self, ok, error, no_signal):
-        self.chart_canvas.axes.clear()
         palette = PALETTES[self.tema_atual]
-        
-        theme_colors = {
-            "ok": palette['primary'],
-            "error": "#FF5252",
-            "no_signal": "#8E9BAA",
-        }
-        labels, sizes, colors = [], [], []
-        if ok > 0:
-            labels.append(f"OK ({ok})"); sizes.append(ok); colors.append(theme_colors["ok"])
-        if error > 0:
-            labels.append(f"Erro ({error})"); sizes.append(error); colors.append(theme_colors["error"])
-        if no_signal > 0:
-            labels.append(f"Sem Sinal ({no_signal})"); sizes.append(no_signal); colors.append(theme_colors["no_signal"])
-        if not sizes:
-            sizes, labels, colors = [1], ["Nenhum dado"], [palette['border']]
-
-        text_color = palette['text_main']
-        self.chart_canvas.axes.pie(
-            sizes,
-            labels=labels,
-            autopct="%1.1f%%",
-            startangle=90,
-            colors=colors,
-            textprops={"color": text_color, "weight": "bold"},
-        )
-        self.chart_canvas.axes.axis("equal")
-        self.chart_canvas.figure.set_facecolor("none")
-        self.chart_canvas.draw()
+        self.chart_canvas.set_contagens([
+            ("OK", ok, palette['primary']),
+            ("Erro", error, "#FF5252"),
+            ("Sem Sinal", no_signal, "#8E9BAA"),
+        ], palette)
 
 
 # --- [CLASSE MODIFICADA] TELA DE CONTROLE (AGORA UM CONTAINER DE ABAS) ---
@@ -594,25 +937,36 @@ class ControleScreen(QWidget):
         
         # O timer de atualização foi movido para AppGUI
 
-    def update_dashboard(self, all_client_statuses):
+    def update_dashboard(self, all_client_statuses, cliente=None, forcar=False):
         """
-        Recebe o dicionário de status global e atualiza/cria as abas.
+        Recebe o dicionário de status global e atualiza as abas de forma incremental.
         all_client_statuses = {'Cliente A': {status_dict}, 'Cliente B': {status_dict}}
+        Com 'cliente', só a aba desse cliente é atualizada. As páginas são criadas
+        uma única vez e reutilizadas; nada é destruído entre atualizações.
         """
-        self.tab_widget.clear() # Limpa e recria as abas
-        self.client_pages = {}
+        nomes = [cliente] if cliente else sorted(all_client_statuses)
+        for client_name in nomes:
+            page = self.client_pages.get(client_name)
+            if page is None:
+                page = ClientStatusPage(self.main_app, client_name)
+                self.client_pages[client_name] = page
+                # Mantém as abas por ordem alfabética
+                posicao = sorted(self.client_pages).index(client_name)
+                self.tab_widget.insertTab(posicao, page, client_name)
 
-        for client_name, status_dict in sorted(all_client_statuses.items()):
-            
-            page = ClientStatusPage(self.main_app)
-            self.client_pages[client_name] = page
-            self.tab_widget.addTab(page, client_name)
-            
             # Atualiza a página com os dados
-            page.update_display(status_dict)
+            page.update_display(all_client_statuses.get(client_name), forcar=forcar)
+
+    def atualizar_botoes(self):
+        """Reavalia os botões 'Ver na Tabela' de todas as páginas (ex: após mudar de cliente)."""
+        for page in self.client_pages.values():
+            page.atualizar_botoes()
 
 # --- JANELA PRINCIPAL (APP GUI) ---
 class AppGUI(QMainWindow):
+    # (nome_cliente, DatasetColunar, status): emitido sempre que uma sincronização de um cliente termina
+    dados_cliente_atualizados = pyqtSignal(str, object, object)
+
     def __init__(self, clientes):
         super().__init__()
         self.clientes = clientes
@@ -628,10 +982,23 @@ class AppGUI(QMainWindow):
         self.exportar = Exportar(self, self.controller)
         self.pagina_atual = 1
         self.workers = []
+        # Pool partilhado do monitor global e tarefas em curso por cliente (no máximo uma por cliente)
+        self.monitor_pool = QThreadPool(self)
+        self.monitor_pool.setMaxThreadCount(max(1, MONITOR_MAX_WORKERS))
+        self.monitor_tarefas = {}
+        # Cliente cujos dados na tabela vieram de um cache desatualizado e aguardam a revalidação
+        self.revalidacao_pendente = None
+        # True quando a tabela mostra todos os dados do cliente atual e deve acompanhar as sincronizações
+        # em segundo plano; False após uma consulta por ID ou em lote (cujo resultado não é substituído)
+        self.tabela_completa = False
+        # Consultas e monitor partilham as sincronizações em curso; o resultado chega aqui uma única vez
+        self.dados_cliente_atualizados.connect(self.on_dados_cliente_atualizados)
+        pedidos_partilhados.subscrever(self._ao_concluir_pedido)
         
         # --- [NOVO] ARMAZENAMENTO DE STATUS GLOBAL ---
         self.global_client_data = {} # Armazena os dados brutos de todos os clientes
         self.global_client_status = {} # Armazena os status processados de todos os clientes
+        self.posicoes_clientes = {} # Últimas posições por TrackID de cada cliente (UltimasPosicoes)
         
         self.is_first_load = True
         self.setWindowTitle(f"App de Consulta - {self.cliente_atual['nome']}")
@@ -676,12 +1043,20 @@ class AppGUI(QMainWindow):
         self.inicializar_api_e_carregar_dados()
         
         # --- [NOVO] MONITORAMENTO GLOBAL ---
-        self.global_monitor_timer = QTimer()
+        # Cada cliente tem o seu intervalo (auto_refresh_minutes no clientes.json ou no settings.ini);
+        # o timer dispara apenas na próxima busca agendada de qualquer cliente. Com o intervalo adaptativo,
+        # após cada atualização o intervalo passa a depender da atividade dos TrackIDs do cliente
+        self.agendador = AgendadorClientes(
+            MONITOR_STARTUP_SPREAD_SECONDS, MONITOR_JITTER, MONITOR_IDLE_BACKOFF_MAX_FACTOR,
+            intervalo_maximo=60 * MONITOR_MAX_REFRESH_MINUTES if MONITOR_ADAPTIVE_POLLING else None
+        )
+        self.agendador.configurar({
+            cliente['nome']: 60 * cliente.get('auto_refresh_minutes', AUTO_REFRESH_MINUTES) for cliente in self.clientes
+        })
+        self.global_monitor_timer = QTimer(self)
+        self.global_monitor_timer.setSingleShot(True)
         self.global_monitor_timer.timeout.connect(self.run_global_client_monitoring)
-        # 10 minutos = 10 * 60 * 1000 = 600000 ms
-        self.global_monitor_timer.start(600000)
-        self.run_global_client_monitoring() # Executa uma vez no início
-        # O timer antigo (monitor_timer) foi removido
+        self.reprogramar_monitor()
         
         self.update_visible_columns()
         self.aplicar_tema_completo()
@@ -693,22 +1068,24 @@ class AppGUI(QMainWindow):
         self.setWindowTitle(f"App de Consulta - {self.cliente_atual['nome']}")
         logging.info(f"Cliente (Consultas) alterado para: {self.cliente_atual['nome']}")
         
-        self.controller.dados_completos = []
+        self.controller.carregar_dados([])
         self.controller.aplicar_filtro()
         self.renderizar_dados()
+        self.revalidacao_pendente = None
+        self.tabela_completa = False
         
         # Carrega os dados do cliente selecionado para a tela de Consultas
         self.inicializar_api_e_carregar_dados()
         
-        # Atualiza o dashboard (para re-habilitar botões 'Ver na Tabela')
-        self.frames["Controle"].update_dashboard(self.global_client_status)
+        # Re-habilita os botões 'Ver na Tabela' apenas na aba do novo cliente
+        self.frames["Controle"].atualizar_botoes()
 
 
     def inicializar_api_e_carregar_dados(self):
         """Cria a instância da API para o cliente ATUAL e carrega os dados para a TELA DE CONSULTAS."""
         creds = self.cliente_atual
         try:
-            self.api = ConsultaAPI(creds['url'], creds['user'], creds['password'])
+            self.api = obter_api(creds['url'], creds['user'], creds['password'])
         except Exception as e:
             logging.error(f"Falha ao inicializar API para {creds['nome']}: {e}")
             QMessageBox.critical(self, "Erro de Conexão", f"Não foi possível inicializar a API para o cliente {creds['nome']}.\nVerifique o 'clientes.json'.\nErro: {e}")
@@ -722,9 +1099,10 @@ class AppGUI(QMainWindow):
         if creds['nome'] in self.global_client_data:
             logging.info(f"Carregando dados locais de {creds['nome']} a partir do cache global.")
             self.on_dados_carregados(self.global_client_data[creds['nome']])
+            self.tabela_completa = True
         else:
-            logging.info(f"Buscando dados locais para {creds['nome']} pela primeira vez.")
-            self.carregar_dados_iniciais(force_refresh=True)
+            logging.info(f"Buscando dados locais para {creds['nome']} pela primeira vez (cache local ou API).")
+            self.carregar_dados_iniciais(force_refresh=False)
 
     def _create_menu(self):
         # ... (sem alterações) ...
@@ -767,6 +1145,10 @@ class AppGUI(QMainWindow):
         self.app_state['geometry'] = self.geometry().getRect()
         self.app_state['column_widths'] = widths
         save_state(self.app_state)
+        # Descarta as buscas do monitor ainda em fila (as que já correm terminam sozinhas)
+        self.global_monitor_timer.stop()
+        self.monitor_pool.clear()
+        fechar_transporte()
         event.accept()
         
     def setup_shortcuts(self):
@@ -804,8 +1186,8 @@ class AppGUI(QMainWindow):
         self.light_action.setChecked(self.tema_atual == "light_green")
         for dialog in self.findChildren(QDialog):
             dialog.setStyleSheet(THEMES[self.tema_atual])
-        # Atualiza o dashboard (que agora tem abas)
-        self.frames["Controle"].update_dashboard(self.global_client_status)
+        # Atualiza o dashboard (que agora tem abas); o tema obriga a redesenhar tudo
+        self.frames["Controle"].update_dashboard(self.global_client_status, forcar=True)
 
     def open_column_settings(self):
         # ... (sem alterações) ...
@@ -831,8 +1213,8 @@ class AppGUI(QMainWindow):
             self.container.setCurrentWidget(self.frames["Consultas"])
         elif frame_name == "Controle":
             self.container.setCurrentWidget(self.frames["Controle"])
-            # Atualiza os botões 'Ver na Tabela' no painel de controle
-            self.frames["Controle"].update_dashboard(self.global_client_status)
+            # O dashboard já está atualizado pelo monitor; só os botões dependem do cliente atual
+            self.frames["Controle"].atualizar_botoes()
 
     def show_in_table(self, track_id):
         # ... (sem alterações) ...
@@ -840,77 +1222,64 @@ class AppGUI(QMainWindow):
         screen = self.frames["Consultas"]
         screen.combo_coluna.setCurrentText("TrackID")
         screen.entry_filtro.setText(str(track_id))
-        self.aplicar_filtro()
+        screen.timer_filtro.stop()
+        # Correspondência exata pelo índice de TrackID, sem passar pelo filtro de texto
+        self.controller.set_filtro_trackid(track_id)
+        self.controller.aplicar_filtro()
+        self.pagina_atual = 1
+        self.renderizar_dados()
     
-    # --- [MÉTODO REFACTORADO] ---
-    def process_data_into_status(self, dados_completos):
-        """
-        Recebe uma lista de dados e processa-a num dicionário de status por TrackID.
-        Esta é a lógica do antigo 'monitor_all_clients'.
-        """
-        if not dados_completos:
-            return {}
-        
-        limite_tempo = timedelta(hours=24)
-        agora = datetime.now()
-        
-        client_status_output = {} # Dicionário de retorno
-        records_by_trackid = {}
-        
-        for record in dados_completos:
-            track_id = record.get("TrackID")
-            if track_id:
-                if track_id not in records_by_trackid:
-                    records_by_trackid[track_id] = []
-                records_by_trackid[track_id].append(record)
-
-        for track_id, records in records_by_trackid.items():
-            latest_record = max(records, key=lambda r: r.get("DATAHORA", ""))
-            
-            data_ultimo_registo_str = latest_record.get("DATAHORA", "")
-            status_cliente = {}
-            try:
-                data_ultimo_registo_obj = parse_api_datetime_to_date(data_ultimo_registo_str)
-                if data_ultimo_registo_obj is None:
-                    raise ValueError("Data nula ou em formato inválido")
-
-                data_ultimo_registo_dt = datetime.combine(data_ultimo_registo_obj, datetime.min.time())
-                
-                if agora - data_ultimo_registo_dt > limite_tempo:
-                    status_cliente = {
-                        'status': 'SEM REGISTRO RECENTE', 
-                        'message': f"Último registro: {data_ultimo_registo_str}"
-                    }
-                else:
-                    status_cliente = {
-                        'status': 'OK', 
-                        'latitude': latest_record.get('LATITUDE'),
-                        'longitude': latest_record.get('LONGITUDE'), 
-                        'datahora': data_ultimo_registo_str
-                    }
-            except (ValueError, TypeError):
-                 status_cliente = {
-                    'status': 'ERRO', 
-                    'message': 'Formato de data inválido no último registo.'
-                }
-
-            client_status_output[track_id] = status_cliente
-            
-        return client_status_output
+    def posicoes_do_cliente(self, nome_cliente):
+        """Tabela de últimas posições do cliente (criada na primeira utilização; partilhada entre threads)."""
+        return self.posicoes_clientes.setdefault(nome_cliente, UltimasPosicoes())
 
     # --- [NOVO] MÉTODOS DE MONITORAMENTO GLOBAL ---
     def run_global_client_monitoring(self):
-        """Dispara workers para buscar dados de TODOS os clientes em paralelo."""
-        logging.info("Iniciando monitoramento global de clientes...")
-        self.status_bar.showMessage("Monitor global: Buscando status de todos os clientes...")
-        
-        for client_info in self.clientes:
-            worker = Worker(self.fetch_client_data, client_info)
-            worker.finished.connect(self.on_global_data_received)
-            worker.error.connect(lambda err, c=client_info: self.on_global_data_error(c['nome'], err))
-            # Não usamos self.run_in_thread porque não queremos desabilitar a GUI inteira
-            self.workers.append(worker)
-            worker.start()
+        """Dispara as buscas dos clientes cuja atualização agendada já chegou."""
+        pendentes = self.agendador.pendentes()
+        if pendentes:
+            logging.info(f"Monitoramento global: a atualizar {', '.join(pendentes)}...")
+            for host, estatisticas in estatisticas_ligacoes().items():
+                logging.info(
+                    f"[Monitor Global] Ligações a {host}: {estatisticas['pedidos']} pedidos em "
+                    f"{estatisticas['ligacoes']} ligações ({estatisticas['reutilizacao']:.0%} reutilizadas)."
+                )
+            self.status_bar.showMessage(f"Monitor global: Buscando status de {', '.join(pendentes)}...")
+            for client_info in self.clientes:
+                if client_info['nome'] in pendentes:
+                    self.iniciar_busca_monitor(client_info)
+        self.reprogramar_monitor()
+
+    def reprogramar_monitor(self):
+        """Programa o timer do monitor para a próxima busca agendada (ou para-o se não houver nenhuma)."""
+        segundos = self.agendador.segundos_ate_proxima()
+        if segundos is None:
+            self.global_monitor_timer.stop()
+        else:
+            self.global_monitor_timer.start(int(segundos * 1000))
+
+    def iniciar_busca_monitor(self, client_info):
+        """Agenda a busca de um cliente no monitor (transporte assíncrono ou pool de threads)."""
+        # Com o httpx disponível, todos os clientes são buscados em simultâneo num único event loop
+        transporte = obter_transporte()
+        nome = client_info['nome']
+        if nome in self.monitor_tarefas:
+            # A busca anterior deste cliente ainda não terminou: não se acumula outra
+            logging.info(f"[Monitor Global] Busca de {nome} ainda em curso; ciclo ignorado para este cliente.")
+            return
+        tarefa = None if transporte else TarefaPool(self.fetch_client_data, client_info)
+        signals = tarefa.signals if tarefa else TarefaSignals()
+        # Liga os sinais e regista a tarefa antes de a iniciar: uma falha imediata (ex: disjuntor aberto)
+        # tem de chegar aos handlers, senão o cliente ficaria para sempre "em curso"
+        signals.finished.connect(self.on_global_data_received)
+        signals.error.connect(lambda err, n=nome: self.on_global_data_error(n, err))
+        # Não usamos self.run_in_thread porque não queremos desabilitar a GUI inteira
+        self.monitor_tarefas[nome] = signals
+        if tarefa:
+            self.monitor_pool.start(tarefa)
+        else:
+            futuro = transporte.submeter(self.fetch_client_data_async(transporte, client_info))
+            futuro.add_done_callback(lambda f, s=signals: emitir_resultado_futuro(f, s))
 
     def fetch_client_data(self, client_info):
         """
@@ -918,50 +1287,99 @@ class AppGUI(QMainWindow):
         Retorna (nome_cliente, dados)
         """
         logging.info(f"[Monitor Global] Buscando dados de: {client_info['nome']}")
-        api = ConsultaAPI(client_info['url'], client_info['user'], client_info['password'])
-        # Força a atualização, ignorando o cache local da API
-        dados = api.buscar_todos(force_refresh=True) 
+        api = obter_api(client_info['url'], client_info['user'], client_info['password'])
+        # Um cliente com falhas repetidas é ignorado até ao fim da espera, sem ocupar o pool
+        api.verificar_disjuntor()
+        # Sincronização incremental a partir dos dados já em memória (busca completa se ainda não houver)
+        dados = api.sincronizar(self.global_client_data.get(client_info['nome']))
         return (client_info['nome'], dados)
 
+    async def fetch_client_data_async(self, transporte, client_info):
+        """Equivalente de fetch_client_data para o transporte assíncrono. Retorna (nome_cliente, dados)."""
+        logging.info(f"[Monitor Global] Buscando dados de: {client_info['nome']} (assíncrono)")
+        api = await transporte.em_thread(obter_api, client_info['url'], client_info['user'], client_info['password'])
+        api.verificar_disjuntor()
+        dados = await api.sincronizar_async(transporte, self.global_client_data.get(client_info['nome']))
+        return (client_info['nome'], dados)
+
+    def _ao_concluir_pedido(self, chave, resultado):
+        """
+        Subscritor de pedidos_partilhados (corre na thread do pedido ou, no transporte assíncrono, numa
+        thread do executor, nunca no event loop): calcula o status do cliente ainda fora da thread
+        da GUI, só com as linhas novas, e reencaminha a sincronização para a GUI.
+        """
+        url, user, operacao = chave
+        if operacao != OPERACAO_SINCRONIZAR:
+            return
+        for client_info in self.clientes:
+            if client_info['url'] == url and client_info['user'] == user:
+                status = calcular_status(resultado, self.posicoes_do_cliente(client_info['nome']))
+                self.dados_cliente_atualizados.emit(client_info['nome'], resultado, status)
+
+    def on_dados_cliente_atualizados(self, client_name, dados, status):
+        """
+        Ponto único de atualização após uma sincronização: guarda os dados, atualiza o status
+        e o dashboard do cliente e, se for o cliente da tela de Consultas, a tabela (mantendo filtro e página).
+        """
+        anteriores = self.global_client_data.get(client_name)
+        self.agendador.registar_atividade(client_name, anteriores is None or len(dados) != len(anteriores))
+        if MONITOR_ADAPTIVE_POLLING:
+            self.agendador.definir_base(client_name, intervalo_por_atividade(
+                self.posicoes_do_cliente(client_name).ultimos_timestamps(), now_timestamp(), 60 * MONITOR_MIN_REFRESH_MINUTES,
+                60 * MONITOR_MAX_REFRESH_MINUTES, 60 * MONITOR_ACTIVE_WINDOW_MINUTES
+            ))
+        self.global_client_data[client_name] = dados
+        self.global_client_status[client_name] = status
+        # Notifica a Tela de Controle para atualizar apenas a aba deste cliente
+        self.frames["Controle"].update_dashboard(self.global_client_status, cliente=client_name)
+
+        if client_name == self.cliente_atual['nome'] and self.tabela_completa and self.controller.dataset is not dados:
+            self.controller.carregar_dados(dados)
+            self.controller.aplicar_filtro()
+            self.renderizar_dados()
+        if self.revalidacao_pendente == client_name:
+            self.revalidacao_pendente = None # O aviso de dados desatualizados é substituído pela mensagem do monitor
+
     def on_global_data_received(self, result):
-        """Handler para quando um worker de monitoramento termina."""
+        """Handler para quando uma busca do monitor termina (os dados já chegaram por on_dados_cliente_atualizados)."""
         client_name, dados = result
-        
-        if dados is None:
-            # Ocorreu um erro dentro do fetch_client_data (já logado)
-            status_dict = {"API_ERROR": {"status": "ERRO", "message": "Falha ao conectar ou buscar dados."}}
-        else:
-            logging.info(f"[Monitor Global] Dados recebidos de: {client_name} ({len(dados)} registos)")
-            # Armazena os dados brutos
-            self.global_client_data[client_name] = dados
-            # Processa os dados em status
-            status_dict = self.process_data_into_status(dados)
-        
-        # Armazena o status processado
-        self.global_client_status[client_name] = status_dict
-        
-        # Notifica a Tela de Controle para atualizar as suas abas
-        self.frames["Controle"].update_dashboard(self.global_client_status)
+        self.monitor_tarefas.pop(client_name, None)
+        self.agendador.concluir(client_name)
+        self.reprogramar_monitor()
+        logging.info(f"[Monitor Global] Dados recebidos de: {client_name} ({len(dados)} registos)")
         self.status_bar.showMessage(f"Monitor global: Status de '{client_name}' atualizado.", 5000)
 
     def on_global_data_error(self, client_name, error):
         """Handler para falha de um worker de monitoramento."""
+        self.monitor_tarefas.pop(client_name, None)
+        self.agendador.concluir(client_name, falhou=True)
+        self.reprogramar_monitor()
         logging.error(f"[Monitor Global] Erro ao buscar dados de {client_name}: {error}")
         status_dict = {"API_ERROR": {"status": "ERRO", "message": f"Falha na thread: {error}"}}
         self.global_client_status[client_name] = status_dict
-        self.frames["Controle"].update_dashboard(self.global_client_status)
-        self.status_bar.showMessage(f"Monitor global: Falha ao atualizar '{client_name}'.", 5000)
+        self.frames["Controle"].update_dashboard(self.global_client_status, cliente=client_name)
+        if self.revalidacao_pendente == client_name:
+            self.revalidacao_pendente = None
+            self.status_bar.showMessage(f"⚠ {client_name}: falha ao atualizar; a mostrar dados do cache desatualizados.")
+        else:
+            self.status_bar.showMessage(f"Monitor global: Falha ao atualizar '{client_name}'.", 5000)
 
     # --- Funções de Threads (sem alterações) ---
     def on_worker_finished(self, worker):
         if worker in self.workers:
             self.workers.remove(worker)
 
-    def run_in_thread(self, func, on_finish, on_error, *args, **kwargs):
-        """Usado para tarefas da GUI (Carregar, Consultar, Exportar) que bloqueiam a UI."""
+    def run_in_thread(self, func, on_finish, on_error, *args, on_progress=None, **kwargs):
+        """
+        Usado para tarefas da GUI (Carregar, Consultar, Exportar) que bloqueiam a UI.
+        Com 'on_progress', a função recebe o argumento 'ao_progredir' para enviar resultados parciais.
+        """
         self.progress_bar.setVisible(True)
         self.progress_bar.setRange(0, 0)
         worker = Worker(func, *args, **kwargs)
+        if on_progress:
+            worker.kwargs['ao_progredir'] = worker.progresso.emit
+            worker.progresso.connect(on_progress)
         worker.finished.connect(on_finish)
         worker.error.connect(on_error)
         worker.finished.connect(lambda: self.on_worker_finished(worker))
@@ -987,18 +1405,55 @@ class AppGUI(QMainWindow):
              return
         self.is_first_load = True
         self.status_bar.showMessage(f"Carregando dados para {self.cliente_atual['nome']}...")
+        if force_refresh:
+            # Sincroniza de forma incremental sobre os dados já conhecidos do cliente;
+            # o resultado substitui a tabela mesmo que esta mostre uma consulta por ID
+            self.tabela_completa = True
+            self.run_in_thread(
+                self.api.sincronizar,
+                on_finish=self.on_dados_sincronizados,
+                on_error=self.on_task_error,
+                dados_locais=self.global_client_data.get(self.cliente_atual['nome'])
+            )
+            return
         self.run_in_thread(
-            self.api.buscar_todos,
-            on_finish=self.on_dados_carregados,
+            self.api.carregar,
+            on_finish=self.on_carga_concluida,
             on_error=self.on_task_error,
-            force_refresh=force_refresh
+            on_progress=self.on_dados_parciais
         )
 
+    def on_carga_concluida(self, resultado):
+        """Mostra os dados carregados; se vierem de um cache desatualizado, revalida-os em segundo plano."""
+        dados, obsoleto = resultado
+        self.on_dados_carregados(dados)
+        self.tabela_completa = True
+        if obsoleto:
+            nome_cliente = self.cliente_atual['nome']
+            self.revalidacao_pendente = nome_cliente
+            self.status_bar.showMessage(
+                f"⚠ {nome_cliente}: a mostrar dados do cache desatualizados; a atualizar em segundo plano..."
+            )
+            self.iniciar_busca_monitor(self.cliente_atual)
+
+    def on_dados_parciais(self, dados):
+        """Mostra os registos já descarregados enquanto o resto da resposta ainda está a chegar."""
+        self.tabela_completa = False # Só a carga final acompanha as sincronizações seguintes
+        self.controller.carregar_dados(dados)
+        self.aplicar_filtro()
+        self.status_bar.showMessage(f"A descarregar dados de {self.cliente_atual['nome']}: {len(dados)} registos recebidos...")
+
+    def on_dados_sincronizados(self, dados):
+        """Fim da atualização manual: tabela, status e dashboard já foram atualizados por on_dados_cliente_atualizados."""
+        self.status_bar.showMessage(f"Dados atualizados para {self.cliente_atual['nome']}: {len(dados)} registos.", 5000)
+        self.on_task_completed()
+
     def on_dados_carregados(self, dados):
-        if dados is None: dados = []
+        # Ingestão única: o mesmo DatasetColunar é partilhado pela tabela, pelo cache global e pelo status
+        dados = ingerir(dados)
         
         # Atualiza o controlador de dados da TELA DE CONSULTAS
-        self.controller.dados_completos = dados
+        self.controller.carregar_dados(dados)
         self.aplicar_filtro()
         self.status_bar.showMessage(f"Dados carregados para {self.cliente_atual['nome']}: {len(dados)} registos.", 5000)
         
@@ -1006,9 +1461,9 @@ class AppGUI(QMainWindow):
         if self.cliente_atual['nome'] not in self.global_client_data:
              self.global_client_data[self.cliente_atual['nome']] = dados
              # Processa e atualiza o dashboard de controle
-             status_dict = self.process_data_into_status(dados)
+             status_dict = calcular_status(dados, self.posicoes_do_cliente(self.cliente_atual['nome']))
              self.global_client_status[self.cliente_atual['nome']] = status_dict
-             self.frames["Controle"].update_dashboard(self.global_client_status)
+             self.frames["Controle"].update_dashboard(self.global_client_status, cliente=self.cliente_atual['nome'])
              
         self.on_task_completed()
         
@@ -1025,14 +1480,20 @@ class AppGUI(QMainWindow):
 
     # --- Métodos de Paginação, Filtro e Ordenação (sem alterações) ---
     def renderizar_dados(self):
-        page_num, dados_pagina = self.controller.get_dados_pagina(self.pagina_atual)
-        self.pagina_atual = page_num
-        self.frames["Consultas"].atualizar_tabela(dados_pagina)
+        if self.frames["Consultas"].modo_virtual:
+            # Modo virtual: todo o resultado filtrado numa só vista (get_intervalo_pagina fica para o modo paginado)
+            self.pagina_atual = 1
+            self.frames["Consultas"].atualizar_tabela(0, self.controller.total_registos)
+        else:
+            page_num, inicio, fim = self.controller.get_intervalo_pagina(self.pagina_atual)
+            self.pagina_atual = page_num
+            self.frames["Consultas"].atualizar_tabela(inicio, fim)
         self.frames["Consultas"].atualizar_label_pagina()
         self.update_sort_indicator()
 
     def aplicar_filtro(self):
         screen = self.frames["Consultas"]
+        screen.timer_filtro.stop() # Evita uma segunda aplicação pelo filtro automático
         self.controller.set_filtro_texto(screen.entry_filtro.text(), screen.combo_coluna.currentText())
         self.controller.aplicar_filtro()
         self.pagina_atual = 1
@@ -1045,25 +1506,15 @@ class AppGUI(QMainWindow):
         self.aplicar_filtro()
 
     def ordenar_por_coluna(self, column_index):
-        header_labels = [self.frames["Consultas"].tabela.horizontalHeaderItem(i).text().replace(" ↓", "").replace(" ↑", "") for i in range(len(COLUNAS))]
-        coluna = header_labels[column_index]
+        coluna = COLUNAS[column_index]
         self.controller.ordenar(coluna)
         self.controller.aplicar_filtro(re_sort_only=True)
         self.pagina_atual = 1
         self.renderizar_dados()
     
     def update_sort_indicator(self):
-        tabela = self.frames["Consultas"].tabela
-        sorted_col_name = self.controller.coluna_ordenacao
-        is_desc = self.controller.ordem_desc
-        for i in range(tabela.columnCount()):
-            header_item = tabela.horizontalHeaderItem(i)
-            original_text = header_item.text().replace(" ↓", "").replace(" ↑", "")
-            if original_text == sorted_col_name:
-                arrow = "↓" if is_desc else "↑"
-                header_item.setText(f"{original_text} {arrow}")
-            else:
-                header_item.setText(original_text)
+        # O modelo desenha a seta a partir do estado de ordenação do controlador
+        self.frames["Consultas"].modelo_tabela.atualizar_cabecalho()
         
     def consultar_api_async(self):
         if not self.api: return
@@ -1074,11 +1525,54 @@ class AppGUI(QMainWindow):
         self.status_bar.showMessage(f"A consultar ID {id_msg}...")
         self.run_in_thread(
             self.api.consultar,
-            on_finish=self.on_dados_carregados,
+            on_finish=self.on_consulta_concluida,
             on_error=self.on_task_error,
             id_mensagem=id_msg
         )
 
+    def on_consulta_concluida(self, dados):
+        """Resultado de uma consulta por ID: fica na tabela até o utilizador recarregar os dados do cliente."""
+        self.tabela_completa = False
+        self.on_dados_carregados(dados)
+
+    def consultar_lote_async(self):
+        if not self.api: return
+        dialog = ConsultaLoteDialog(self)
+        if not dialog.exec():
+            return
+        ids = dialog.ids()
+        if not ids:
+            QMessageBox.warning(self, "Atenção", "Nenhum ID indicado.")
+            return
+        tipo = dialog.tipo()
+        if tipo == "IDMENSAGEM":
+            invalidos = [i for i in ids if not i.isdigit()]
+            if invalidos:
+                QMessageBox.warning(self, "Atenção", f"IDMENSAGEM deve ser um número: {', '.join(invalidos[:10])}")
+                return
+            consulta = self.api.consultar_ids
+        else:
+            consulta = self.api.consultar_trackids
+        self.status_bar.showMessage(f"A consultar {len(ids)} {tipo}s...")
+        self.run_in_thread(
+            consulta,
+            lambda resultado: self.on_consulta_lote_concluida(resultado, len(ids)),
+            self.on_task_error,
+            ids
+        )
+
+    def on_consulta_lote_concluida(self, resultado, total):
+        registos, erros = resultado
+        self.on_consulta_concluida(registos)
+        self.status_bar.showMessage(
+            f"Consulta em lote: {total - len(erros)}/{total} itens consultados, {len(registos)} registos, {len(erros)} erros.", 10000
+        )
+        if erros:
+            linhas = [f"{item}: {erro}" for item, erro in list(erros.items())[:10]]
+            if len(erros) > 10:
+                linhas.append(f"... e mais {len(erros) - 10}.")
+            QMessageBox.warning(self, "Consulta em Lote", "Alguns itens falharam:\n\n" + "\n".join(linhas))
+
     def refresh_data_async(self):
         if not self.api: return
         self.carregar_dados_iniciais(force_refresh=True)
@@ -1093,23 +1587,16 @@ class AppGUI(QMainWindow):
     def proxima_pagina(self): self.ir_para_pagina(self.pagina_atual + 1)
     
     # --- Métodos de Detalhes e Exportação (sem alterações) ---
-    def show_record_details(self, item):
-        row_index = item.row()
-        id_col_index = -1
-        for i, col_name in enumerate(COLUNAS):
-            if col_name == "IDMENSAGEM":
-                id_col_index = i
-                break
-        
-        if id_col_index != -1:
-            try:
-                record_id = self.frames["Consultas"].tabela.item(row_index, id_col_index).text()
-                full_record = self.controller.get_record_by_id(record_id)
-                if full_record:
-                    dialog = RecordDetailDialog(full_record, self)
-                    dialog.exec()
-            except AttributeError:
-                logging.warning("Falha ao obter detalhes do registo. A tabela pode ter sido atualizada.")
+    def show_record_details(self, index):
+        if not index.isValid():
+            return
+        try:
+            full_record = self.frames["Consultas"].modelo_tabela.registo(index.row())
+        except IndexError:
+            logging.warning("Falha ao obter detalhes do registo. A tabela pode ter sido atualizada.")
+            return
+        dialog = RecordDetailDialog(full_record, self)
+        dialog.exec()
             
     def exportar_excel(self):
         self._show_export_options("excel")
@@ -1134,7 +1621,7 @@ class AppGUI(QMainWindow):
         screen = self.frames["Consultas"]
         widgets_to_manage = [
             screen.entry_id, screen.btn_consultar, screen.btn_refresh, 
-            screen.btn_config_colunas, screen.entry_filtro, screen.combo_coluna,
+            screen.btn_config_colunas, screen.btn_consulta_lote, screen.entry_filtro, screen.combo_coluna,
             screen.btn_aplicar_filtros, screen.btn_limpar_filtros,
             screen.btn_primeira, screen.btn_anterior, screen.btn_proximo, 
             screen.btn_ultima, screen.btn_excel, screen.btn_csv
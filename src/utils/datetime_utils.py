@@ -1,5 +1,5 @@
 # src/utils/datetime_utils.py
-from datetime import datetime
+from datetime import date, datetime
 
 # Formato de data de entrada para os campos de filtro da UI
 UI_DATE_FORMAT = '%Y-%m-%d'
@@ -19,6 +19,75 @@ def parse_api_datetime_to_date(datetime_str):
         # Em caso de erro de parsing, retorna None
         return None
 
+# Os timestamps internos são segundos desde 1970-01-01 na hora "de parede" da API (sem fuso),
+# para que comparações e janelas de 24h não dependam do fuso/horário de verão da máquina.
+EPOCH = datetime(1970, 1, 1)
+_dias_por_data = {} # Cache 'YYYY-MM-DD' -> segundos até à meia-noite desse dia
+
+def datetime_to_timestamp(dt):
+    """Converte um datetime (ingénuo) para o timestamp interno."""
+    if dt.tzinfo is not None:
+        dt = dt.replace(tzinfo=None)
+    return (dt - EPOCH).total_seconds()
+
+def date_to_timestamp(d):
+    """Converte um objeto date para o timestamp interno da meia-noite desse dia."""
+    return datetime_to_timestamp(datetime.combine(d, datetime.min.time()))
+
+def now_timestamp():
+    """Timestamp interno do instante atual (hora local)."""
+    return datetime_to_timestamp(datetime.now())
+
+def _parse_formato_fixo(datetime_str):
+    """
+    Caminho rápido para o formato fixo da API 'YYYY-MM-DD HH:MM:SS' (ou com 'T').
+    Evita criar objetos datetime: a parte da data é resolvida por cache e a hora por aritmética.
+    Retorna None para tudo o que não for exatamente esse formato, com uma hora válida.
+    """
+    if (len(datetime_str) < 19 or datetime_str[4] != '-' or datetime_str[7] != '-'
+            or datetime_str[10] not in ' T' or datetime_str[13] != ':' or datetime_str[16] != ':'):
+        return None
+    horas, minutos, segundos = datetime_str[11:13], datetime_str[14:16], datetime_str[17:19]
+    if not (horas.isdigit() and minutos.isdigit() and segundos.isdigit()):
+        return None # int() aceitaria ex: ' 1' ou '+1'
+    horas, minutos, segundos = int(horas), int(minutos), int(segundos)
+    if horas > 23 or minutos > 59 or segundos > 59:
+        return None
+    data = datetime_str[:10]
+    base = _dias_por_data.get(data)
+    if base is None:
+        base = date_to_timestamp(date.fromisoformat(data))
+        _dias_por_data[data] = base
+    segundos = horas * 3600 + minutos * 60 + segundos
+    resto = datetime_str[19:]
+    if resto and resto != 'Z':
+        if resto[0] != '.' or not resto[1:].isdigit():
+            return None # Fuso horário ou outro sufixo: deixa para o parser completo
+        return base + segundos + float("0" + resto)
+    return base + segundos
+
+def parse_api_datetime_to_timestamp(datetime_str):
+    """
+    Converte a string de data/hora da API para o timestamp interno (float).
+    Usa o caminho rápido para o formato fixo da API e, se falhar, o parser ISO completo.
+    Retorna None se o valor for vazio ou inválido.
+    """
+    if not datetime_str:
+        return None
+    try:
+        timestamp = _parse_formato_fixo(datetime_str)
+        if timestamp is not None:
+            return timestamp
+    except (ValueError, TypeError, IndexError):
+        pass
+    try:
+        texto = datetime_str.replace("Z", "").replace("T", " ")
+        if len(texto) > 10 and texto[10] != ' ':
+            return None # fromisoformat aceita qualquer separador entre a data e a hora
+        return datetime_to_timestamp(datetime.fromisoformat(texto))
+    except (ValueError, TypeError, AttributeError, OverflowError):
+        return None
+
 def is_valid_ui_date(date_str):
     """Verifica se a string de data da UI está no formato AAAA-MM-DD."""
     if not date_str:
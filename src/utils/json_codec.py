@@ -0,0 +1,63 @@
+# src/utils/json_codec.py
+import json
+import logging
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+from src.utils.settings_manager import JSON_BACKEND
+
+def _escolher_backend(preferido):
+    """Resolve o backend configurado ('auto', 'orjson', 'msgspec' ou 'json') para um instalado."""
+    disponiveis = {"orjson": orjson is not None, "msgspec": msgspec is not None, "json": True}
+    if preferido == "auto":
+        return next(nome for nome in ("orjson", "msgspec", "json") if disponiveis[nome])
+    if not disponiveis.get(preferido):
+        logging.warning(f"Backend JSON '{preferido}' indisponível; a usar o módulo json da biblioteca padrão.")
+        return "json"
+    return preferido
+
+BACKEND = _escolher_backend(JSON_BACKEND)
+
+# Exceções de descodificação de todos os backends (as do orjson já derivam de ValueError)
+ERROS_JSON = (ValueError, msgspec.DecodeError) if msgspec is not None else (ValueError,)
+
+if BACKEND == "orjson":
+    def loads(dados):
+        """Descodifica JSON a partir de str ou bytes."""
+        return orjson.loads(dados)
+
+    def dumps(obj, indentar=False):
+        """Codifica em JSON e retorna str (com 'indentar', legível por humanos)."""
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indentar else 0).decode("utf-8")
+
+elif BACKEND == "msgspec":
+    _codificador = msgspec.json.Encoder()
+    _descodificador = msgspec.json.Decoder()
+
+    def loads(dados):
+        """Descodifica JSON a partir de str ou bytes."""
+        return _descodificador.decode(dados)
+
+    def dumps(obj, indentar=False):
+        """Codifica em JSON e retorna str (com 'indentar', legível por humanos)."""
+        codificado = _codificador.encode(obj)
+        if indentar:
+            codificado = msgspec.json.format(codificado, indent=4)
+        return codificado.decode("utf-8")
+
+else:
+    def loads(dados):
+        """Descodifica JSON a partir de str ou bytes."""
+        return json.loads(dados)
+
+    def dumps(obj, indentar=False):
+        """Codifica em JSON e retorna str (com 'indentar', legível por humanos)."""
+        return json.dumps(obj, indent=4 if indentar else None, ensure_ascii=False)
@@ -8,6 +8,41 @@ config.read('settings.ini')
 # --- Seção [App] ---
 ITENS_POR_PAGINA = config.getint('App', 'itens_por_pagina', fallback=100)
 AUTO_REFRESH_MINUTES = config.getint('App', 'auto_refresh_minutes', fallback=10)
+TABLE_MODE = config.get('App', 'table_mode', fallback='paged').strip().lower()
+VIRTUAL_PREFETCH_ROWS = config.getint('App', 'virtual_prefetch_rows', fallback=200)
 
 # --- Seção [Cache] ---
-CACHE_DURATION_MINUTES = config.getint('Cache', 'duration_minutes', fallback=15)
\ No newline at end of file
+# soft_ttl_minutes substitui duration_minutes (ainda lido, para ficheiros antigos)
+CACHE_SOFT_TTL_MINUTES = config.getint('Cache', 'soft_ttl_minutes', fallback=config.getint('Cache', 'duration_minutes', fallback=15))
+CACHE_HARD_TTL_MINUTES = config.getint('Cache', 'hard_ttl_minutes', fallback=1440)
+CACHE_STALE_WHILE_REVALIDATE = config.getboolean('Cache', 'stale_while_revalidate', fallback=True)
+
+# --- Seção [API] ---
+INCREMENTAL_SYNC = config.getboolean('API', 'incremental_sync', fallback=True)
+INCREMENTAL_SYNC_PARAM = config.get('API', 'incremental_sync_param', fallback='').strip()
+FULL_SYNC_EVERY_MINUTES = config.getint('API', 'full_sync_every_minutes', fallback=60)
+ASYNC_TRANSPORT = config.getboolean('API', 'async_transport', fallback=True)
+POOL_MAXSIZE = config.getint('API', 'pool_maxsize', fallback=10)
+STREAM_BATCH_SIZE = config.getint('API', 'stream_batch_size', fallback=5000)
+COMPRESSION = config.get('API', 'compression', fallback='gzip').strip().lower()
+JSON_BACKEND = config.get('API', 'json_backend', fallback='auto').strip().lower()
+CONNECT_TIMEOUT_SECONDS = config.getfloat('API', 'connect_timeout_seconds', fallback=10)
+READ_TIMEOUT_SECONDS = config.getfloat('API', 'read_timeout_seconds', fallback=60)
+INCREMENTAL_READ_TIMEOUT_SECONDS = config.getfloat('API', 'incremental_read_timeout_seconds', fallback=20)
+REQUEST_DEADLINE_SECONDS = config.getfloat('API', 'request_deadline_seconds', fallback=60)
+MAX_RETRIES = config.getint('API', 'max_retries', fallback=3)
+RETRY_BACKOFF_SECONDS = config.getfloat('API', 'retry_backoff_seconds', fallback=1)
+CIRCUIT_BREAKER_FAILURES = config.getint('API', 'circuit_breaker_failures', fallback=3)
+CIRCUIT_BREAKER_COOLDOWN_SECONDS = config.getint('API', 'circuit_breaker_cooldown_seconds', fallback=300)
+BULK_MAX_CONCURRENCY = config.getint('API', 'bulk_max_concurrency', fallback=8)
+
+
+# --- Seção [Monitor] ---
+MONITOR_MAX_WORKERS = config.getint('Monitor', 'max_workers', fallback=4)
+MONITOR_STARTUP_SPREAD_SECONDS = config.getint('Monitor', 'startup_spread_seconds', fallback=30)
+MONITOR_JITTER = config.getfloat('Monitor', 'refresh_jitter', fallback=0.1)
+MONITOR_IDLE_BACKOFF_MAX_FACTOR = config.getint('Monitor', 'idle_backoff_max_factor', fallback=4)
+MONITOR_ADAPTIVE_POLLING = config.getboolean('Monitor', 'adaptive_polling', fallback=True)
+MONITOR_MIN_REFRESH_MINUTES = config.getfloat('Monitor', 'min_refresh_minutes', fallback=2)
+MONITOR_MAX_REFRESH_MINUTES = config.getfloat('Monitor', 'max_refresh_minutes', fallback=60)
+MONITOR_ACTIVE_WINDOW_MINUTES = config.getfloat('Monitor', 'active_window_minutes', fallback=60)
\ No newline at end of file
@@ -1,15 +1,16 @@
 # src/utils/state_manager.py
-import json
 import os
 import logging
 
+from src.utils import json_codec
+
 STATE_FILE = 'app_state.json'
 
 def save_state(state_data):
     """Salva o estado da aplicação (dicionário) num ficheiro JSON."""
     try:
-        with open(STATE_FILE, 'w') as f:
-            json.dump(state_data, f, indent=4)
+        with open(STATE_FILE, 'w', encoding='utf-8') as f:
+            f.write(json_codec.dumps(state_data, indentar=True))
         logging.info(f"Estado da aplicação salvo em {STATE_FILE}.")
     except IOError as e:
         logging.error(f"Não foi possível salvar o estado da aplicação: {e}")
@@ -21,10 +22,10 @@ def load_state():
         return {} # Retorna um dicionário vazio se o ficheiro não existir
     
     try:
-        with open(STATE_FILE, 'r') as f:
-            state_data = json.load(f)
+        with open(STATE_FILE, 'rb') as f:
+            state_data = json_codec.loads(f.read())
         logging.info(f"Estado da aplicação carregado de {STATE_FILE}.")
         return state_data
-    except (IOError, json.JSONDecodeError) as e:
+    except (IOError, *json_codec.ERROS_JSON) as e:
         logging.error(f"Não foi possível carregar o estado da aplicação: {e}")
         return {}
\ No newline at end of file
@@ -0,0 +1,291 @@
+# tests/test_api.py
+
+import json
+
+import pytest
+
+requests = pytest.importorskip("requests")
+
+from src.core import api as api_mod
+from src.core import cache as cache_mod
+from src.core.api import ConsultaAPI
+
+URL = "https://api.exemplo/consulta"
+
+def _registos(*ids):
+    return [{"IDMENSAGEM": i, "TrackID": "T1", "DATAHORA": "2025-01-01T10:00:00"} for i in ids]
+
+class ServidorFalso:
+    """
+    Simula o endpoint: {"IDMENSAGEM": 0} devolve tudo e {"IDMENSAGEM": N} só o registo N.
+    Com 'campo_a_partir_de', esse campo devolve os registos de IDMENSAGEM superior ao indicado.
+    """
+    def __init__(self, registos, campo_a_partir_de=None):
+        self.registos = registos
+        self.campo_a_partir_de = campo_a_partir_de
+
+    def responder(self, payload):
+        if self.campo_a_partir_de and self.campo_a_partir_de in payload:
+            return [r for r in self.registos if r["IDMENSAGEM"] > payload[self.campo_a_partir_de]]
+        if "IDMENSAGEM" in payload:
+            id_mensagem = payload["IDMENSAGEM"]
+            return self.registos if id_mensagem == 0 else [r for r in self.registos if r["IDMENSAGEM"] == id_mensagem]
+        if "TrackID" in payload:
+            return [r for r in self.registos if r["TrackID"] == payload["TrackID"]][-1:]
+        return []
+
+class RespostaFalsa:
+    def __init__(self, corpo, status_code=200):
+        self.content = corpo
+        self.text = corpo.decode("utf-8")
+        self.status_code = status_code
+        self.ok = status_code < 400
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.exceptions.HTTPError(f"{self.status_code}", response=self)
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+class SessaoFalsa:
+    """Substitui requests.Session: regista os payloads e responde com o ServidorFalso."""
+    def __init__(self, servidor):
+        self.servidor = servidor
+        self.payloads = []
+
+    def post(self, url, json=None, auth=None, timeout=None, stream=False):
+        self.payloads.append(json)
+        return RespostaFalsa(_json_bytes(self.servidor.responder(json)))
+
+def _json_bytes(valor):
+    return json.dumps(valor).encode("utf-8")
+
+@pytest.fixture(autouse=True)
+def _isolar(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_mod, "CACHE_DB", str(tmp_path / "cache.db"))
+    monkeypatch.setattr(api_mod, "_estado_sync", {})
+    monkeypatch.setattr(api_mod, "RETRY_BACKOFF_SECONDS", 0)
+
+def _api(servidor):
+    api = ConsultaAPI(URL, "user", "senha")
+    api.session = SessaoFalsa(servidor)
+    return api
+
+def _ids(dados):
+    return list(dados.ids)
+
+def test_sem_campo_incremental_a_sincronizacao_faz_busca_completa(monkeypatch):
+    # Leitura "registo único": IDMENSAGEM = N devolve apenas o registo N
+    monkeypatch.setattr(api_mod, "INCREMENTAL_SYNC_PARAM", "")
+    api = _api(ServidorFalso(_registos(*range(1, 16))))
+    dados = api.sincronizar(_registos(*range(1, 11)))
+    assert _ids(dados) == list(range(1, 16))
+    assert api.session.payloads == [{"IDMENSAGEM": 0}]
+
+    assert api.consultar(10) == _registos(10)
+    assert api.session.payloads[-1] == {"IDMENSAGEM": 10}
+
+def test_campo_incremental_pede_so_registos_novos_sem_afetar_consulta_por_id(monkeypatch):
+    # Leitura "a partir de": o campo configurado devolve os registos de IDMENSAGEM superior
+    monkeypatch.setattr(api_mod, "INCREMENTAL_SYNC_PARAM", "IDMENSAGEM_INICIAL")
+    api = _api(ServidorFalso(_registos(*range(1, 16)), campo_a_partir_de="IDMENSAGEM_INICIAL"))
+    dados = api.sincronizar(_registos(*range(1, 11)))
+    assert _ids(dados) == list(range(1, 16))
+    assert api.session.payloads == [{"IDMENSAGEM_INICIAL": 10}]
+    assert api._chave({"IDMENSAGEM_INICIAL": 10}) != api._chave({"IDMENSAGEM": 10})
+
+    # A consulta por ID continua a devolver só o registo pedido
+    assert api.consultar(10) == _registos(10)
+    assert api.session.payloads[-1] == {"IDMENSAGEM": 10}
+
+def test_mescla_ignora_ids_ja_conhecidos_e_repetidos(monkeypatch):
+    monkeypatch.setattr(api_mod, "INCREMENTAL_SYNC_PARAM", "IDMENSAGEM_INICIAL")
+    api = _api(ServidorFalso([]))
+    locais = api_mod.ingerir(_registos(1, 2, 3))
+    resposta = _registos(2, 4, 4, 5) + [{"IDMENSAGEM": "x"}, "lixo"]
+    dados = api._mesclar_incrementais(locais, resposta, 3)
+    assert _ids(dados) == [1, 2, 3, 4, 5]
+    assert len(locais) == 3 # Os dados originais não são alterados
+
+def test_busca_completa_manual_adia_a_reconciliacao(monkeypatch):
+    monkeypatch.setattr(api_mod, "INCREMENTAL_SYNC_PARAM", "IDMENSAGEM_INICIAL")
+    monkeypatch.setattr(api_mod, "FULL_SYNC_EVERY_MINUTES", 60)
+    api = _api(ServidorFalso(_registos(1, 2, 3), campo_a_partir_de="IDMENSAGEM_INICIAL"))
+    api_mod._estado_sync[(URL, "user")] = {'ultima_completa': api_mod.time.monotonic() - 2 * 3600}
+
+    dados = api.buscar_todos(force_refresh=True) # Ex: F5 ou carga inicial sem cache
+    api.sincronizar(dados)
+    assert api.session.payloads == [{"IDMENSAGEM": 0}, {"IDMENSAGEM_INICIAL": 3}]
+
+def test_reconciliacao_periodica_faz_busca_completa(monkeypatch):
+    monkeypatch.setattr(api_mod, "INCREMENTAL_SYNC_PARAM", "IDMENSAGEM_INICIAL")
+    monkeypatch.setattr(api_mod, "FULL_SYNC_EVERY_MINUTES", 60)
+    api = _api(ServidorFalso(_registos(1, 2, 3), campo_a_partir_de="IDMENSAGEM_INICIAL"))
+    api_mod._estado_sync[(URL, "user")] = {'ultima_completa': api_mod.time.monotonic() - 2 * 3600}
+
+    dados = api.sincronizar(_registos(1, 2))
+    api.sincronizar(dados)
+    assert api.session.payloads == [{"IDMENSAGEM": 0}, {"IDMENSAGEM_INICIAL": 3}]
+
+def _transporte_falso(handler):
+    httpx = pytest.importorskip("httpx")
+    from src.core.async_transport import TransporteAssincrono
+    transporte = TransporteAssincrono()
+    transporte._cliente = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return transporte
+
+def test_busca_completa_assincrona_e_descodificada_em_blocos_e_partilha_o_progresso():
+    httpx = pytest.importorskip("httpx")
+    corpo = _json_bytes(_registos(*range(1, 12001)))
+    metade = len(corpo) // 2
+    primeira_metade_lida = api_mod.threading.Event()
+    liberar = api_mod.threading.Event()
+
+    async def blocos():
+        yield corpo[:metade]
+        primeira_metade_lida.set()
+        await api_mod.asyncio.to_thread(liberar.wait, 5)
+        for i in range(metade, len(corpo), 4096):
+            yield corpo[i:i + 4096]
+
+    transporte = _transporte_falso(lambda pedido: httpx.Response(200, content=blocos()))
+    try:
+        api = _api(ServidorFalso([]))
+        futuro = transporte.submeter(api.sincronizar_async(transporte))
+        primeira_metade_lida.wait(5)
+
+        # A tela de Consultas junta-se à busca do monitor e recebe os resultados parciais
+        parciais, resultado = [], []
+        seguidor = api_mod.threading.Thread(
+            target=lambda: resultado.append(api.buscar_todos(force_refresh=True, ao_progredir=parciais.append))
+        )
+        seguidor.start()
+        chave = api._chave(api_mod.OPERACAO_BUSCAR_TODOS)
+        while not api_mod.pedidos_partilhados._ouvintes.get(chave):
+            api_mod.time.sleep(0.001)
+        liberar.set()
+        dados = futuro.result(5)
+        seguidor.join(5)
+    finally:
+        transporte.fechar()
+
+    assert _ids(dados) == list(range(1, 12001))
+    assert resultado == [dados]
+    assert parciais and all(0 < len(parcial) <= len(dados) for parcial in parciais)
+    assert api.session.payloads == [] # Nada passou pelo caminho síncrono
+    assert len(api.cache.get_cached_data()) == 12000
+
+def test_busca_completa_assincrona_truncada_lanca_erro_de_resposta():
+    httpx = pytest.importorskip("httpx")
+    corpo = _json_bytes(_registos(1, 2, 3))[:-5]
+    transporte = _transporte_falso(lambda pedido: httpx.Response(200, content=corpo))
+    try:
+        api = _api(ServidorFalso([]))
+        with pytest.raises(api_mod.APIResponseError):
+            transporte.submeter(api.sincronizar_async(transporte)).result(5)
+    finally:
+        transporte.fechar()
+    assert api.cache.get_cached_data() is None
+
+class SessaoComFalhas(SessaoFalsa):
+    """Lança as exceções ou responde com os códigos de 'falhas' (por ordem) antes de usar o servidor."""
+    def __init__(self, servidor, falhas):
+        super().__init__(servidor)
+        self.falhas = list(falhas)
+
+    def post(self, url, json=None, auth=None, timeout=None, stream=False):
+        if self.falhas:
+            self.payloads.append(json)
+            falha = self.falhas.pop(0)
+            if isinstance(falha, int):
+                return RespostaFalsa(b"erro", status_code=falha)
+            raise falha
+        return super().post(url, json=json, auth=auth, timeout=timeout, stream=stream)
+
+def _api_com_falhas(falhas, registos=()):
+    api = _api(ServidorFalso(list(registos)))
+    api.session = SessaoComFalhas(api.session.servidor, falhas)
+    return api
+
+def test_erros_5xx_e_de_ligacao_sao_repetidos():
+    api = _api_com_falhas([503, requests.exceptions.ConnectionError("recusada")], _registos(7))
+    assert api.consultar(7) == _registos(7)
+    assert len(api.session.payloads) == 3
+
+def test_erro_4xx_nao_e_repetido_nem_conta_para_o_disjuntor():
+    api = _api_com_falhas([404] * 10)
+    for _ in range(api_mod.CIRCUIT_BREAKER_FAILURES + 1):
+        with pytest.raises(api_mod.APIClientError):
+            api.consultar(7)
+    assert len(api.session.payloads) == api_mod.CIRCUIT_BREAKER_FAILURES + 1
+    api.verificar_disjuntor()
+
+def test_timeout_de_leitura_da_busca_completa_nao_e_repetido():
+    api = _api_com_falhas([requests.exceptions.ReadTimeout("lento")] * 10)
+    with pytest.raises(api_mod.APITimeoutError) as erro:
+        api.buscar_todos(force_refresh=True)
+    assert erro.value.leitura
+    assert len(api.session.payloads) == 1
+
+def test_pedido_pequeno_repete_ate_max_retries_dentro_do_prazo(monkeypatch):
+    api = _api_com_falhas([requests.exceptions.ReadTimeout("lento")] * 10)
+    with pytest.raises(api_mod.APITimeoutError):
+        api.consultar(7)
+    assert len(api.session.payloads) == api_mod.MAX_RETRIES + 1
+
+    # A próxima tentativa não caberia no prazo (que inclui o seu tempo limite de leitura)
+    monkeypatch.setattr(api_mod, "REQUEST_DEADLINE_SECONDS", api_mod.INCREMENTAL_READ_TIMEOUT_SECONDS / 2)
+    api = _api_com_falhas([requests.exceptions.ReadTimeout("lento")] * 10)
+    with pytest.raises(api_mod.APITimeoutError):
+        api.consultar(7)
+    assert len(api.session.payloads) == 1
+
+def test_falhas_repetidas_abrem_o_disjuntor_do_cliente():
+    api = _api_com_falhas([500] * 100)
+    for _ in range(api_mod.CIRCUIT_BREAKER_FAILURES):
+        with pytest.raises(api_mod.APIServerError):
+            api.consultar(7)
+    with pytest.raises(api_mod.APICircuitOpenError):
+        api.verificar_disjuntor()
+
+def test_consulta_em_lote_junta_respostas_sem_ids_repetidos_e_reporta_erros():
+    registos = _registos(1, 2, 3) + [{"IDMENSAGEM": 4, "TrackID": "T2", "DATAHORA": "2025-01-01T11:00:00"}]
+    api = _api(ServidorFalso(registos))
+    encontrados, erros = api.consultar_ids([3, "1", 3, 99, "x"])
+    assert [registo["IDMENSAGEM"] for registo in encontrados] == [3, 1]
+    assert list(erros) == ["x"] # 99 não existe (resposta vazia); "x" não é um ID válido
+    assert sorted(p["IDMENSAGEM"] for p in api.session.payloads) == [1, 3, 99]
+
+    encontrados, erros = api.consultar_trackids(["T1", "T2", "T1"])
+    assert [registo["IDMENSAGEM"] for registo in encontrados] == [3, 4]
+    assert erros == {}
+
+def test_consulta_em_lote_respeita_o_limite_de_pedidos_simultaneos():
+    api = _api(ServidorFalso([]))
+    em_curso, maximo = [0], [0]
+    lock = api_mod.threading.Lock()
+
+    def consulta(item):
+        with lock:
+            em_curso[0] += 1
+            maximo[0] = max(maximo[0], em_curso[0])
+        api_mod.time.sleep(0.01)
+        with lock:
+            em_curso[0] -= 1
+        if item % 5 == 0:
+            raise api_mod.APIServerError(500, f"falhou {item}")
+        return {"IDMENSAGEM": item}
+
+    encontrados, erros = api._consultar_em_lote(range(1, 21), consulta, 3)
+    assert maximo[0] == 3
+    assert [registo["IDMENSAGEM"] for registo in encontrados] == [i for i in range(1, 21) if i % 5]
+    assert sorted(erros) == [5, 10, 15, 20]
+    assert api._consultar_em_lote([], consulta, 3) == ([], {})
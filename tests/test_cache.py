@@ -0,0 +1,60 @@
+# tests/test_cache.py
+
+import sqlite3
+
+import pytest
+
+from src.core import cache as cache_mod
+from src.core.cache import CacheManager
+from src.core.status import calcular_status
+
+REGISTOS = [
+    {"IDMENSAGEM": 1, "DATAHORA": "2025-01-01T10:00:00", "LATITUDE": "-23.500000", "LONGITUDE": -46.25,
+     "PLACA": "ABC1234", "TrackID": 12345},
+    {"IDMENSAGEM": "2", "DATAHORA": "2025-01-01T11:00:00", "LATITUDE": -23.5, "LONGITUDE": None,
+     "PLACA": None, "TrackID": "12345", "VELOCIDADE": 80},
+    {"IDMENSAGEM": 3, "DATAHORA": None, "LATITUDE": True, "LONGITUDE": {"x": 1}, "PLACA": 7, "TrackID": 9},
+]
+
+@pytest.fixture
+def base(tmp_path, monkeypatch):
+    caminho = str(tmp_path / "cache.db")
+    monkeypatch.setattr(cache_mod, "CACHE_DB", caminho)
+    return caminho
+
+def _tipos(registos):
+    return [{coluna: (valor, type(valor)) for coluna, valor in registo.items()} for registo in registos]
+
+def test_leitura_devolve_os_valores_com_os_tipos_originais(base):
+    cache = CacheManager("https://api.exemplo", "user")
+    cache.set_cached_data(REGISTOS)
+    assert _tipos(cache.get_cached_data()) == _tipos(REGISTOS)
+
+def test_upsert_preserva_os_tipos_e_nao_duplica_trackids_no_status(base):
+    cache = CacheManager("https://api.exemplo", "user")
+    cache.set_cached_data(REGISTOS[:1])
+    cache.upsert_registos([dict(REGISTOS[0], IDMENSAGEM=4, DATAHORA="2025-01-01T12:00:00")])
+    dados = cache.get_cached_data()
+    assert [registo["TrackID"] for registo in dados] == [12345, 12345]
+    assert list(calcular_status(dados)) == [12345]
+
+def test_clientes_do_mesmo_utilizador_em_servidores_diferentes_nao_partilham_linhas(base):
+    CacheManager("https://a.exemplo", "user").set_cached_data(REGISTOS[:1])
+    assert CacheManager("https://b.exemplo", "user").get_cached_data() is None
+
+def test_esquema_antigo_e_descartado(base):
+    with sqlite3.connect(base) as conn:
+        conn.execute("""CREATE TABLE registos (cliente TEXT NOT NULL, idmensagem INTEGER NOT NULL,
+                        datahora TEXT, latitude REAL, longitude REAL, placa TEXT, trackid TEXT, extras TEXT,
+                        PRIMARY KEY (cliente, idmensagem)) WITHOUT ROWID""")
+        conn.execute("CREATE TABLE cache_meta (cliente TEXT PRIMARY KEY, timestamp DATETIME NOT NULL, "
+                     "total INTEGER NOT NULL, max_id INTEGER NOT NULL)")
+        conn.execute("INSERT INTO registos VALUES ('user', 1, NULL, NULL, NULL, NULL, '12345', NULL)")
+        conn.execute("INSERT INTO cache_meta VALUES ('user', '2025-01-01T10:00:00', 1, 1)")
+
+    cache = CacheManager("https://api.exemplo", "user")
+    cache.set_cached_data(REGISTOS[:1])
+    with sqlite3.connect(base) as conn:
+        assert conn.execute("SELECT DISTINCT cliente FROM registos").fetchall() == [("user@https://api.exemplo",)]
+        assert conn.execute("SELECT cliente FROM cache_meta").fetchall() == [("user@https://api.exemplo",)]
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == cache_mod.VERSAO_ESQUEMA
@@ -0,0 +1,87 @@
+# tests/test_circuit_breaker.py
+
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from src.core import circuit_breaker as disjuntor_mod
+from src.core.circuit_breaker import DisjuntorCircuito
+from src.core.exceptions import APICircuitOpenError
+
+@pytest.fixture
+def relogio(monkeypatch):
+    tempo = SimpleNamespace(agora=0.0)
+    monkeypatch.setattr(disjuntor_mod, "time", SimpleNamespace(monotonic=lambda: tempo.agora))
+    return tempo
+
+def _aberto(relogio, limite=3, espera=60):
+    disjuntor = DisjuntorCircuito("cliente", limite, espera)
+    for _ in range(limite):
+        disjuntor.registar_falha()
+    return disjuntor
+
+def test_abre_apos_falhas_consecutivas_e_recusa_durante_a_espera(relogio):
+    disjuntor = DisjuntorCircuito("cliente", 3, 60)
+    disjuntor.registar_falha()
+    disjuntor.registar_falha()
+    disjuntor.verificar() # Ainda fechado
+    disjuntor.registar_falha()
+    relogio.agora = 59
+    with pytest.raises(APICircuitOpenError):
+        disjuntor.verificar()
+
+def test_meio_aberto_deixa_passar_um_unico_pedido(relogio):
+    disjuntor = _aberto(relogio)
+    relogio.agora = 61
+    passaram, recusados = [], []
+
+    def pedido():
+        try:
+            disjuntor.verificar()
+            passaram.append(1)
+        except APICircuitOpenError:
+            recusados.append(1)
+
+    threads = [threading.Thread(target=pedido) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert (len(passaram), len(recusados)) == (1, 7)
+
+def test_sucesso_do_teste_fecha_e_falha_reabre(relogio):
+    disjuntor = _aberto(relogio)
+    relogio.agora = 61
+    disjuntor.verificar()
+    disjuntor.registar_falha()
+    with pytest.raises(APICircuitOpenError):
+        disjuntor.verificar() # Reaberto por mais um período
+    relogio.agora = 122
+    disjuntor.verificar()
+    disjuntor.registar_sucesso()
+    disjuntor.verificar()
+    disjuntor.verificar() # Fechado: todos passam
+
+def test_teste_sem_resultado_nao_bloqueia_o_cliente(relogio):
+    disjuntor = _aberto(relogio)
+    relogio.agora = 61
+    disjuntor.verificar()
+    disjuntor.libertar_teste() # Ex: erro 4xx
+    disjuntor.verificar()
+
+def test_teste_que_nunca_termina_deixa_de_contar_passada_a_espera(relogio):
+    disjuntor = _aberto(relogio)
+    relogio.agora = 61
+    disjuntor.verificar() # Ex: tarefa cancelada antes do pedido
+    relogio.agora = 100
+    with pytest.raises(APICircuitOpenError):
+        disjuntor.verificar()
+    relogio.agora = 122
+    disjuntor.verificar()
+
+def test_limite_zero_desativa(relogio):
+    disjuntor = DisjuntorCircuito("cliente", 0, 60)
+    for _ in range(10):
+        disjuntor.registar_falha()
+    disjuntor.verificar()
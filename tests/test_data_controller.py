@@ -0,0 +1,44 @@
+# tests/test_data_controller.py
+
+from src.core.data_controller import DataController
+from src.utils.config import COLUNAS
+
+def _controlador():
+    controller = DataController(COLUNAS, 100)
+    controller.carregar_dados([
+        {"IDMENSAGEM": 1, "TrackID": "12", "DATAHORA": "2025-01-01T10:00:00"},
+        {"IDMENSAGEM": 2, "TrackID": "123", "DATAHORA": "2025-01-01T11:00:00"},
+        {"IDMENSAGEM": 3, "TrackID": "5123", "DATAHORA": "2025-01-01T12:00:00"},
+        {"IDMENSAGEM": 4, "TrackID": "99", "DATAHORA": "2025-01-01T13:00:00"},
+    ])
+    return controller
+
+def _ids(controller):
+    return sorted(registo["IDMENSAGEM"] for registo in controller.dados_filtrados)
+
+def test_filtro_exato_seguido_de_substring_pesquisa_todos_os_dados():
+    controller = _controlador()
+    controller.set_filtro_trackid("12")
+    controller.aplicar_filtro()
+    assert _ids(controller) == [1]
+
+    controller.set_filtro_texto("123", "TrackID")
+    controller.aplicar_filtro()
+    assert _ids(controller) == [2, 3]
+
+def test_filtro_exato_seguido_do_mesmo_termo_por_substring():
+    controller = _controlador()
+    controller.set_filtro_trackid("12")
+    controller.aplicar_filtro()
+
+    controller.set_filtro_texto("12", "TrackID")
+    controller.aplicar_filtro()
+    assert _ids(controller) == [1, 2, 3]
+
+def test_refinamento_de_substring_restringe_o_resultado_anterior():
+    controller = _controlador()
+    controller.set_filtro_texto("12", "TrackID")
+    controller.aplicar_filtro()
+    controller.set_filtro_texto("512", "TrackID")
+    controller.aplicar_filtro()
+    assert _ids(controller) == [3]
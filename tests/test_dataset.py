@@ -0,0 +1,48 @@
+# tests/test_dataset.py
+
+import random
+
+import pytest
+
+from src.core.dataset import DatasetColunar
+
+def _registos(inicio, quantidade, semente):
+    aleatorio = random.Random(semente)
+    registos = []
+    for id_mensagem in range(inicio, inicio + quantidade):
+        hora = aleatorio.randrange(6) # Poucas horas distintas: muitas datas iguais
+        datahora = f"2025-01-0{1 + hora % 3} {hora:02d}:00:00" if aleatorio.random() > 0.1 else "inválida"
+        registos.append({"IDMENSAGEM": id_mensagem, "DATAHORA": datahora})
+    return registos
+
+def _indice_reconstruido(dataset):
+    reconstruido = DatasetColunar()
+    reconstruido.anexar(dataset.iterar_registos())
+    return reconstruido.indice_datas()
+
+@pytest.mark.parametrize("semente", range(5))
+def test_indice_mesclado_igual_ao_reconstruido(semente):
+    dataset = DatasetColunar(_registos(0, 200, semente))
+    dataset.indice_datas()
+    for lote in range(1, 4):
+        dataset = dataset.com_novos(_registos(200 * lote, 7 * lote, semente + lote))
+        assert dataset._indice_datas is not None # Mesclado, não descartado
+        assert dataset.indice_datas() == _indice_reconstruido(dataset)
+
+def test_com_novos_nao_altera_o_indice_do_original():
+    original = DatasetColunar(_registos(0, 50, 1))
+    indice = original.indice_datas()
+    copia_indice = tuple(map(list, indice))
+    novo = original.com_novos(_registos(50, 10, 2))
+    assert len(novo.indice_datas()[1]) == 60
+    assert tuple(map(list, original.indice_datas())) == copia_indice
+
+def test_intervalo_inclui_linhas_acrescentadas():
+    dataset = DatasetColunar([{"IDMENSAGEM": 1, "DATAHORA": "2025-01-01 10:00:00"}])
+    dataset.indice_datas()
+    dataset = dataset.com_novos([
+        {"IDMENSAGEM": 2, "DATAHORA": "2025-01-01 09:00:00"},
+        {"IDMENSAGEM": 3, "DATAHORA": "2025-01-02 09:00:00"},
+    ])
+    inicio, fim = dataset.timestamps[1], dataset.timestamps[2]
+    assert list(dataset.linhas_no_intervalo(inicio, fim)) == [1, 0]
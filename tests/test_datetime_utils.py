@@ -0,0 +1,34 @@
+# tests/test_datetime_utils.py
+
+from datetime import datetime
+
+import pytest
+
+from src.core.status import calcular_status
+from src.utils.datetime_utils import _parse_formato_fixo, datetime_to_timestamp, parse_api_datetime_to_timestamp
+
+@pytest.mark.parametrize("texto", [
+    "2025-01-01 00:00:00", "2025-01-01T23:59:59", "2024-02-29T12:30:05", "2025-01-01T10:00:00.25",
+    "2025-12-31 10:00:00Z",
+])
+def test_caminho_rapido_igual_ao_parser_completo(texto):
+    esperado = datetime_to_timestamp(datetime.fromisoformat(texto.replace("Z", "")))
+    assert _parse_formato_fixo(texto) == esperado
+    assert parse_api_datetime_to_timestamp(texto) == esperado
+
+@pytest.mark.parametrize("texto", [
+    "2025-01-01 25:61:00", "2025-01-01 24:00:00", "2025-01-01 10:60:00", "2025-01-01 10:00:60",
+    "2025-01-01X10:00:00", "2025/01/01 10:00:00", "2025-01-01 10-00-00", "2025-01-01 +1:00:00",
+    "2025-02-30 10:00:00", "", None, "ontem",
+])
+def test_datas_invalidas_sao_rejeitadas(texto):
+    assert parse_api_datetime_to_timestamp(texto) is None
+
+@pytest.mark.parametrize("texto", ["2025-01-01T10:00:00+01:00", "2025-01-01", "2025-01-01 10:00"])
+def test_outros_formatos_iso_usam_o_parser_completo(texto):
+    assert _parse_formato_fixo(texto) is None
+    assert parse_api_datetime_to_timestamp(texto) is not None
+
+def test_hora_invalida_fica_como_erro_no_status():
+    status = calcular_status([{"IDMENSAGEM": 1, "TrackID": "A", "DATAHORA": "2025-01-01 25:61:00"}])
+    assert status["A"]["status"] == "ERRO"
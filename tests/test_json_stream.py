@@ -0,0 +1,38 @@
+# tests/test_json_stream.py
+
+import json
+
+import pytest
+
+from src.core.json_stream import iterar_elementos, iterar_lotes
+
+def _blocos(texto, tamanho):
+    dados = texto.encode("utf-8")
+    return [dados[i:i + tamanho] for i in range(0, len(dados), tamanho)]
+
+VALIDOS = [
+    '[]', ' [ ] ', '[1]', '[1, 2 ,3]', '[-0.5, 1e3, "a,]b", {"x": [1, {"y": null}]}, true]',
+    '["ção", "€"]', '{"IDMENSAGEM": 1}', 'null', '[1]  \n',
+]
+INVALIDOS = ['[1,,2]', '[1 2]', '[,1]', '[1,]', '[1,2] x', '[1]]', '[1', '[{"a": 1}', '[1x]']
+
+@pytest.mark.parametrize("tamanho", [1, 2, 3, 7, 1024])
+@pytest.mark.parametrize("texto", VALIDOS)
+def test_igual_ao_json_loads_em_qualquer_divisao_em_blocos(texto, tamanho):
+    esperado = json.loads(texto)
+    if not isinstance(esperado, list):
+        esperado = [] if esperado is None else [esperado]
+    assert list(iterar_elementos(_blocos(texto, tamanho))) == esperado
+
+@pytest.mark.parametrize("tamanho", [1, 3, 1024])
+@pytest.mark.parametrize("texto", INVALIDOS)
+def test_json_mal_formado_lanca_value_error(texto, tamanho):
+    with pytest.raises(ValueError):
+        list(iterar_elementos(_blocos(texto, tamanho)))
+
+def test_corpo_vazio_nao_produz_elementos():
+    assert list(iterar_elementos([])) == []
+
+def test_iterar_lotes():
+    lotes = list(iterar_lotes(_blocos(json.dumps(list(range(7))), 4), 3))
+    assert lotes == [[0, 1, 2], [3, 4, 5], [6]]
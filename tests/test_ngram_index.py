@@ -0,0 +1,36 @@
+# tests/test_ngram_index.py
+
+import pytest
+
+from src.core.dataset import DatasetColunar
+from src.core.ngram_index import IndiceTrigramas
+
+def _pesquisa_direta(dataset, coluna, termo):
+    return [linha for linha, texto in enumerate(dataset.texto(coluna)) if termo in texto]
+
+@pytest.mark.parametrize("coluna, termos", [
+    ("PLACA", ["abc", "ab", "c12", "xyz", "1", "abc1234"]),   # Poucos valores distintos
+    ("IDMENSAGEM", ["1", "12", "999", "5000", "a"]),          # Alta cardinalidade
+])
+def test_pesquisa_igual_a_pesquisa_direta(coluna, termos):
+    registos = [{"IDMENSAGEM": i, "PLACA": f"ABC{i % 7}234" if i % 3 else f"XC12{i % 5}"} for i in range(2000)]
+    dataset = DatasetColunar(registos)
+    indice = IndiceTrigramas(coluna)
+    indice.atualizar(dataset)
+    for termo in termos:
+        assert indice.pesquisar(termo) == _pesquisa_direta(dataset, coluna, termo)
+
+def test_atualizacao_incremental_indexa_as_linhas_novas():
+    dataset = DatasetColunar([{"IDMENSAGEM": i, "PLACA": "AAA111"} for i in range(10)])
+    indice = IndiceTrigramas("PLACA")
+    indice.atualizar(dataset)
+    estendido = dataset.com_novos([{"IDMENSAGEM": 10, "PLACA": "BBB222"}, {"IDMENSAGEM": 11, "PLACA": "AAA111"}])
+    indice.atualizar(estendido)
+    assert indice.linhas_indexadas == 12
+    assert indice.pesquisar("bbb") == [10]
+    assert indice.pesquisar("a111") == list(range(10)) + [11]
+
+    # Outro dataset (outra linhagem): o índice é reconstruído
+    indice.atualizar(DatasetColunar([{"IDMENSAGEM": 1, "PLACA": "CCC333"}]))
+    assert indice.pesquisar("aaa") == []
+    assert indice.pesquisar("ccc") == [0]
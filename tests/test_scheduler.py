@@ -0,0 +1,66 @@
+# tests/test_scheduler.py
+
+import pytest
+
+from src.core.scheduler import AgendadorClientes, intervalo_por_atividade
+
+def test_primeiras_buscas_sao_escalonadas_na_janela_inicial():
+    agendador = AgendadorClientes(janela_inicial=30, variacao=0)
+    agendador.configurar({f"c{i}": 600 for i in range(6)}, agora=0)
+    inicios = sorted(estado['proxima'] for estado in agendador._clientes.values())
+    # Um cliente por fatia de 5 s, sem dois no mesmo instante
+    for posicao, inicio in enumerate(inicios):
+        assert 5 * posicao <= inicio < 5 * (posicao + 1)
+
+def test_pendentes_marca_em_curso_e_concluir_reagenda_com_variacao():
+    agendador = AgendadorClientes(janela_inicial=0, variacao=0.1)
+    agendador.configurar({"A": 600}, agora=0)
+    assert agendador.pendentes(agora=1) == ["A"]
+    assert agendador.pendentes(agora=2) == [] # Já em curso
+    assert agendador.segundos_ate_proxima(agora=2) is None
+
+    agendador.registar_atividade("A", True)
+    agendador.concluir("A", agora=10)
+    assert 10 + 540 <= agendador._clientes["A"]['proxima'] <= 10 + 660
+
+def test_cliente_inativo_recua_ate_ao_fator_maximo_e_recupera_com_dados_novos():
+    agendador = AgendadorClientes(janela_inicial=0, variacao=0, fator_max_inativo=4)
+    agendador.configurar({"A": 100}, agora=0)
+    intervalos = []
+    for _ in range(4):
+        agendador.pendentes(agora=10**6)
+        agendador.concluir("A", agora=0)
+        intervalos.append(agendador._clientes["A"]['atual'])
+    assert intervalos == [200, 400, 400, 400]
+
+    agendador.concluir("A", falhou=True, agora=0)
+    assert agendador._clientes["A"]['atual'] == 400 # Uma falha não altera o intervalo
+
+    agendador.registar_atividade("A", True)
+    agendador.concluir("A", agora=0)
+    assert agendador._clientes["A"]['atual'] == 100
+
+def test_intervalo_zero_so_busca_no_arranque():
+    agendador = AgendadorClientes(janela_inicial=0)
+    agendador.configurar({"A": 0}, agora=0)
+    assert agendador.pendentes(agora=1) == ["A"]
+    agendador.concluir("A", agora=1)
+    assert agendador.segundos_ate_proxima(agora=1) is None
+    agendador.definir_base("A", 60) # A política adaptativa não ativa um cliente desativado
+    assert agendador._clientes["A"]['base'] == 0
+
+def test_intervalo_maximo_limita_o_recuo():
+    agendador = AgendadorClientes(janela_inicial=0, variacao=0, fator_max_inativo=10, intervalo_maximo=250)
+    agendador.configurar({"A": 100}, agora=0)
+    for _ in range(3):
+        agendador.concluir("A", agora=0)
+    assert agendador._clientes["A"]['atual'] == 250
+
+@pytest.mark.parametrize("ultimos, esperado", [
+    ([], 3600),
+    ([1000, 1000], 120),       # Todos ativos
+    ([1000, -10**6], 1860),    # Metade ativa
+    ([-10**6, -10**6], 3600),  # Nenhum ativo
+])
+def test_intervalo_por_atividade(ultimos, esperado):
+    assert intervalo_por_atividade(ultimos, 1000, 120, 3600, 3600) == esperado
@@ -0,0 +1,137 @@
+# tests/test_single_flight.py
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.core.single_flight import SingleFlight
+
+def test_pedidos_simultaneos_partilham_uma_execucao():
+    voo = SingleFlight()
+    em_curso = threading.Event()
+    liberar = threading.Event()
+    chamadas = []
+
+    def pedido():
+        chamadas.append(1)
+        em_curso.set()
+        liberar.wait(5)
+        return "resultado"
+
+    resultados = []
+    def executar():
+        resultados.append(voo.executar("k", pedido))
+
+    lider = threading.Thread(target=executar)
+    lider.start()
+    em_curso.wait(5)
+    seguidores = [threading.Thread(target=executar) for _ in range(4)]
+    for thread in seguidores:
+        thread.start()
+    time.sleep(0.1) # Dá tempo aos seguidores para ficarem à espera do mesmo pedido
+    liberar.set()
+    for thread in [lider] + seguidores:
+        thread.join(5)
+    assert chamadas == [1]
+    assert resultados == ["resultado"] * 5
+
+def test_erro_e_propagado_a_quem_espera_e_nao_fica_em_cache():
+    voo = SingleFlight()
+    notificados = []
+    voo.subscrever(lambda chave, resultado: notificados.append(chave))
+    em_curso = threading.Event()
+    liberar = threading.Event()
+
+    def falha():
+        em_curso.set()
+        liberar.wait(5)
+        raise ValueError("falhou")
+
+    erros = []
+    def esperar():
+        try:
+            voo.executar("k", lambda: "não deve correr")
+        except ValueError as e:
+            erros.append(e)
+
+    lider = threading.Thread(target=lambda: pytest.raises(ValueError, voo.executar, "k", falha))
+    lider.start()
+    em_curso.wait(5)
+    seguidor = threading.Thread(target=esperar)
+    seguidor.start()
+    liberar.set()
+    lider.join(5)
+    seguidor.join(5)
+
+    assert [str(e) for e in erros] == ["falhou"]
+    assert notificados == [] # Subscritores só recebem sucessos
+    # A chave é libertada: o pedido seguinte volta a executar
+    assert voo.executar("k", lambda: 42) == 42
+
+def test_subscritores_sao_notificados_antes_de_quem_espera():
+    voo = SingleFlight()
+    eventos = []
+    voo.subscrever(lambda chave, resultado: eventos.append(("subscritor", resultado)))
+    eventos.append(("retorno", voo.executar("k", lambda: 1)))
+    assert eventos == [("subscritor", 1), ("retorno", 1)]
+
+def test_executar_async_partilha_e_propaga_erros():
+    voo = SingleFlight()
+    chamadas = []
+
+    async def pedido():
+        chamadas.append(1)
+        await asyncio.sleep(0.01)
+        return "ok"
+
+    async def falha():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("erro")
+
+    async def principal():
+        resultados = await asyncio.gather(*(voo.executar_async("k", pedido) for _ in range(3)))
+        erros = await asyncio.gather(*(voo.executar_async("e", falha) for _ in range(2)), return_exceptions=True)
+        return resultados, erros
+
+    resultados, erros = asyncio.run(principal())
+    assert resultados == ["ok"] * 3 and len(chamadas) == 1
+    assert all(isinstance(erro, RuntimeError) for erro in erros)
+
+def test_resultados_parciais_chegam_a_quem_se_junta_a_meio():
+    voo = SingleFlight()
+    primeiro_publicado = threading.Event()
+    liberar = threading.Event()
+    parciais_lider = []
+    parciais = []
+
+    def pedido():
+        voo.progredir("k", lambda: "parcial 1")
+        primeiro_publicado.set()
+        liberar.wait(5)
+        voo.progredir("k", lambda: "parcial 2")
+        return "final"
+
+    lider = threading.Thread(target=voo.executar, args=("k", pedido), kwargs={"ao_progredir": parciais_lider.append})
+    lider.start()
+    primeiro_publicado.wait(5)
+    resultado = []
+    seguidor = threading.Thread(target=lambda: resultado.append(voo.executar("k", pedido, ao_progredir=parciais.append)))
+    seguidor.start()
+    while len(voo._ouvintes.get("k", ())) < 2:
+        time.sleep(0.001)
+    liberar.set()
+    lider.join(5)
+    seguidor.join(5)
+
+    assert parciais_lider == ["parcial 1", "parcial 2"]
+    assert parciais == ["parcial 1", "parcial 2"] # O primeiro é entregue ao juntar-se
+    assert resultado == ["final"]
+    assert "k" not in voo._parciais and "k" not in voo._ouvintes
+
+def test_parcial_so_e_criado_se_alguem_acompanhar():
+    voo = SingleFlight()
+    criados = []
+    voo.executar("k", lambda: voo.progredir("k", lambda: criados.append(1)))
+    assert criados == []
@@ -0,0 +1,58 @@
+# tests/test_status.py
+
+from src.core.dataset import DatasetColunar
+from src.core.status import UltimasPosicoes, calcular_status
+from src.utils.datetime_utils import parse_api_datetime_to_timestamp
+
+AGORA = parse_api_datetime_to_timestamp("2025-01-02T12:00:00")
+
+def _registo(id_mensagem, track_id, datahora, latitude=0.0):
+    return {"IDMENSAGEM": id_mensagem, "TrackID": track_id, "DATAHORA": datahora,
+            "LATITUDE": latitude, "LONGITUDE": 0.0}
+
+def test_guarda_o_registo_mais_recente_independentemente_da_ordem():
+    dataset = DatasetColunar([
+        _registo(1, "A", "2025-01-02T10:00:00", latitude=1.0),
+        _registo(2, "A", "2025-01-02T11:00:00", latitude=2.0),
+        _registo(3, "A", "2025-01-02T09:00:00", latitude=3.0), # Chega depois, mas é mais antigo
+    ])
+    posicoes = UltimasPosicoes()
+    posicoes.atualizar(dataset)
+    assert posicoes.status(AGORA)["A"] == {
+        'status': 'OK', 'latitude': 2.0, 'longitude': 0.0, 'datahora': "2025-01-02T11:00:00"
+    }
+
+def test_mescla_incremental_processa_so_as_linhas_novas():
+    posicoes = UltimasPosicoes()
+    dataset = DatasetColunar([_registo(1, "A", "2025-01-01T08:00:00"), _registo(2, "B", "2025-01-02T10:00:00")])
+    posicoes.atualizar(dataset)
+    assert posicoes.status(AGORA)["A"]["status"] == 'SEM REGISTRO RECENTE'
+
+    estendido = dataset.com_novos([_registo(3, "A", "2025-01-02T11:30:00"), _registo(4, "C", "2025-01-02T11:00:00")])
+    posicoes.atualizar(estendido)
+    assert posicoes.linhas_processadas == 4
+    status = posicoes.status(AGORA)
+    assert status["A"]["status"] == 'OK'
+    assert status["A"]["datahora"] == "2025-01-02T11:30:00"
+    assert set(status) == {"A", "B", "C"}
+
+    # Um registo novo mais antigo não substitui a posição mais recente
+    posicoes.atualizar(estendido.com_novos([_registo(5, "A", "2025-01-02T06:00:00")]))
+    assert posicoes.status(AGORA)["A"]["datahora"] == "2025-01-02T11:30:00"
+
+def test_dataset_de_outra_linhagem_reconstroi_a_tabela():
+    posicoes = UltimasPosicoes()
+    posicoes.atualizar(DatasetColunar([_registo(1, "A", "2025-01-02T10:00:00")]))
+    posicoes.atualizar(DatasetColunar([_registo(7, "B", "2025-01-02T10:00:00")]))
+    assert set(posicoes.status(AGORA)) == {"B"}
+
+def test_trackid_sem_datas_validas_fica_com_erro():
+    posicoes = UltimasPosicoes()
+    posicoes.atualizar(DatasetColunar([_registo(1, "A", "invalida"), _registo(2, "B", "invalida"),
+                                       _registo(3, "B", "2025-01-02T10:00:00")]))
+    status = posicoes.status(AGORA)
+    assert status["A"]["status"] == 'ERRO'
+    assert status["B"]["status"] == 'OK'
+
+def test_sem_dados_retorna_status_vazio():
+    assert calcular_status([]) == {}